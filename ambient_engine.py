@@ -0,0 +1,264 @@
+"""Streaming procedural ambient audio.
+
+AmbientEngine synthesizes CRT hum, static crackle and a low drone a short
+chunk at a time on a background thread, and keeps one reserved mixer channel
+fed through Channel.queue. At most three chunks exist at any moment (one
+playing, one queued, one being prepared), so memory use is fixed no matter
+how long the ambience runs and a parameter change is audible within
+three chunk durations.
+"""
+import math
+import random
+import threading
+import time
+from array import array
+
+import pygame
+import sound_synth
+
+numpy = sound_synth.numpy
+
+CHUNK_DURATION = 0.08  # seconds of audio per queued chunk
+GLIDE = 0.35           # fraction of the way to new parameters covered per chunk
+CRACKLE_LENGTH = 24    # samples per static impulse
+CRACKLE_DECAY = 0.75
+
+# hum/drone/crackle_level are amplitudes (0-1), crackle is impulses per second
+DEFAULT_PARAMS = {
+    'hum': 0.0,
+    'hum_freq': 60.0,
+    'drone': 0.0,
+    'drone_freq': 55.0,
+    'crackle': 0.0,
+    'crackle_level': 0.0,
+}
+
+# Per-room ambience, keyed by GameState.current_state
+AMBIENT_PRESETS = {
+    'main_menu': {'hum': 0.04, 'drone': 0.05, 'drone_freq': 55.0, 'crackle': 6.0, 'crackle_level': 0.08},
+    'start': {'hum': 0.06, 'drone': 0.04, 'drone_freq': 49.0, 'crackle': 3.0, 'crackle_level': 0.05},
+    'terminal_prompt': {'hum': 0.09, 'hum_freq': 60.0, 'drone': 0.03, 'drone_freq': 65.4, 'crackle': 10.0, 'crackle_level': 0.1},
+    'door_unlocked_state': {'hum': 0.05, 'drone': 0.06, 'drone_freq': 73.4, 'crackle': 2.0, 'crackle_level': 0.04},
+    'end_game': {'hum': 0.0, 'drone': 0.03, 'drone_freq': 82.4, 'crackle': 0.0, 'crackle_level': 0.0},
+}
+
+
+class AmbientEngine:
+    def __init__(self, channel, sample_rate, channels=2, chunk_duration=CHUNK_DURATION, seed=None):
+        self.channel = channel
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.chunk_duration = chunk_duration
+        self.frames = int(sample_rate * chunk_duration)
+        self.rng = random.Random(seed)
+        
+        # Parameters: the worker glides self.params toward self._target
+        self.params = dict(DEFAULT_PARAMS)
+        self._target = dict(DEFAULT_PARAMS)
+        self._lock = threading.Lock()
+        
+        # Oscillator phases carried across chunks so joins are seamless
+        self._hum_phase = 0.0
+        self._drone_phases = [0.0, 0.0]
+        self._lfo_phase = 0.0
+        self._crackle_carry = 0.0
+        
+        # Worker thread
+        self._thread = None
+        self._stop = threading.Event()
+        
+        # Statistics
+        self.chunks_rendered = 0
+        self.chunks_queued = 0
+        self.underruns = 0
+        self.render_time_total = 0.0
+        self.render_time_max = 0.0
+    
+    @property
+    def max_latency(self):
+        """Worst-case delay before a parameter change is heard, in seconds"""
+        return 3 * self.chunk_duration
+    
+    def set_params(self, **params):
+        """Change ambience parameters; unknown names raise KeyError"""
+        for name in params:
+            if name not in DEFAULT_PARAMS:
+                raise KeyError(f"Unknown ambient parameter '{name}'")
+        with self._lock:
+            self._target.update(params)
+    
+    def set_preset(self, room):
+        """Switch to a room's preset (silence for rooms without one)"""
+        params = dict(DEFAULT_PARAMS)
+        params.update(AMBIENT_PRESETS.get(room, {}))
+        self.set_params(**params)
+    
+    def start(self):
+        """Start streaming on the engine's channel"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ambient-audio", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop streaming and silence the channel"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+        self.channel.stop()
+    
+    def is_running(self):
+        """Check whether the worker thread is streaming"""
+        return self._thread is not None
+    
+    def get_stats(self):
+        """Get streaming counters"""
+        rendered = max(1, self.chunks_rendered)
+        return {
+            'chunks_rendered': self.chunks_rendered,
+            'chunks_queued': self.chunks_queued,
+            'underruns': self.underruns,
+            'avg_render_ms': self.render_time_total / rendered * 1000,
+            'max_render_ms': self.render_time_max * 1000,
+            'max_latency_ms': self.max_latency * 1000,
+        }
+    
+    def _run(self):
+        """Worker loop: keep exactly one chunk queued behind the playing one"""
+        pending = None
+        poll_interval = self.chunk_duration / 4
+        
+        while not self._stop.is_set():
+            if pending is None:
+                pending = sound_synth.make_sound(self.render_chunk())
+            
+            # Wait for the queue slot to free up
+            if self.channel.get_queue() is not None:
+                self._stop.wait(poll_interval)
+                continue
+            
+            try:
+                if self.channel.get_busy():
+                    self.channel.queue(pending)
+                else:
+                    # Channel ran dry; anything after the first chunk is an underrun
+                    if self.chunks_queued:
+                        self.underruns += 1
+                    self.channel.play(pending)
+            except pygame.error as e:
+                print(f"Error streaming ambient audio: {e}")
+                return
+            self.chunks_queued += 1
+            pending = None
+    
+    def _advance_params(self):
+        """Glide parameters toward their targets, returning (start, end) dicts"""
+        with self._lock:
+            target = dict(self._target)
+        start = self.params
+        end = {name: start[name] + (target[name] - start[name]) * GLIDE for name in start}
+        # Snap once we are close enough, so silence really is silent
+        for name in end:
+            if abs(end[name] - target[name]) < 1e-4:
+                end[name] = target[name]
+        self.params = end
+        return start, end
+    
+    def render_chunk(self):
+        """Synthesize the next chunk as interleaved 16-bit PCM"""
+        started = time.perf_counter()
+        start, end = self._advance_params()
+        
+        if numpy is not None:
+            mono = self._render_numpy(start, end)
+        else:
+            mono = self._render_python(start, end)
+        pcm = sound_synth.to_channels(mono, self.channels)
+        
+        elapsed = time.perf_counter() - started
+        self.chunks_rendered += 1
+        self.render_time_total += elapsed
+        self.render_time_max = max(self.render_time_max, elapsed)
+        return pcm
+    
+    def _oscillator_steps(self, params):
+        """Per-sample phase increments for the hum, drone pair and LFO"""
+        two_pi = 2 * math.pi
+        rate = self.sample_rate
+        return (two_pi * params['hum_freq'] / rate,
+                two_pi * params['drone_freq'] / rate,
+                two_pi * params['drone_freq'] * 1.007 / rate,
+                two_pi * 0.2 / rate)
+    
+    def _crackle_impulses(self, params):
+        """Pick (position, amplitude) pairs for this chunk's static pops"""
+        expected = params['crackle'] * self.chunk_duration + self._crackle_carry
+        count = int(expected)
+        self._crackle_carry = expected - count
+        level = params['crackle_level']
+        return [(self.rng.randrange(self.frames), self.rng.uniform(-level, level)) for _ in range(count)]
+    
+    def _render_python(self, start, end):
+        """Standard library renderer"""
+        frames = self.frames
+        hum_step, drone_step_a, drone_step_b, lfo_step = self._oscillator_steps(end)
+        hum_phase, lfo_phase = self._hum_phase, self._lfo_phase
+        drone_a, drone_b = self._drone_phases
+        hum_amp, hum_delta = start['hum'], (end['hum'] - start['hum']) / frames
+        drone_amp, drone_delta = start['drone'], (end['drone'] - start['drone']) / frames
+        sin = math.sin
+        
+        samples = [0.0] * frames
+        for i in range(frames):
+            hum = (sin(hum_phase) + 0.5 * sin(2 * hum_phase) + 0.25 * sin(3 * hum_phase)) / 1.75
+            drone = 0.5 * (sin(drone_a) + sin(drone_b)) * (0.7 + 0.3 * sin(lfo_phase))
+            samples[i] = hum * hum_amp + drone * drone_amp
+            hum_phase += hum_step
+            drone_a += drone_step_a
+            drone_b += drone_step_b
+            lfo_phase += lfo_step
+            hum_amp += hum_delta
+            drone_amp += drone_delta
+        
+        for position, amplitude in self._crackle_impulses(end):
+            for k in range(min(CRACKLE_LENGTH, frames - position)):
+                samples[position + k] += amplitude * CRACKLE_DECAY ** k
+        
+        two_pi = 2 * math.pi
+        self._hum_phase = hum_phase % two_pi
+        self._drone_phases = [drone_a % two_pi, drone_b % two_pi]
+        self._lfo_phase = lfo_phase % two_pi
+        
+        return array('h', [max(-32767, min(32767, int(s * 32767))) for s in samples])
+    
+    def _render_numpy(self, start, end):
+        """NumPy renderer, same signal as _render_python"""
+        frames = self.frames
+        hum_step, drone_step_a, drone_step_b, lfo_step = self._oscillator_steps(end)
+        index = numpy.arange(frames, dtype=numpy.float64)
+        
+        hum_phase = self._hum_phase + hum_step * index
+        hum = (numpy.sin(hum_phase) + 0.5 * numpy.sin(2 * hum_phase) + 0.25 * numpy.sin(3 * hum_phase)) / 1.75
+        drone = 0.5 * (numpy.sin(self._drone_phases[0] + drone_step_a * index) +
+                       numpy.sin(self._drone_phases[1] + drone_step_b * index))
+        drone *= 0.7 + 0.3 * numpy.sin(self._lfo_phase + lfo_step * index)
+        
+        ramp = index / frames
+        samples = hum * (start['hum'] + (end['hum'] - start['hum']) * ramp)
+        samples += drone * (start['drone'] + (end['drone'] - start['drone']) * ramp)
+        
+        decay = CRACKLE_DECAY ** numpy.arange(CRACKLE_LENGTH)
+        for position, amplitude in self._crackle_impulses(end):
+            length = min(CRACKLE_LENGTH, frames - position)
+            samples[position:position + length] += amplitude * decay[:length]
+        
+        two_pi = 2 * math.pi
+        self._hum_phase = (self._hum_phase + hum_step * frames) % two_pi
+        self._drone_phases = [(self._drone_phases[0] + drone_step_a * frames) % two_pi,
+                              (self._drone_phases[1] + drone_step_b * frames) % two_pi]
+        self._lfo_phase = (self._lfo_phase + lfo_step * frames) % two_pi
+        
+        return numpy.clip(samples * 32767, -32767, 32767).astype(numpy.int16)
\ No newline at end of file
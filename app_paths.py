@@ -0,0 +1,50 @@
+"""Locations for files the game writes outside the source tree."""
+import os
+import sys
+import threading
+
+APP_NAME = "crt_text_adventure"
+
+
+def _base_dir(env_var, xdg_var, fallback):
+    """Pick a per-user base directory, honouring overrides"""
+    override = os.environ.get(env_var)
+    if override:
+        return override
+    
+    if sys.platform == 'win32':
+        root = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+        return os.path.join(root, APP_NAME)
+    
+    root = os.environ.get(xdg_var) or os.path.join(os.path.expanduser('~'), fallback)
+    return os.path.join(root, APP_NAME)
+
+
+def cache_dir(*parts):
+    """Directory for data that can be regenerated at any time"""
+    path = os.path.join(_base_dir('CRT_ADVENTURE_CACHE_DIR', 'XDG_CACHE_HOME', '.cache'), *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def data_dir(*parts):
+    """Directory for player data that should survive between runs"""
+    base = _base_dir('CRT_ADVENTURE_DATA_DIR', 'XDG_DATA_HOME', os.path.join('.local', 'share'))
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def atomic_write(path, data):
+    """Write bytes to path so readers only ever see the old or the new file"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
\ No newline at end of file
@@ -2,8 +2,8 @@ class ASCIIManager:
     def __init__(self):
         self.current_sprite_key = "player_walk"
         self.frame_index = 0
-        self.frame_timer = 0
-        self.frame_speed = 8  # Frames between animation updates
+        self.frame_timer = 0.0
+        self.frame_speed = 8 / 30  # Seconds between animation updates
         
         # Enhanced ASCII art collection
         self.sprites = {
@@ -184,14 +184,14 @@ class ASCIIManager:
         if sprite_key in self.sprites:
             self.current_sprite_key = sprite_key
             self.frame_index = 0
-            self.frame_timer = 0
+            self.frame_timer = 0.0
     
-    def update(self):
-        """Update animation frame"""
-        self.frame_timer += 1
+    def update(self, dt):
+        """Advance the animation by dt seconds"""
+        self.frame_timer += dt
         
         if self.frame_timer >= self.frame_speed:
-            self.frame_timer = 0
+            self.frame_timer -= self.frame_speed
             
             # Only animate sprites that have multiple frames
             current_sprite_frames = self.sprites[self.current_sprite_key]
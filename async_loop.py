@@ -0,0 +1,147 @@
+"""The game loop as an asyncio task.
+
+AsyncGameLoop runs the same frames as CRTTextAdventure.run (events, fixed
+logic ticks, render) but as a coroutine paced with asyncio.sleep, so other
+coroutines can share the main thread between frames. Blocking I/O the game
+asks for through run_io (writing saves) runs on a worker thread as a task
+alongside the frame task; its result is handed back on the loop, so the
+game state is still only touched from one thread.
+
+Every frame measures how late it woke compared with when it asked to be
+woken. A frame that starts more than LAG_THRESHOLD late means some other
+task held the loop for too long; those are reported as they happen and
+summed up when the game exits, apart from frames that were late only
+because the previous frame itself overran its budget.
+
+When the game goes idle the task polls for input every IDLE_POLL seconds
+instead of blocking in pygame.event.wait, which would stall every other
+task on the loop; those sleeps don't count towards the lag figures.
+"""
+import asyncio
+import time
+
+import pygame
+
+# Wake-up lateness that counts as the frame being starved
+LAG_THRESHOLD = 0.008
+
+# Minimum seconds between two lag warnings
+WARNING_INTERVAL = 1.0
+
+# Seconds between checks for input while the game is idle
+IDLE_POLL = 0.02
+
+
+class AsyncGameLoop:
+    def __init__(self, game):
+        self.game = game
+        self.io_tasks = set()
+        self._last_warning = float('-inf')
+        
+        # Statistics
+        self.frames = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.late_frames = 0
+        self.overruns = 0
+        self.io_jobs = 0
+        self.io_time = 0.0
+        self.idle_frames = 0
+        self.idle_time = 0.0
+    
+    def run(self):
+        """Play until the game stops; returns the process exit status"""
+        start = time.perf_counter()
+        try:
+            asyncio.run(self._main())
+        except KeyboardInterrupt:
+            pass
+        self.game.finish(time.perf_counter() - start)
+        print(self.summary())
+        return 0
+    
+    async def _main(self):
+        if not self.game.deterministic:
+            # Recordings and replays keep I/O synchronous so its results land on the same tick
+            self.game.run_io = self.run_io
+        try:
+            await self.frames_task()
+        finally:
+            if self.io_tasks:
+                await asyncio.gather(*self.io_tasks, return_exceptions=True)
+    
+    async def frames_task(self):
+        """Run frames at render_fps, measuring how late each one starts"""
+        game = self.game
+        period = 1.0 / game.render_fps if game.render_fps > 0 and not game.fast else 0.0
+        previous = deadline = time.perf_counter()
+        while game.running:
+            now = time.perf_counter()
+            game.run_frame(now - previous)
+            previous = now
+            self.frames += 1
+            
+            timeout = game.idle_timeout() if game.running else None
+            if timeout is not None:
+                await self.idle(timeout)
+                deadline = time.perf_counter()
+                continue
+            
+            finished = time.perf_counter()
+            deadline += period
+            if deadline < finished:
+                # The frame took longer than its budget: start the next one now
+                # rather than trying to catch up, and don't blame the loop for it
+                if period:
+                    self.overruns += 1
+                deadline = finished
+            await asyncio.sleep(deadline - finished)
+            self._measure(time.perf_counter() - deadline)
+    
+    async def idle(self, timeout):
+        """Sleep up to timeout seconds, returning as soon as input arrives"""
+        start = now = time.perf_counter()
+        end = start + timeout
+        while now < end:
+            if pygame.event.peek():
+                self.game.last_input = now
+                break
+            await asyncio.sleep(min(IDLE_POLL, end - now))
+            now = time.perf_counter()
+        self.idle_frames += 1
+        self.idle_time += time.perf_counter() - start
+    
+    def _measure(self, lag):
+        """Account for a frame waking lag seconds after its deadline"""
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        if lag <= LAG_THRESHOLD:
+            return
+        self.late_frames += 1
+        now = time.perf_counter()
+        if now - self._last_warning >= WARNING_INTERVAL:
+            self._last_warning = now
+            print(f"Warning: frame started {lag * 1000:.1f} ms late (the event loop was busy)")
+    
+    def run_io(self, work, done):
+        """Run work() on a worker thread, then done(result) back on the loop"""
+        task = asyncio.get_running_loop().create_task(self._io(work, done))
+        self.io_tasks.add(task)
+        task.add_done_callback(self.io_tasks.discard)
+    
+    async def _io(self, work, done):
+        start = time.perf_counter()
+        result = await asyncio.to_thread(work)
+        self.io_jobs += 1
+        self.io_time += time.perf_counter() - start
+        done(result)
+    
+    def summary(self):
+        """One line on how well the frame task kept to time"""
+        paced = self.frames - self.idle_frames
+        mean = self.total_lag / paced if paced else 0.0
+        return (f"Async loop: {self.frames} frames, wake-up lag mean {mean * 1000:.2f} ms, "
+                f"max {self.max_lag * 1000:.1f} ms, {self.late_frames} late "
+                f"(> {LAG_THRESHOLD * 1000:.0f} ms), {self.overruns} over budget; "
+                f"{self.io_jobs} background I/O jobs in {self.io_time * 1000:.1f} ms; "
+                f"{self.idle_frames} idle frames over {self.idle_time:.1f} s")
\ No newline at end of file
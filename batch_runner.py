@@ -0,0 +1,119 @@
+"""Headless scripted playthroughs.
+
+A script is a text file with one command per line; blank lines and lines
+starting with '#' are skipped. Each command goes through the same
+InputHandler._process_input -> CRTTextAdventure command path as typed input,
+but with no window, no rendering and no frame pacing, so the run measures
+game logic alone. Game time doesn't pass on its own: after each command the
+clock jumps straight to every pending timer, so delayed effects and the
+game's ending play out before the next command. Every message the game
+prints is streamed to the output as it is produced. With trace on, each
+change to the GameState is written as a bracketed line after the message
+that caused it, e.g. "[health: 100 -> 90]".
+"""
+import sys
+import time
+
+from main import CRTTextAdventure
+from world import WorldError
+
+
+class BatchRunner:
+    def __init__(self, output=None, world_path=None, trace=False):
+        self.output = output or sys.stdout
+        self.game = CRTTextAdventure(headless=True, on_message=self._write_message, world_path=world_path)
+        if trace:
+            self.game.game_state.subscribe(self._write_change)
+        
+        # Statistics
+        self.commands = 0
+        self.elapsed = 0.0
+        self.skipped = 0
+    
+    def _write_message(self, text, color, message_type):
+        """Stream one game message to the output"""
+        self.output.write(text + "\n")
+    
+    def _write_change(self, change):
+        """Stream one GameState change to the output"""
+        if change.key is None:
+            line = f"[{change.field}: {change.old} -> {change.new}]"
+        elif change.old is None:
+            line = f"[{change.field} +{change.key}]" if change.new is True else f"[{change.field} +{change.key}={change.new}]"
+        elif change.new is None:
+            line = f"[{change.field} -{change.key}]"
+        else:
+            line = f"[{change.field} {change.key}: {change.old} -> {change.new}]"
+        self.output.write(line + "\n")
+    
+    def run(self, lines):
+        """Run every command in lines; stops early if the game ends"""
+        handler = self.game.input_handler
+        lines = [line.rstrip("\r\n") for line in lines]
+        commands = [line for line in lines if line.strip() and not line.lstrip().startswith('#')]
+        
+        start = time.perf_counter()
+        for index, text in enumerate(commands):
+            if not handler.input_active or not self.game.running:
+                # The game is over (exit or victory); later commands can't run
+                self.skipped = len(commands) - index
+                break
+            handler.set_text(text)
+            result = handler._process_input()
+            if result:
+                self.game._submit_command(*result)
+            if self.game.scheduler.run_all():
+                self.game.after_timers()
+            self.commands += 1
+        self.elapsed += time.perf_counter() - start
+        
+        self.output.flush()
+        return self.commands
+    
+    def commands_per_second(self):
+        """Throughput of the commands run so far"""
+        return self.commands / self.elapsed if self.elapsed > 0 else 0.0
+    
+    def close(self):
+        """Shut the headless game down"""
+        self.game.shutdown()
+
+
+def run_script_file(path, output_path=None, world_path=None, trace=False):
+    """Run a script file ('-' for stdin), returning a process exit status"""
+    try:
+        if path == '-':
+            lines = sys.stdin.readlines()
+        else:
+            with open(path, encoding='utf-8') as f:
+                lines = f.readlines()
+    except OSError as e:
+        print(f"Error: Could not read script {path}: {e}", file=sys.stderr)
+        return 1
+    
+    try:
+        output = open(output_path, 'w', encoding='utf-8') if output_path else sys.stdout
+    except OSError as e:
+        print(f"Error: Could not open output {output_path}: {e}", file=sys.stderr)
+        return 1
+    
+    try:
+        runner = BatchRunner(output, world_path, trace)
+    except WorldError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        if output is not sys.stdout:
+            output.close()
+        return 2
+    try:
+        runner.run(lines)
+    finally:
+        runner.close()
+        if output is not sys.stdout:
+            output.close()
+    
+    # Timing goes to stderr so the transcript stays diffable
+    print(f"{runner.commands} commands in {runner.elapsed * 1000:.1f} ms "
+          f"({runner.commands_per_second():.0f} commands/sec)", file=sys.stderr)
+    if runner.skipped:
+        print(f"Warning: game ended with {runner.skipped} command(s) left unrun", file=sys.stderr)
+    return 0
\ No newline at end of file
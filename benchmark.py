@@ -0,0 +1,848 @@
+"""Benchmarks for the CRT Text Adventure.
+
+Usage: python benchmark.py [name ...]   (no names runs everything)
+
+Each benchmark prints one line per measurement. Pygame runs against the SDL
+dummy drivers so the suite works without a window or sound card.
+"""
+import argparse
+import math
+import mmap
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark function under a name"""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def best_of(func, repeat=5):
+    """Return the fastest wall time of several runs, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label, seconds, extra=""):
+    """Print a single benchmark result line"""
+    print(f"  {label:<46} {seconds * 1000:10.2f} ms {extra}")
+
+
+def _legacy_beep_pcm(frequencies, sample_rate, note_duration, amplitude):
+    """The original per-frame SoundManager synthesis loop, kept as a baseline"""
+    frames_per_note = int(note_duration * sample_rate)
+    arr = []
+    for frequency in frequencies:
+        for i in range(frames_per_note):
+            time_point = float(i) / sample_rate
+            wave = math.sin(2 * math.pi * frequency * time_point)
+            envelope = 1.0
+            fade_frames = frames_per_note // 10
+            if i < fade_frames:
+                envelope = float(i) / fade_frames
+            elif i > frames_per_note - fade_frames:
+                envelope = float(frames_per_note - i) / fade_frames
+            sample = int(wave * envelope * 32767 * amplitude)
+            arr.append([sample, sample])
+    sound_bytes = b''
+    for sample_pair in arr:
+        for sample in sample_pair:
+            sound_bytes += sample.to_bytes(2, 'little', signed=True)
+    return sound_bytes
+
+
+@benchmark('sounds')
+def bench_sounds():
+    """Cost of building the seven default sounds, old loop vs bulk synthesis"""
+    import sound_synth
+    from sound_manager import DEFAULT_SOUNDS
+    
+    sample_rate = sound_synth.SAMPLE_RATE
+    backend = 'numpy' if sound_synth.numpy is not None else 'array'
+    
+    def legacy():
+        for spec in DEFAULT_SOUNDS.values():
+            _legacy_beep_pcm(spec.frequencies, sample_rate, spec.note_duration, spec.amplitude)
+    
+    def bulk():
+        for spec in DEFAULT_SOUNDS.values():
+            sound_synth.render_pcm(spec, sample_rate)
+    
+    report("legacy per-frame loop", best_of(legacy, repeat=1))
+    report(f"bulk synthesis ({backend})", best_of(bulk))
+    
+    pygame.mixer.init(frequency=sample_rate, size=-16, channels=2)
+    try:
+        def bulk_with_sounds():
+            for spec in DEFAULT_SOUNDS.values():
+                sound_synth.make_sound(sound_synth.render_pcm(spec, sample_rate))
+        report("bulk synthesis + mixer.Sound", best_of(bulk_with_sounds))
+        
+        from sound_cache import SoundCache
+        with tempfile.TemporaryDirectory() as directory:
+            def cached_sounds():
+                cache = SoundCache(directory)
+                for spec in DEFAULT_SOUNDS.values():
+                    pcm = cache.get_or_render(spec, sample_rate, 2)
+                    sound_synth.make_sound(pcm)
+                    if isinstance(pcm, mmap.mmap):
+                        pcm.close()
+            report("cold sound cache (synthesize + write)", best_of(cached_sounds, repeat=1))
+            report("warm sound cache (mmap)", best_of(cached_sounds))
+    finally:
+        pygame.mixer.quit()
+
+
+@benchmark('sound-startup')
+def bench_sound_startup():
+    """SoundManager construction time (time to first frame) vs library size"""
+    from sound_manager import SoundManager
+    from sound_synth import ToneSpec
+    
+    for size in (7, 70, 280):
+        library = {f"tone{i}": ToneSpec((200 + i * 7, 400 + i * 3), 0.1) for i in range(size)}
+        for background in (False, True):
+            start = time.perf_counter()
+            manager = SoundManager(use_cache=False, background=background, library=library)
+            constructed = time.perf_counter() - start
+            manager.wait_until_ready()
+            ready = time.perf_counter() - start
+            manager.cleanup()
+            
+            mode = "background" if background else "eager"
+            report(f"{size:4d} sounds, {mode} constructor", constructed,
+                   f"(library ready after {ready * 1000:.1f} ms)")
+
+
+@benchmark('ambient')
+def bench_ambient():
+    """Streaming ambience: chunk render cost and underruns over a short run"""
+    import ambient_engine
+    
+    pygame.mixer.init(frequency=22050, size=-16, channels=2)
+    try:
+        sample_rate, _, channels = pygame.mixer.get_init()
+        pygame.mixer.set_reserved(1)
+        engine = ambient_engine.AmbientEngine(pygame.mixer.Channel(0), sample_rate, channels, seed=1)
+        engine.set_preset('terminal_prompt')
+        
+        chunks = 100
+        elapsed = best_of(lambda: [engine.render_chunk() for _ in range(chunks)], repeat=3)
+        audio_seconds = chunks * engine.chunk_duration
+        report(f"render {chunks} chunks ({audio_seconds:.0f}s of audio)", elapsed,
+               f"({audio_seconds / elapsed:.0f}x real time)")
+        
+        engine.start()
+        time.sleep(1.0)
+        engine.set_preset('main_menu')
+        time.sleep(1.0)
+        engine.stop()
+        stats = engine.get_stats()
+        print(f"  2s stream: {stats['chunks_queued']} chunks queued, {stats['underruns']} underruns, "
+              f"max render {stats['max_render_ms']:.2f} ms, latency bound {stats['max_latency_ms']:.0f} ms")
+    finally:
+        pygame.mixer.quit()
+
+
+@benchmark('keystrokes')
+def bench_keystrokes():
+    """Per-keystroke click cost and voice pool behaviour under fast typing"""
+    from sound_manager import SoundManager
+    
+    manager = SoundManager(use_cache=False, background=False)
+    try:
+        presses = 2000
+        elapsed = best_of(lambda: [manager.play_keystroke() for _ in range(presses)], repeat=1)
+        report(f"{presses} keystrokes, back to back", elapsed, f"({elapsed / presses * 1e6:.1f} us each)")
+        
+        # 15 ms between keys is faster than any typist; the rate limit should absorb it
+        for _ in range(200):
+            manager.play_keystroke()
+            time.sleep(0.015)
+        # Long sounds fired faster than they finish must steal voices, not fail
+        for _ in range(20):
+            manager.play_sound('victory')
+        for category, stats in manager.voice_manager.get_stats().items():
+            print(f"  {category:<6} played {stats['played']:5d}  stolen {stats['stolen']:5d}  "
+                  f"rate-limited {stats['rate_limited']:5d}")
+    finally:
+        manager.cleanup()
+
+
+PARSER_INPUTS = [
+    'look', 'l', 'examine', 'help', '?', 'inventory', 'i', 'start journey', 'begin',
+    'use terminal', 'computer', 'open door', 'door', 'use keycard', 'password retr0',
+    'password hunter2', 'dance wildly', 'look at the terminal', 'quit',
+]
+
+
+def _legacy_normalize(command_text):
+    """The original if/elif membership chain from InputHandler, kept as a baseline"""
+    if command_text in ['quit', 'exit', 'q']:
+        return 'exit'
+    elif command_text in ['help', 'h', '?']:
+        return 'help'
+    elif command_text in ['inventory', 'inv', 'i']:
+        return 'inventory'
+    elif command_text in ['look', 'l', 'examine']:
+        return 'look'
+    elif command_text.startswith('password '):
+        return command_text
+    elif command_text in ['start', 'start journey', 'begin']:
+        return 'start'
+    elif command_text in ['use terminal', 'terminal', 'computer']:
+        return 'use terminal'
+    elif command_text in ['open door', 'door', 'use door']:
+        return 'open door'
+    elif command_text in ['use keycard', 'keycard']:
+        return 'use keycard'
+    return command_text
+
+
+@benchmark('parser')
+def bench_parser():
+    """Command parsing throughput, legacy if/elif chain vs compiled grammar"""
+    from command_parser import CommandParser
+    
+    parser = CommandParser()
+    inputs = PARSER_INPUTS * 5000
+    
+    legacy = best_of(lambda: [_legacy_normalize(text.strip().lower()) for text in inputs], repeat=3)
+    report(f"legacy chain, {len(inputs)} inputs", legacy, f"({len(inputs) / legacy:,.0f} cmds/s)")
+    
+    # The parser's own speed; it also resolves objects and args, which the chain doesn't
+    elapsed = best_of(lambda: [parser.parse_uncached(text) for text in inputs], repeat=3)
+    report(f"CommandParser, uncached, {len(inputs)} inputs", elapsed,
+           f"({len(inputs) / elapsed:,.0f} cmds/s, {elapsed / legacy:.1f}x the legacy time)")
+    
+    # Only repeated inputs get this speed, from the recent-input cache
+    elapsed = best_of(lambda: [parser.parse(text) for text in inputs], repeat=3)
+    report(f"CommandParser, repeated inputs, {len(inputs)} inputs", elapsed, f"({len(inputs) / elapsed:,.0f} cmds/s)")
+    
+    # Grow the grammar to show lookups don't slow down with vocabulary size
+    for i in range(5000):
+        parser.grammar['verbs'][f'verb{i}'] = [f'alias{i}a', f'alias{i}b']
+    parser._compile()
+    elapsed = best_of(lambda: [parser.parse_uncached(text) for text in inputs], repeat=3)
+    report(f"  uncached, {len(parser.verb_index)} verb aliases", elapsed, f"({len(inputs) / elapsed:,.0f} cmds/s)")
+
+
+@benchmark('fuzzy')
+def bench_fuzzy():
+    """'Did you mean' lookups against a few thousand indexed phrases"""
+    import random
+    from fuzzy import FuzzyIndex
+    
+    rng = random.Random(42)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    
+    def word():
+        return ''.join(rng.choice(letters) for _ in range(rng.randint(3, 9)))
+    
+    phrases = {f"{word()} {word()}" if rng.random() < 0.6 else word() for _ in range(5000)}
+    start = time.perf_counter()
+    index = FuzzyIndex(phrases)
+    report(f"build index of {len(index)} phrases", time.perf_counter() - start,
+           f"({len(index.deletes)} deletion keys)")
+    
+    # One random edit per query
+    queries = []
+    for phrase in rng.sample(sorted(phrases), 1000):
+        i = rng.randrange(len(phrase))
+        queries.append(phrase[:i] + rng.choice(letters) + phrase[i + 1:])
+    
+    elapsed = best_of(lambda: [index.lookup(query) for query in queries], repeat=3)
+    report(f"{len(queries)} typo lookups", elapsed, f"({elapsed / len(queries) * 1e6:.0f} us each)")
+    corrected = sum(1 for query in queries if index.correct(query) is not None)
+    print(f"  {corrected}/{len(queries)} queries auto-correct to a single match")
+
+
+@benchmark('history')
+def bench_history():
+    """Command history: recording, browsing and Ctrl-R search at full capacity"""
+    import random
+    from command_history import CommandHistory
+    
+    rng = random.Random(7)
+    verbs = ['look', 'use', 'open', 'password', 'take', 'drop', 'examine', 'go']
+    commands = [f"{rng.choice(verbs)} thing{rng.randrange(3000)}" for _ in range(50000)]
+    
+    history = CommandHistory()
+    elapsed = best_of(lambda: [history.add(command) for command in commands], repeat=1)
+    report(f"add {len(commands)} commands (capacity {history.capacity})", elapsed,
+           f"({elapsed / len(commands) * 1e6:.2f} us each, {len(history)} live)")
+    
+    # The first search indexes every command recorded since the last one
+    pending = len(history._unindexed)
+    start = time.perf_counter()
+    history.search('thing')
+    report(f"first reverse search, indexing {pending} commands", time.perf_counter() - start)
+    
+    queries = [f"thing{rng.randrange(3000)}" for _ in range(1000)] + ['pass', 'ok', 'e']
+    elapsed = best_of(lambda: [history.search(query) for query in queries], repeat=3)
+    report(f"{len(queries)} reverse searches", elapsed, f"({elapsed / len(queries) * 1e6:.1f} us each)")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'history.txt')
+        writer = CommandHistory(path=path)
+        elapsed = best_of(lambda: [writer.add(command) for command in commands[:5000]], repeat=1)
+        report("add 5000 commands with background file writes", elapsed)
+        writer.close()
+        
+        start = time.perf_counter()
+        reader = CommandHistory(path=path)
+        report("construct persistent history (lazy)", time.perf_counter() - start)
+        start = time.perf_counter()
+        reader.previous()
+        report(f"first access loads {len(reader)} entries", time.perf_counter() - start)
+
+
+@benchmark('paste')
+def bench_paste():
+    """Input pipeline: coalesced typing and a 500-command paste, per frame"""
+    import pygame
+    from command_history import CommandHistory
+    from main import CRTTextAdventure, PASTE_BUDGET
+    
+    game = CRTTextAdventure()
+    handler = game.input_handler
+    handler.command_history = CommandHistory()
+    try:
+        # A burst of typing arrives as many TEXTINPUT events in one frame
+        burst = [pygame.event.Event(pygame.TEXTINPUT, text=char) for char in "look at the terminal " * 10]
+        elapsed = best_of(lambda: (handler.handle_events(burst, game.game_state), handler.clear_input()))
+        report(f"coalesce {len(burst)} TEXTINPUT events", elapsed)
+        
+        script = '\n'.join(['look', 'help', 'inventory', 'use terminal', 'open door'] * 100) + '\n'
+        handler.paste(script)
+        frames = []
+        while handler.has_queued_commands():
+            start = time.perf_counter()
+            game.handle_events()
+            frames.append(time.perf_counter() - start)
+        over = sum(1 for frame in frames if frame > PASTE_BUDGET)
+        report(f"500 pasted commands over {len(frames)} frames", sum(frames),
+               f"(worst frame {max(frames) * 1000:.2f} ms, {over} over the {PASTE_BUDGET * 1000:.0f} ms target)")
+    finally:
+        game.shutdown()
+
+
+@benchmark('batch')
+def bench_batch():
+    """Headless scripted playthrough: commands per second through the game logic"""
+    import io
+    from batch_runner import BatchRunner
+    
+    loop = ['look', 'help', 'inventory', 'use terminal', 'password wrong', 'open door', 'xyzzy']
+    script = ['start'] + loop * 2000
+    runner = BatchRunner(io.StringIO())
+    try:
+        runner.run(script)
+    finally:
+        runner.close()
+    report(f"{runner.commands} scripted commands", runner.elapsed,
+           f"({runner.commands_per_second():.0f} commands/sec)")
+
+
+def _synthetic_world(rooms):
+    """A large generated world: a chain of rooms with a few commands each"""
+    world = {'start': 'room0', 'rooms': {}}
+    for i in range(rooms):
+        following = f"room{(i + 1) % rooms}"
+        world['rooms'][f"room{i}"] = {
+            'commands': {
+                'look': [{'say': f"Room {i}. Health {{health}}.", 'color': 'BLUE'}],
+                'open door': [{'if': {'has': 'keycard'},
+                               'then': [{'goto': following}, {'sprite': 'door_open'}, {'sound': 'success'}],
+                               'else': [{'say': "Locked.", 'color': 'RED'}]}],
+                'use terminal': [{'set': f"seen{i}"}, {'give': 'keycard'}],
+                'help': [{'say': "Try 'look'.", 'color': 'YELLOW'}],
+            },
+            'fallback': [{'say': "What is '{text}'?", 'color': 'RED'}],
+        }
+    return world
+
+
+@benchmark('world')
+def bench_world():
+    """World loading: cold compile, cached load, lazy rooms and dispatch"""
+    import json
+    from types import SimpleNamespace
+    from command_parser import CommandParser
+    from game_state import GameState
+    import world
+    
+    rooms = 5000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'big.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(_synthetic_world(rooms), f)
+        
+        previous_cache = os.environ.get('CRT_ADVENTURE_CACHE_DIR')
+        os.environ['CRT_ADVENTURE_CACHE_DIR'] = directory
+        try:
+            start = time.perf_counter()
+            world.load_world(path)
+            report(f"cold load + compile, {rooms} rooms", time.perf_counter() - start)
+            
+            elapsed = best_of(lambda: world.load_world(path))
+            loaded = world.load_world(path)
+            report("load from compiled-world cache", elapsed, f"(from cache: {loaded.from_cache})")
+        finally:
+            if previous_cache is None:
+                del os.environ['CRT_ADVENTURE_CACHE_DIR']
+            else:
+                os.environ['CRT_ADVENTURE_CACHE_DIR'] = previous_cache
+    
+    start = time.perf_counter()
+    room = loaded.room('room0')
+    report("first entry into a room (lazy compile)", time.perf_counter() - start,
+           f"({loaded.rooms_loaded}/{rooms} rooms compiled)")
+    
+    # Walk the chain through the host interface with no game attached
+    host = SimpleNamespace(game_state=GameState(), add_game_message=lambda text, color: None,
+                           goto=lambda name: host.game_state.change_state(name),
+                           set_sprite=lambda name: None, play_sound=lambda name: None)
+    host.game_state.current_state = loaded.start
+    parser = CommandParser(loaded.grammar)
+    script = [parser.parse(text) for text in ('look', 'use terminal', 'open door', 'xyzzy')]
+    
+    def walk():
+        for command in script * 2500:
+            room = loaded.room(host.game_state.current_state)
+            handler = room.find(command) or room.fallback
+            handler(host, command)
+    
+    elapsed = best_of(walk, repeat=1)
+    report("10000 dispatched commands", elapsed,
+           f"({elapsed / 10000 * 1e6:.2f} us each, {loaded.rooms_loaded} rooms compiled)")
+
+
+@benchmark('save')
+def bench_save():
+    """Binary save files: encode/decode and write/read a large state, autosave cost"""
+    import save_game
+    from game_state import GameState
+    
+    state = GameState()
+    state.inventory = [f"item{i}" for i in range(5000)]
+    for i in range(20000):
+        state.set_flag(f"flag{i}", (True, i, i * 0.5, f"value{i}")[i % 4])
+    state.visited_locations = {f"room{i}" for i in range(1000)}
+    messages = [{'text': f"Message number {i}", 'color': 'GREEN', 'type': 'GAME'} for i in range(19)]
+    history = [f"command {i}" for i in range(2000)]
+    
+    def take_snapshot():
+        return save_game.capture(state, 'bench', 'monitor', messages, 3, history, False)
+    
+    elapsed = best_of(take_snapshot)
+    snapshot = take_snapshot()
+    report("snapshot (main-thread autosave cost)", elapsed,
+           f"({len(state.inventory)} items, {len(state.game_flags)} flags)")
+    
+    elapsed = best_of(lambda: save_game.encode(snapshot))
+    data = save_game.encode(snapshot)
+    report("encode", elapsed, f"({len(data) / 1024:.0f} KiB)")
+    elapsed = best_of(lambda: save_game.decode(data))
+    report("decode + verify checksum", elapsed)
+    assert save_game.decode(data) == snapshot
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sav')
+        elapsed = best_of(lambda: save_game.write_save(path, snapshot))
+        report("atomic write (encode + fsync + rename)", elapsed)
+        elapsed = best_of(lambda: save_game.read_save(path))
+        report("read + decode", elapsed)
+        
+        autosaver = save_game.Autosaver(path)
+        start = time.perf_counter()
+        for _ in range(100):
+            autosaver.submit(take_snapshot())
+        submitted = time.perf_counter() - start
+        autosaver.close()
+        report("100 autosave submits (snapshot + queue)", submitted,
+               f"({autosaver.saves} written, {autosaver.skipped} superseded)")
+
+
+@benchmark('undo')
+def bench_undo():
+    """Undo history: per-command recording cost and memory on a large state"""
+    import copy
+    from game_state import GameState
+    from undo_history import UndoHistory
+    
+    state = GameState()
+    for i in range(5000):
+        state.add_to_inventory(f"item{i}")
+    for i in range(20000):
+        state.set_flag(f"flag{i}", i)
+    
+    history = UndoHistory(depth=100)
+    start = time.perf_counter()
+    history.reset(state)
+    report(f"initial snapshot ({len(state.inventory)} items, {len(state.game_flags)} flags)",
+           time.perf_counter() - start)
+    
+    def play(commands):
+        for i in range(commands):
+            state.set_flag(f"flag{i * 7 % 20000}", -i)
+            state.take_damage(1 if i % 2 else 0)
+            if i % 10 == 0:
+                state.add_to_inventory(f"found{i}")
+            history.record(state)
+    
+    commands = 1000
+    elapsed = best_of(lambda: play(commands), repeat=1)
+    report(f"record {commands} commands", elapsed,
+           f"({elapsed / commands * 1e6:.1f} us each, {len(history.undo_steps)} steps kept, "
+           f"~{history.memory_bytes / 1024:.0f} KiB)")
+    # Copy the data only; deepcopying state itself would also copy its subscribers
+    plain = GameState()
+    plain.inventory = state.inventory
+    plain.game_flags = state.game_flags
+    elapsed = best_of(lambda: copy.deepcopy(plain), repeat=3)
+    report("deepcopy of the same state (baseline per command)", elapsed)
+    
+    def walk():
+        while history.undo(state):
+            pass
+        while history.redo(state):
+            pass
+    
+    elapsed = best_of(walk, repeat=1)
+    report(f"undo + redo through {len(history.undo_steps)} steps", elapsed)
+
+
+def _lever_world(rooms):
+    """A ring of rooms, each with a lever; the exit opens once every lever is down"""
+    levers = [f"lever{i}" for i in range(rooms)]
+    world = {
+        'start': 'room0',
+        'grammar': {'verbs': {'go': [], 'pull': [], 'open': []},
+                    'nouns': dict.fromkeys(['north', 'south', 'door'] + levers, [])},
+        'rooms': {'exit': {'commands': {}}},
+    }
+    for i, lever in enumerate(levers):
+        commands = {
+            'go north': [{'goto': f"room{(i + 1) % rooms}"}],
+            'go south': [{'goto': f"room{(i - 1) % rooms}"}],
+            f"pull {lever}": [{'if': {'has': lever},
+                               'then': [{'take': lever}],
+                               'else': [{'give': lever}]}],
+        }
+        if i == 0:
+            commands['open door'] = [{'if': {'all': [{'has': name} for name in levers]},
+                                      'then': [{'goto': 'exit'}, {'end': 1}],
+                                      'else': [{'say': "Locked.", 'color': 'RED'}]}]
+        world['rooms'][f"room{i}"] = {'commands': commands}
+    return world
+
+
+@benchmark('explore')
+def bench_explore():
+    """State-space explorer: BFS throughput in process and across a process pool"""
+    import io
+    import json
+    from explorer import StateExplorer
+    
+    rooms = 10
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'levers.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(_lever_world(rooms), f)
+        
+        previous_cache = os.environ.get('CRT_ADVENTURE_CACHE_DIR')
+        os.environ['CRT_ADVENTURE_CACHE_DIR'] = directory
+        try:
+            for workers in sorted({1, os.cpu_count() or 1, 4}):
+                explorer = StateExplorer(path, workers=workers)
+                explorer.run()
+                status = explorer.report(io.StringIO())
+                report(f"{explorer.world.title or 'lever world'} with {workers} worker(s)", explorer.elapsed,
+                       f"({len(explorer.parents)} states, {explorer.states_per_second():.0f} states/sec, "
+                       f"status {status})")
+        finally:
+            if previous_cache is None:
+                del os.environ['CRT_ADVENTURE_CACHE_DIR']
+            else:
+                os.environ['CRT_ADVENTURE_CACHE_DIR'] = previous_cache
+
+
+@benchmark('scheduler')
+def bench_scheduler():
+    """Timer scheduler: heap of deadlines against scanning per-frame countdowns"""
+    from scheduler import Scheduler
+    
+    timers = 10000
+    ticks = 600
+    
+    def heap():
+        scheduler = Scheduler()
+        handles = [scheduler.call_later((i % ticks) / 60, lambda: None) for i in range(timers)]
+        for handle in handles[::2]:
+            handle.cancel()
+        for _ in range(ticks):
+            scheduler.advance(1 / 60)
+    
+    def countdowns():
+        # The old approach: every live countdown is decremented every frame
+        pending = [i % ticks for i in range(0, timers, 2)]
+        for _ in range(ticks):
+            for index, remaining in enumerate(pending):
+                if remaining > 0:
+                    pending[index] = remaining - 1
+    
+    elapsed = best_of(heap, repeat=3)
+    report(f"{timers} timers, half cancelled, {ticks} ticks (heap)", elapsed)
+    elapsed = best_of(countdowns, repeat=3)
+    report(f"{timers} countdowns, {ticks} ticks (decrement each)", elapsed)
+    
+    scheduler = Scheduler()
+    elapsed = best_of(lambda: scheduler.advance(1 / 60), repeat=1000)
+    report("advance with nothing due", elapsed)
+
+
+@benchmark('state')
+def bench_state():
+    """GameState: inventory and flag operations on a large state, and change events"""
+    from game_state import GameState
+    
+    items = [f"item{i}" for i in range(5000)]
+    state = GameState()
+    state.inventory = items
+    for i in range(20000):
+        state.set_flag(f"flag{i}", i)
+    
+    elapsed = best_of(lambda: [state.has_item(item) for item in items])
+    report(f"has_item x {len(items)} (ordered set)", elapsed)
+    elapsed = best_of(lambda: [item in items for item in items[::50]])
+    report(f"item in list x {len(items) // 50} (old list inventory)", elapsed)
+    
+    def churn():
+        for item in items:
+            state.remove_from_inventory(item)
+        for item in items:
+            state.add_to_inventory(item)
+    
+    elapsed = best_of(churn, repeat=3)
+    report(f"remove + re-add {len(items)} items", elapsed)
+    elapsed = best_of(lambda: [state.set_flag(f"flag{i}", -i) for i in range(20000)], repeat=3)
+    report("set 20000 flags, no subscribers", elapsed)
+    
+    changes = []
+    state.subscribe(changes.append)
+    elapsed = best_of(lambda: [state.set_flag(f"flag{i}", i) for i in range(20000)], repeat=1)
+    report("set 20000 flags, one subscriber", elapsed, f"({len(changes)} events)")
+    changes.clear()
+    elapsed = best_of(lambda: [state.set_flag(f"flag{i}", i) for i in range(20000)], repeat=3)
+    report("set 20000 flags to their current value", elapsed, f"({len(changes)} events)")
+
+
+@benchmark('postfx')
+def bench_postfx():
+    """Rendering with the CRT effects inline against pipelined on a worker thread"""
+    from main import CRTTextAdventure
+    from post_process import PostProcessor
+    
+    game = CRTTextAdventure(headless=True, seed=1)
+    frames = 120
+    try:
+        game.game_state.change_state(game.world.start)
+        for i in range(40):
+            game.text_manager.add_game_message(f"Line {i} of scrollback to keep the text renderer busy.")
+        
+        def render():
+            for _ in range(frames):
+                game.crt_renderer.update(1 / 60)
+                game.render()
+        
+        elapsed = best_of(lambda: game.crt_renderer.apply_final_effects(game.screen), repeat=20)
+        report("final effects alone, one frame", elapsed)
+        elapsed = best_of(render, repeat=3)
+        report(f"{frames} frames, effects inline", elapsed, f"({frames / elapsed:.0f} FPS)")
+        
+        game.post_processor = PostProcessor(game.crt_renderer, game.screen, game.present)
+        elapsed = best_of(render, repeat=3)
+        waited = game.post_processor.waited / game.post_processor.frames
+        game.post_processor.close()
+        game.post_processor = None
+        report(f"{frames} frames, effects pipelined", elapsed,
+               f"({frames / elapsed:.0f} FPS, {waited * 1000:.2f} ms/frame waiting on the worker, "
+               f"{os.cpu_count()} CPUs)")
+    finally:
+        game.shutdown()
+
+
+
+@benchmark('idle')
+def bench_idle():
+    """CPU use of the real game loop while active and while idle, and how fast idle wakes"""
+    import threading
+    from main import CRTTextAdventure
+    
+    seconds = 3.0
+    
+    def play(idle_after):
+        game = CRTTextAdventure(headless=True)
+        game.idle_after = idle_after
+        posted = []
+        stopped = []
+        shutdown = game.shutdown
+        
+        def close():
+            posted.append(time.perf_counter())
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+        
+        def timed_shutdown():
+            stopped.append(time.perf_counter())
+            shutdown()
+        
+        game.shutdown = timed_shutdown
+        timer = threading.Timer(seconds, close)
+        start, cpu = time.perf_counter(), time.process_time()
+        timer.start()
+        try:
+            game.run()
+        except SystemExit:
+            pass
+        wall = time.perf_counter() - start
+        return (time.process_time() - cpu) / wall, game.frames, stopped[0] - posted[0]
+    
+    for label, idle_after in (("active", float('inf')), ("idle", 0.0)):
+        usage, frames, wake = play(idle_after)
+        report(f"{seconds:.0f} s {label} at the terminal", wake,
+               f"to react to input ({usage * 100:.1f}% CPU, {frames} frames)")
+
+
+
+
+@benchmark('upscale')
+def bench_upscale():
+    """Frame cost at a large window size: drawing natively against a small target scaled up"""
+    from main import CRTTextAdventure
+    
+    window = (1600, 1200)
+    frames = 30
+    cases = [
+        ("native 1600x1200", dict(render_size=window)),
+        ("800x600, integer x2", dict(render_size=(800, 600), window_size=window, upscale='integer')),
+        ("400x300, integer x4", dict(render_size=(400, 300), window_size=window, upscale='integer')),
+        ("400x300, scale2x x4", dict(render_size=(400, 300), window_size=window, upscale='scale2x')),
+        ("640x480, smooth", dict(render_size=(640, 480), window_size=window, upscale='smooth')),
+    ]
+    for label, options in cases:
+        game = CRTTextAdventure(headless=True, seed=1, **options)
+        try:
+            for i in range(20):
+                game.text_manager.add_game_message(f"Line {i} of scrollback to keep the text renderer busy.")
+            
+            def render():
+                for _ in range(frames):
+                    game.crt_renderer.update(1 / 60)
+                    game.render()
+            
+            elapsed = best_of(render, repeat=3)
+            report(f"{label}", elapsed / frames, f"per frame ({frames / elapsed:.0f} FPS)")
+        finally:
+            game.shutdown()
+
+
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+game = main.CRTTextAdventure()
+built = time.perf_counter()
+game.run_frame(0.0)
+shown = time.perf_counter()
+game.shutdown()
+import font_registry
+print(imported - start, built - imported, shown - start, font_registry.stats['scans'])
+"""
+
+
+@benchmark('startup')
+def bench_startup():
+    """Import time and time to first frame in a fresh interpreter, fonts cold and cached"""
+    import subprocess
+    
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as cache, tempfile.TemporaryDirectory() as data:
+        env = dict(os.environ, CRT_ADVENTURE_CACHE_DIR=cache, CRT_ADVENTURE_DATA_DIR=data)
+        for label in ("first run", "cached run"):
+            output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=here, env=env,
+                                    capture_output=True, text=True, check=True).stdout
+            imported, built, shown, scans = output.split()[-4:]
+            report(f"{label}: import main", float(imported))
+            report(f"{label}: construct the game", float(built))
+            report(f"{label}: time to first frame", float(shown), f"({scans} system font scans)")
+
+
+@benchmark('server')
+def bench_server():
+    """Text server: sessions/sec, commands/sec and memory per session over loopback"""
+    import asyncio
+    from load_client import LoadClient
+    from text_server import TextServer
+    
+    async def play(sessions, concurrency):
+        server = TextServer()
+        port = await server.start(port=0)
+        client = LoadClient(port=port)
+        try:
+            await client.run(sessions, concurrency)
+            # Measure sessions while they are all still connected
+            held = [asyncio.create_task(client.session()) for _ in range(concurrency)]
+            while len(server.sessions) < concurrency and not all(task.done() for task in held):
+                await asyncio.sleep(0.01)
+            memory = server.memory_sample()
+            await asyncio.gather(*held)
+        finally:
+            await server.stop()
+        return client, memory
+    
+    for sessions, concurrency in ((500, 10), (2000, 500)):
+        client, memory = asyncio.run(play(sessions, concurrency))
+        mean = sum(memory) / len(memory) if memory else 0
+        report(f"{sessions} sessions, {concurrency} at a time", client.elapsed,
+               f"({len(client.connect_times) / client.elapsed:.0f} sessions/sec, "
+               f"{len(client.command_times) / client.elapsed:.0f} commands/sec, "
+               f"{mean / 1024:.1f} KiB per session, {client.failures} failed)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('names', nargs='*', help=f"benchmarks to run: {', '.join(BENCHMARKS)}")
+    args = parser.parse_args(argv)
+    
+    names = args.names or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    
+    for name in names:
+        print(f"{name}: {BENCHMARKS[name].__doc__}")
+        BENCHMARKS[name]()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
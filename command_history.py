@@ -0,0 +1,265 @@
+"""Persistent command history.
+
+Entries live in a fixed-capacity ring buffer addressed by an ever-growing
+sequence number. Re-entering a command doesn't search the ring: the text's
+latest sequence number is updated in a dict, which makes the older slot
+stale, and stale slots are skipped when browsing. Every live command is also
+indexed by its character n-grams so Ctrl-R reverse search only checks
+commands that could contain the query. Indexing is deferred to the next
+search, so recording a command stays cheap and a session that never
+searches never pays for it.
+
+The history file is append-only and is written by a background thread, so
+recording a command never waits on disk. It is read the first time the
+history is used, and compacted once it grows well past the capacity.
+"""
+import os
+import queue
+import threading
+
+import app_paths
+
+HISTORY_CAPACITY = 2000
+NGRAM_SIZE = 3
+
+# Rewrite the file once it holds this many times more lines than the ring
+COMPACT_FACTOR = 2
+
+# Writer-queue tag of a (_REWRITE, lines) item: replace the file with lines
+_REWRITE = object()
+
+
+def _ngrams(text):
+    """Every substring of up to NGRAM_SIZE characters"""
+    grams = set()
+    for size in range(1, NGRAM_SIZE + 1):
+        for i in range(len(text) - size + 1):
+            grams.add(text[i:i + size])
+    return grams
+
+
+class CommandHistory:
+    def __init__(self, capacity=HISTORY_CAPACITY, path=None):
+        self.capacity = capacity
+        self.path = path
+        
+        # Ring buffer of (seq, text); slot = seq % capacity
+        self._ring = [None] * capacity
+        self._next_seq = 0
+        self._latest = {}  # text -> seq of its live entry
+        
+        # Reverse search index: n-gram -> texts containing it, plus live
+        # texts recorded since the last search and not indexed yet
+        self._index = {}
+        self._unindexed = set()
+        
+        # Lazy loading and asynchronous writing; _file_lines counts the
+        # lines the file will hold once every queued write has landed
+        self._loaded = path is None
+        self._file_lines = 0
+        self._writes = None
+        self._writer = None
+    
+    @classmethod
+    def default_path(cls):
+        """History file in the per-user data directory"""
+        return os.path.join(app_paths.data_dir(), 'history.txt')
+    
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._latest)
+    
+    def _ensure_loaded(self):
+        """Read the history file the first time the history is used"""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return
+        
+        self._file_lines = len(lines)
+        for line in lines[-self.capacity * COMPACT_FACTOR:]:
+            if line:
+                self._record(line)
+    
+    def _record(self, text):
+        """Put text in the ring as the newest entry"""
+        seq = self._next_seq
+        slot = seq % self.capacity
+        
+        # Evict whatever the slot held, unless a newer copy of it is live
+        evicted = self._ring[slot]
+        if evicted is not None and self._latest.get(evicted[1]) == evicted[0]:
+            del self._latest[evicted[1]]
+            if evicted[1] in self._unindexed:
+                self._unindexed.discard(evicted[1])
+            else:
+                self._unindex(evicted[1])
+        
+        if text not in self._latest:
+            self._unindexed.add(text)
+        self._latest[text] = seq
+        self._ring[slot] = (seq, text)
+        self._next_seq += 1
+    
+    def _index_pending(self):
+        """Index the texts recorded since the last search"""
+        index = self._index
+        for text in self._unindexed:
+            for gram in _ngrams(text):
+                index.setdefault(gram, set()).add(text)
+        self._unindexed.clear()
+    
+    def _unindex(self, text):
+        """Drop a text from the search index"""
+        for gram in _ngrams(text):
+            texts = self._index.get(gram)
+            if texts is not None:
+                texts.discard(text)
+                if not texts:
+                    del self._index[gram]
+    
+    def _is_live(self, entry):
+        """Whether a ring entry is the newest copy of its text"""
+        return entry is not None and self._latest.get(entry[1]) == entry[0]
+    
+    def add(self, text):
+        """Record a command, moving an existing copy to the front"""
+        text = text.replace('\n', ' ').strip()
+        if not text:
+            return
+        self._ensure_loaded()
+        
+        newest = self.previous()
+        if newest is not None and newest[1] == text:
+            return
+        self._record(text)
+        self._queue_write(text)
+    
+    def replace(self, texts):
+        """Swap the whole history for texts (oldest first), e.g. from a save file"""
+        self._loaded = True
+        self._ring = [None] * self.capacity
+        self._next_seq = 0
+        self._latest = {}
+        self._index = {}
+        self._unindexed = set()
+        for text in texts[-self.capacity:]:
+            self._record(text)
+        # Rewriting the file happens on the writer thread like any other write
+        self._queue_write(_REWRITE)
+    
+    def entries(self):
+        """Live commands, oldest first"""
+        self._ensure_loaded()
+        start = max(0, self._next_seq - self.capacity)
+        return [entry[1] for entry in (self._ring[seq % self.capacity] for seq in range(start, self._next_seq))
+                if self._is_live(entry)]
+    
+    def previous(self, before=None):
+        """Newest live (seq, text) older than sequence number `before`"""
+        self._ensure_loaded()
+        seq = (self._next_seq if before is None else before) - 1
+        oldest = max(0, self._next_seq - self.capacity)
+        while seq >= oldest:
+            entry = self._ring[seq % self.capacity]
+            if self._is_live(entry):
+                return entry
+            seq -= 1
+        return None
+    
+    def next(self, after):
+        """Oldest live (seq, text) newer than sequence number `after`"""
+        self._ensure_loaded()
+        seq = max(after + 1, self._next_seq - self.capacity)
+        while seq < self._next_seq:
+            entry = self._ring[seq % self.capacity]
+            if self._is_live(entry):
+                return entry
+            seq += 1
+        return None
+    
+    def search(self, query, before=None):
+        """Newest (seq, text) containing query and older than `before`, or None"""
+        self._ensure_loaded()
+        if not query:
+            return self.previous(before)
+        if self._unindexed:
+            self._index_pending()
+        
+        # Intersect the posting sets of the query's n-grams, smallest first
+        grams = [query[i:i + NGRAM_SIZE] for i in range(max(1, len(query) - NGRAM_SIZE + 1))]
+        postings = sorted((self._index.get(gram, set()) for gram in grams), key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        
+        limit = self._next_seq if before is None else before
+        best = None
+        for text in candidates:
+            seq = self._latest[text]
+            if seq < limit and query in text and (best is None or seq > best[0]):
+                best = (seq, text)
+        return best
+    
+    def _queue_write(self, text):
+        """Hand a new entry to the writer thread, or a rewrite once the file has grown too long"""
+        if self.path is None:
+            return
+        if self._writer is None:
+            self._writes = queue.Queue()
+            self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+            self._writer.start()
+        
+        if text is _REWRITE or self._file_lines + 1 > self.capacity * COMPACT_FACTOR:
+            # Snapshot the ring here, on the thread that changes it; the
+            # snapshot already holds text and every entry queued before it
+            live = self.entries()
+            self._writes.put((_REWRITE, live))
+            self._file_lines = len(live)
+        else:
+            self._writes.put(text)
+            self._file_lines += 1
+    
+    def _write_loop(self):
+        """Append queued entries to the history file, compacting when it grows"""
+        while True:
+            text = self._writes.get()
+            if text is None:
+                return
+            batch = [text]
+            # Drain whatever else is waiting so bursts become one write
+            while not self._writes.empty():
+                text = self._writes.get()
+                if text is None:
+                    self._append(batch)
+                    return
+                batch.append(text)
+            self._append(batch)
+    
+    def _append(self, batch):
+        """Write a batch of queued items: the newest rewrite, then the lines queued after it"""
+        rewrite = None
+        lines = []
+        for item in batch:
+            if isinstance(item, tuple):
+                # A rewrite's snapshot already holds every line queued before it
+                rewrite, lines = item[1], []
+            else:
+                lines.append(item)
+        try:
+            if rewrite is not None:
+                app_paths.atomic_write(self.path, ''.join(f"{line}\n" for line in rewrite + lines).encode('utf-8'))
+            elif lines:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(''.join(f"{line}\n" for line in lines))
+        except OSError as e:
+            print(f"Warning: Could not save command history: {e}")
+    
+    def close(self):
+        """Flush pending writes and stop the writer thread"""
+        if self._writer is not None:
+            self._writes.put(None)
+            self._writer.join(timeout=2.0)
+            self._writer = None
\ No newline at end of file
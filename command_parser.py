@@ -0,0 +1,205 @@
+"""Table-driven command grammar.
+
+The grammar is plain data: canonical verbs and nouns with their synonyms,
+whole-phrase shortcuts, verbs that take free text, and filler words to
+skip. CommandParser compiles it once into dict indexes so parsing a line is
+a handful of dictionary lookups, and produces structured Command tuples
+that the game dispatches on. The commands the game itself handles in every
+world (SYSTEM_VERBS) are merged into whatever grammar a world supplies.
+
+Parsing a new input takes about twice as long as the if/elif chain this
+replaced, since it also splits out the object and arguments. Only
+parse()'s cache of recent inputs makes repeated commands faster than the
+chain.
+"""
+import copy
+import functools
+from collections import namedtuple
+
+DEFAULT_GRAMMAR = {
+    # canonical verb -> synonyms
+    'verbs': {
+        'exit': ['quit', 'q'],
+        'help': ['h', '?'],
+        'inventory': ['inv', 'i'],
+        'look': ['l', 'examine'],
+        'start': ['begin'],
+        'use': [],
+        'open': [],
+        'password': [],
+    },
+    # canonical noun -> synonyms
+    'nouns': {
+        'terminal': ['computer'],
+        'door': [],
+        'keycard': [],
+    },
+    # whole inputs that stand for another command
+    'phrases': {
+        'start journey': 'start',
+        'terminal': 'use terminal',
+        'computer': 'use terminal',
+        'door': 'open door',
+        'use door': 'open door',
+        'keycard': 'use keycard',
+    },
+    # verbs whose remainder is kept verbatim in Command.args
+    'free_text': ['password'],
+    # words dropped between the verb and its object
+    'ignore': ['the', 'a', 'an', 'at', 'to', 'with'],
+}
+
+# Verbs the game handles itself in every world, added to any grammar that
+# doesn't already use them
+SYSTEM_VERBS = {
+    'exit': ['quit', 'q'],
+    'save': [],
+    'load': ['restore'],
+    'undo': [],
+    'redo': [],
+}
+
+# Number of distinct raw inputs remembered by CommandParser.parse
+RECENT_CACHE_SIZE = 1024
+
+
+class Command(namedtuple('Command', ['verb', 'obj', 'args', 'text'])):
+    """A parsed command: canonical verb/object, free-text args and the input"""
+    __slots__ = ()
+    
+    @property
+    def key(self):
+        """Dispatch key for handler tables"""
+        return (self.verb, self.obj)
+    
+    @property
+    def known(self):
+        """Whether the verb is part of the grammar"""
+        return self.verb is not None
+    
+    def describe(self):
+        """Canonical text form, e.g. 'use terminal' or 'password retr0'"""
+        if self.verb is None:
+            return self.text
+        return ' '.join(part for part in (self.verb, self.obj, self.args) if part)
+
+
+# Builds a Command from a 4-tuple, skipping the Python-level namedtuple __new__
+_new_command = functools.partial(tuple.__new__, Command)
+
+
+class CommandParser:
+    def __init__(self, grammar=None):
+        # Private copy, so add_verb/add_phrase never touch the caller's tables
+        self.grammar = copy.deepcopy(grammar or DEFAULT_GRAMMAR)
+        self._add_system_verbs()
+        self._compile()
+    
+    def _add_system_verbs(self):
+        """Merge SYSTEM_VERBS in, leaving any word the grammar already uses alone"""
+        verbs = self.grammar.setdefault('verbs', {})
+        taken = {alias for verb, synonyms in verbs.items() for alias in [verb] + list(synonyms)}
+        for verb, synonyms in SYSTEM_VERBS.items():
+            if verb not in taken:
+                verbs[verb] = [alias for alias in synonyms if alias not in taken]
+    
+    def _compile(self):
+        """Build the alias indexes from the grammar tables"""
+        grammar = self.grammar
+        self.verb_index = {}
+        self.noun_index = {}
+        self.free_text_verbs = set(grammar.get('free_text', []))
+        self.ignored_words = set(grammar.get('ignore', []))
+        
+        for verb, synonyms in grammar.get('verbs', {}).items():
+            for alias in [verb] + list(synonyms):
+                self.verb_index[alias] = verb
+        for noun, synonyms in grammar.get('nouns', {}).items():
+            for alias in [noun] + list(synonyms):
+                self.noun_index[alias] = noun
+        
+        # Longest multi-word verb alias, so parse() knows how far to look
+        self.max_verb_words = max((len(alias.split()) for alias in self.verb_index), default=1)
+        
+        # Phrases resolve through the indexes above, so compile them last.
+        # Bare verb aliases go in too, making one-word commands a single lookup.
+        self.phrase_index = {alias: (verb, None, '') for alias, verb in self.verb_index.items()}
+        for phrase, target in grammar.get('phrases', {}).items():
+            verb, obj, args = self._parse_words(target.split())
+            self.phrase_index[phrase] = (verb, obj, args)
+        # The finished Command for each phrase, shared by every parse of it
+        self._phrase_commands = {phrase: _new_command((*parts, phrase))
+                                 for phrase, parts in self.phrase_index.items()}
+        
+        # Recently parsed inputs; players repeat themselves a lot
+        self._recent = {}
+    
+    def add_verb(self, verb, synonyms=()):
+        """Add a verb (or more synonyms for an existing one)"""
+        self.grammar.setdefault('verbs', {}).setdefault(verb, []).extend(synonyms)
+        self._compile()
+    
+    def add_phrase(self, phrase, target):
+        """Make a whole input stand for another command"""
+        self.grammar.setdefault('phrases', {})[phrase] = target
+        self._compile()
+    
+    def vocabulary(self):
+        """Every verb, noun and phrase the grammar accepts"""
+        return set(self.verb_index) | set(self.noun_index) | set(self.phrase_index)
+    
+    def parse(self, text):
+        """Parse one line of input into a Command, or None if it is blank"""
+        command = self._recent.get(text)
+        if command is not None:
+            return command
+        
+        command = self.parse_uncached(text)
+        if len(self._recent) >= RECENT_CACHE_SIZE:
+            self._recent.clear()
+        self._recent[text] = command
+        return command
+    
+    def parse_uncached(self, text):
+        """Parse without consulting the recent-input cache"""
+        # Typed input is usually already a lowercase, single-spaced phrase
+        command = self._phrase_commands.get(text)
+        if command is not None:
+            return command
+        
+        words = text.lower().split()
+        if not words:
+            return None
+        normalized = ' '.join(words)
+        command = self._phrase_commands.get(normalized)
+        if command is not None:
+            return command
+        return _new_command((*self._parse_words(words), normalized))
+    
+    def _parse_words(self, words):
+        """Resolve (verb, object, args) from a list of lowercase words"""
+        # Prefer the longest verb alias that matches the start of the input;
+        # one-word aliases, by far the most common, need no join
+        for length in range(min(self.max_verb_words, len(words)), 1, -1):
+            verb = self.verb_index.get(' '.join(words[:length]))
+            if verb is not None:
+                break
+        else:
+            length = 1
+            verb = self.verb_index.get(words[0])
+            if verb is None:
+                return (None, None, '')
+        rest = words[length:]
+        
+        if verb in self.free_text_verbs:
+            return (verb, None, ' '.join(rest))
+        
+        if not self.ignored_words.isdisjoint(rest):
+            rest = [word for word in rest if word not in self.ignored_words]
+        if not rest:
+            return (verb, None, '')
+        
+        obj = self.noun_index.get(' '.join(rest))
+        if obj is not None:
+            return (verb, obj, '')
+        return (verb, None, ' '.join(rest))
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""Context-aware TAB completion backed by prefix tries.
+
+CompletionEngine keeps one trie of the verbs valid in the current game
+state and one of the objects the player can refer to (visible objects plus
+inventory). The tries are patched with only the words that changed whenever
+the state or inventory changes, so a TAB press is just a walk down the trie.
+"""
+
+
+class PrefixTrie:
+    # Key marking the end of a word inside a node dict
+    END = ''
+    
+    def __init__(self):
+        self.root = {}
+        self.size = 0
+    
+    def __len__(self):
+        return self.size
+    
+    def __contains__(self, word):
+        node = self._find(word)
+        return node is not None and self.END in node
+    
+    def _find(self, prefix):
+        """Walk to the node for a prefix, or None"""
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node
+    
+    def insert(self, word):
+        """Add a word; adding an existing word is a no-op"""
+        node = self.root
+        for char in word:
+            node = node.setdefault(char, {})
+        if self.END not in node:
+            node[self.END] = word
+            self.size += 1
+    
+    def remove(self, word):
+        """Remove a word, pruning nodes that no longer lead anywhere"""
+        path = [self.root]
+        for char in word:
+            node = path[-1].get(char)
+            if node is None:
+                return
+            path.append(node)
+        if self.END not in path[-1]:
+            return
+        
+        del path[-1][self.END]
+        self.size -= 1
+        for depth in range(len(word), 0, -1):
+            if path[depth]:
+                break
+            del path[depth - 1][word[depth - 1]]
+    
+    def with_prefix(self, prefix):
+        """All words starting with prefix, in alphabetical order"""
+        node = self._find(prefix)
+        if node is None:
+            return []
+        
+        words = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if self.END in node:
+                words.append(node[self.END])
+            # Push in reverse so the smallest child is visited first
+            stack.extend(node[char] for char in sorted(node, reverse=True) if char != self.END)
+        return words
+
+
+class CompletionEngine:
+    def __init__(self):
+        self.verb_trie = PrefixTrie()
+        self.object_trie = PrefixTrie()
+        self.verbs = set()
+        self.objects = set()
+        
+        # Statistics: how many words were patched into the tries
+        self.updates = 0
+    
+    def set_context(self, verbs, objects):
+        """Replace the completable words, touching only what changed"""
+        self.updates += self._patch(self.verb_trie, self.verbs, set(verbs))
+        self.verbs = set(verbs)
+        self.updates += self._patch(self.object_trie, self.objects, set(objects))
+        self.objects = set(objects)
+    
+    def _patch(self, trie, old, new):
+        """Apply a set difference to a trie, returning the number of edits"""
+        for word in old - new:
+            trie.remove(word)
+        for word in new - old:
+            trie.insert(word)
+        return len(old ^ new)
+    
+    def complete(self, text):
+        """Full-line completions for the text typed so far"""
+        head, space, last_word = text.lower().rpartition(' ')
+        if not space:
+            return self.verb_trie.with_prefix(last_word)
+        
+        prefix = head + space
+        return [prefix + word for word in self.object_trie.with_prefix(last_word)]
\ No newline at end of file
@@ -1,21 +1,30 @@
 import pygame
 import random
 import math
+from font_registry import get_font
 
 class CRTRenderer:
-    def __init__(self, width, height):
+    def __init__(self, width, height, seed=None, scale=1.0):
         self.width = width
         self.height = height
-        self.font = pygame.font.SysFont("Courier", 24, bold=True)
-        self.small_font = pygame.font.SysFont("Courier", 16, bold=True)
         
-        # CRT effect parameters
-        self.scanline_y_pos = 0
-        self.scanline_speed = 3
+        # The layout is designed for 800x600; scale sizes it for other render resolutions
+        self.scale = scale
+        
+        # Own generator so a seed makes wiggle and noise repeatable
+        self.rng = random.Random(seed)
+        self.font = get_font("Courier", self.scaled(24), bold=True)
+        self.small_font = get_font("Courier", self.scaled(16), bold=True)
+        
+        # CRT effect parameters; speeds are per second, intervals in seconds
+        self.scanline_y_pos = 0.0
+        self.previous_scanline_y = 0.0
+        self.scanline_draw_y = 0
+        self.scanline_speed = 90 * scale
         self.scanline_thickness = 2
         self.wiggle_amplitude = 1
-        self.wiggle_timer = 0
-        self.wiggle_update_interval = 8
+        self.wiggle_timer = 0.0
+        self.wiggle_update_interval = 8 / 30
         self.current_wiggle_offset_x = 0
         
         # Phosphor glow effect
@@ -31,16 +40,24 @@ class CRTRenderer:
         # Color bleeding
         self.color_bleed_strength = 0.8
         
-        # Surfaces for effects
+        # Surfaces for effects; the fixed scanlines are drawn once, and each
+        # frame only copies them and adds the moving line
         self.scanline_surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.scanline_pattern = self._draw_scanline_pattern()
         self.glow_surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.flicker_surface = pygame.Surface((width, height))
+        self.noise_surface = pygame.Surface((width, height))
         
-        # Static noise
+        # Static noise, shown for one update every interval
         self.noise_intensity = 0.1
-        self.noise_timer = 0
+        self.noise_timer = 0.0
+        self.noise_interval = 0.1
+        self.noise_visible = False
         
-        # Screen flicker
-        self.flicker_timer = 0
+        # Screen flicker, likewise
+        self.flicker_timer = 0.0
+        self.flicker_interval = 4.0
+        self.flicker_visible = False
         self.flicker_intensity = 0.95
         
         # Color definitions
@@ -54,24 +71,21 @@ class CRTRenderer:
             'GRAY': (128, 128, 128)
         }
     
+    def scaled(self, length):
+        """A layout length in pixels at this render scale"""
+        return max(1, round(length * self.scale))
+    
     def get_color(self, color_name):
         """Get color tuple from name"""
         return self.colors.get(color_name, self.colors['GREEN'])
     
-    def apply_base_effects(self, surface):
-        """Apply base CRT effects"""
-        # Update wiggle offset
-        self.wiggle_timer += 1
-        if self.wiggle_timer >= self.wiggle_update_interval:
-            self.wiggle_timer = 0
-            self.current_wiggle_offset_x = random.randint(-self.wiggle_amplitude, self.wiggle_amplitude)
-        
-        # Update scanline position
-        self.scanline_y_pos = (self.scanline_y_pos + self.scanline_speed) % (self.height + 20)
-        
-        # Update noise and flicker
-        self.noise_timer += 1
-        self.flicker_timer += 1
+    def apply_base_effects(self, surface, alpha=1.0):
+        """Apply base CRT effects; alpha is how far this frame is between two updates"""
+        # Interpolate the moving scanline, allowing for it wrapping to the top
+        previous, current = self.previous_scanline_y, self.scanline_y_pos
+        if current < previous:
+            current += self.height + 20
+        self.scanline_draw_y = int(previous + (current - previous) * alpha) % (self.height + 20)
     
     def render_text_with_effects(self, surface, text, pos, color_name):
         """Render text with CRT effects"""
@@ -91,12 +105,12 @@ class CRTRenderer:
         # Primary ghost (medium intensity)
         ghost_color_1 = (color[0] // 3, color[1] // 3, color[2] // 3)
         ghost_1 = self.font.render(text, True, ghost_color_1)
-        surface.blit(ghost_1, (x + 2, y + 2))
+        surface.blit(ghost_1, (x + self.scaled(2), y + self.scaled(2)))
         
         # Secondary ghost (low intensity, wider)
         ghost_color_2 = (color[0] // 5, color[1] // 5, color[2] // 5)
         ghost_2 = self.font.render(text, True, ghost_color_2)
-        surface.blit(ghost_2, (x + 4, y + 4))
+        surface.blit(ghost_2, (x + self.scaled(4), y + self.scaled(4)))
         
         # Color bleeding effect
         if self.color_bleed_strength > 0:
@@ -104,8 +118,8 @@ class CRTRenderer:
                           min(255, int(color[1] * self.color_bleed_strength)), 
                           min(255, int(color[2] * self.color_bleed_strength)))
             bleed_text = self.font.render(text, True, bleed_color)
-            surface.blit(bleed_text, (x + 1, y))
-            surface.blit(bleed_text, (x - 1, y))
+            surface.blit(bleed_text, (x + self.scaled(1), y))
+            surface.blit(bleed_text, (x - self.scaled(1), y))
         
         # Main text
         main_text = self.font.render(text, True, color)
@@ -125,97 +139,132 @@ class CRTRenderer:
         # Center the sprite - FIX: Use font.size() instead of font.get_rect()
         first_line_width = self.font.size(sprite_lines[0])[0]  # Returns (width, height)
         sprite_x = text_panel_width + (sprite_panel_width - first_line_width) // 2
-        sprite_y = 80
+        sprite_y = self.scaled(80)
         
         # Apply wiggle to sprite
         sprite_x += self.current_wiggle_offset_x
         
         # Render each line of the sprite
         for i, line in enumerate(sprite_lines):
-            y_pos = sprite_y + i * 28
+            y_pos = sprite_y + i * self.scaled(28)
             self._render_ghost_text(surface, line, (sprite_x, y_pos), color)
     
     def render_ui_text(self, surface, text, pos, color_name):
         """Render UI text with smaller font"""
         x, y = pos
-        color = self.get_color(color_name)
         
         # Simple render for UI elements
-        ui_text = self.small_font.render(text, True, color)
+        ui_text = self.render_ui_surface(text, color_name)
         surface.blit(ui_text, (x, y))
     
-    def apply_final_effects(self, surface):
-        """Apply final CRT effects over everything"""
+    def render_ui_surface(self, text, color_name):
+        """Render UI text to a surface that can be kept and blitted later"""
+        return self.small_font.render(text, True, self.get_color(color_name))
+    
+    def capture_final_effects(self):
+        """Everything apply_final_effects needs from this frame, taken on the main thread
+        
+        The noise pixels are drawn from the generator here so a seeded game
+        sees the same sequence whether or not the effects run on a worker.
+        """
+        noise = None
+        if self.noise_visible:  # Update noise every 0.1 seconds
+            # 50 random noise pixels
+            noise = [(self.rng.randint(0, self.width - 1), self.rng.randint(0, self.height - 1),
+                      self.rng.randint(0, 255)) for _ in range(50)]
+        return (self.scanline_draw_y, self.flicker_visible, noise)
+    
+    def apply_final_effects(self, surface, params=None):
+        """Apply final CRT effects over everything
+        
+        params comes from capture_final_effects; passing it lets another thread
+        do this work while the main thread moves on to the next frame.
+        """
+        if params is None:
+            params = self.capture_final_effects()
+        scanline_y, flicker_visible, noise = params
+        
         # Apply scanlines
-        self._apply_scanlines(surface)
+        self._apply_scanlines(surface, scanline_y)
         
         # Apply screen flicker
-        self._apply_screen_flicker(surface)
+        if flicker_visible:
+            self._apply_screen_flicker(surface)
         
         # Apply subtle noise
-        self._apply_noise(surface)
+        if noise:
+            self._apply_noise(surface, noise)
         
         # Draw screen border/bezel
         self._draw_screen_border(surface)
     
-    def _apply_scanlines(self, surface):
-        """Apply moving scanline effect"""
-        # Clear scanline surface
-        self.scanline_surface.fill((0, 0, 0, 0))
-        
-        # Draw multiple horizontal scanlines
+    def _draw_scanline_pattern(self):
+        """The fixed horizontal scanlines"""
+        pattern = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
         for i in range(0, self.height, 4):
             alpha = 30 if i % 8 == 0 else 15
             scanline_color = (20, 20, 20, alpha)
-            pygame.draw.line(self.scanline_surface, scanline_color, 
-                           (0, i), (self.width, i), 1)
+            pygame.draw.line(pattern, scanline_color, (0, i), (self.width, i), 1)
+        return pattern
+    
+    def _apply_scanlines(self, surface, scanline_y):
+        """Apply moving scanline effect"""
+        # Copy the fixed scanlines (adding onto a cleared surface copies exactly)
+        self.scanline_surface.fill((0, 0, 0, 0))
+        self.scanline_surface.blit(self.scanline_pattern, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
         
         # Draw the moving bright scanline
         moving_scanline_color = (40, 40, 40, 80)
         for thickness in range(self.scanline_thickness):
-            y_pos = (self.scanline_y_pos + thickness) % self.height
-            pygame.draw.line(self.scanline_surface, moving_scanline_color,
-                           (0, y_pos), (self.width, y_pos), 1)
+            y_pos = (scanline_y + thickness) % self.height
+            self.scanline_surface.fill(moving_scanline_color, (0, y_pos, self.width, 1))
         
         # Blit scanlines to main surface
         surface.blit(self.scanline_surface, (0, 0))
     
     def _apply_screen_flicker(self, surface):
         """Apply subtle screen flicker"""
-        if self.flicker_timer % 120 == 0:  # Flicker every 4 seconds at 30 FPS
-            # Create a dark overlay
-            flicker_surface = pygame.Surface((self.width, self.height))
-            flicker_surface.fill((0, 0, 0))
-            flicker_surface.set_alpha(int(255 * (1 - self.flicker_intensity)))
-            surface.blit(flicker_surface, (0, 0))
-    
-    def _apply_noise(self, surface):
+        # Dark overlay, every 4 seconds
+        self.flicker_surface.fill((0, 0, 0))
+        self.flicker_surface.set_alpha(int(255 * (1 - self.flicker_intensity)))
+        surface.blit(self.flicker_surface, (0, 0))
+    
+    def _apply_noise(self, surface, noise):
         """Apply subtle static noise"""
-        if self.noise_timer % 3 == 0:  # Update noise every 3 frames
-            noise_surface = pygame.Surface((self.width, self.height))
-            noise_surface.set_alpha(int(255 * self.noise_intensity))
-            
-            # Generate random noise pixels
-            for _ in range(50):  # 50 random noise pixels
-                x = random.randint(0, self.width - 1)
-                y = random.randint(0, self.height - 1)
-                brightness = random.randint(0, 255)
-                noise_color = (brightness, brightness, brightness)
-                noise_surface.set_at((x, y), noise_color)
-            
-            surface.blit(noise_surface, (0, 0))
+        self.noise_surface.fill((0, 0, 0))
+        self.noise_surface.set_alpha(int(255 * self.noise_intensity))
+        for x, y, brightness in noise:
+            self.noise_surface.set_at((x, y), (brightness, brightness, brightness))
+        surface.blit(self.noise_surface, (0, 0))
     
     def _draw_screen_border(self, surface):
         """Draw a subtle screen border/bezel"""
         border_color = (30, 30, 30)
-        pygame.draw.rect(surface, border_color, (0, 0, self.width, self.height), 2)
+        pygame.draw.rect(surface, border_color, (0, 0, self.width, self.height), self.scaled(2))
         
         # Draw panel separator
         panel_separator_x = self.width // 2
         pygame.draw.line(surface, border_color, 
-                        (panel_separator_x, 0), (panel_separator_x, self.height - 100), 1)
+                        (panel_separator_x, 0), (panel_separator_x, self.height - self.scaled(100)), 1)
     
-    def update(self):
-        """Update CRT effect timers"""
-        # This method is called each frame to update effect timers
-        pass
\ No newline at end of file
+    def update(self, dt):
+        """Advance CRT effect timers by dt seconds"""
+        # Update wiggle offset
+        self.wiggle_timer += dt
+        if self.wiggle_timer >= self.wiggle_update_interval:
+            self.wiggle_timer -= self.wiggle_update_interval
+            self.current_wiggle_offset_x = self.rng.randint(-self.wiggle_amplitude, self.wiggle_amplitude)
+        
+        # Update scanline position
+        self.previous_scanline_y = self.scanline_y_pos
+        self.scanline_y_pos = (self.scanline_y_pos + self.scanline_speed * dt) % (self.height + 20)
+        
+        # Update noise and flicker
+        self.noise_timer += dt
+        self.noise_visible = self.noise_timer >= self.noise_interval
+        if self.noise_visible:
+            self.noise_timer -= self.noise_interval
+        self.flicker_timer += dt
+        self.flicker_visible = self.flicker_timer >= self.flicker_interval
+        if self.flicker_visible:
+            self.flicker_timer -= self.flicker_interval
\ No newline at end of file
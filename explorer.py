@@ -0,0 +1,340 @@
+"""Exhaustive state-space exploration of a world, for validating content.
+
+Usage: python explorer.py [--world FILE] [--workers N] [--command TEXT ...]
+
+Starting from a fresh GameState in the world's start room, the explorer
+tries every command of a candidate vocabulary in every reachable state,
+breadth first, so the first path found to any state is a shortest one. A
+state is the room, health, the puzzle fields, the inventory and the flags;
+states are deduplicated by hashing that tuple. Each BFS level is split into
+chunks that a process pool expands in parallel, running the world's real
+handlers against a minimal headless host.
+
+The vocabulary is every command any room declares, plus each free-text
+verb with every argument the world tests for and one argument it doesn't.
+
+The report lists every ending with its shortest solution, rooms that can't
+be reached, dead ends (states where no command changes anything) and soft
+locks (states from which no ending can be reached). The exit status is 1
+when there is a soft lock, an unreachable room or no ending at all.
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+
+from command_parser import CommandParser, SYSTEM_VERBS
+from game_state import GameState
+from world import load_world, WorldError
+
+# Smallest number of states handed to a worker at once
+MIN_CHUNK = 64
+
+# Soft locks and dead ends listed in full before the rest are counted
+REPORT_LIMIT = 10
+
+# Position of the fields in a state key
+ROOM, HEALTH, ENDED = 0, 1, 6
+
+
+def state_key(game_state, ended=False):
+    """Hashable summary of everything the world's conditions can observe"""
+    # An unset flag reads as False, so False flags are left out to make
+    # "never set" and "set to False" the same state
+    return (
+        game_state.current_state,
+        game_state.health,
+        game_state.terminal_solved,
+        game_state.door_unlocked,
+        tuple(sorted(game_state.inventory)),
+        tuple(sorted(((name, value) for name, value in game_state.game_flags.items() if value is not False),
+                     key=itemgetter(0))),
+        ended,
+    )
+
+
+def restore_state(key):
+    """A GameState matching a state key"""
+    game_state = GameState()
+    game_state.current_state = key[0]
+    game_state.health = key[1]
+    game_state.terminal_solved = key[2]
+    game_state.door_unlocked = key[3]
+    game_state.inventory = key[4]
+    game_state.game_flags = dict(key[5])
+    return game_state
+
+
+class ExplorerHost:
+    """The host interface world effects run against, with nothing attached"""
+    def __init__(self, game_state):
+        self.game_state = game_state
+        self.ended = False
+    
+    def add_game_message(self, text, color='GREEN'):
+        pass
+    
+    def clear_messages(self):
+        pass
+    
+    def goto(self, room):
+        self.game_state.change_state(room)
+    
+    def set_sprite(self, name):
+        pass
+    
+    def play_sound(self, name):
+        pass
+    
+    def end_game(self, seconds):
+        self.ended = True
+    
+    def set_input_active(self, active):
+        if not active:
+            self.ended = True
+    
+    def call_later(self, seconds, callback):
+        # Delayed effects land before the next command, as if the player waited
+        callback()
+
+
+def collect_arguments(world):
+    """Every literal a room tests a command's free-text arguments against"""
+    found = set()
+    
+    def visit(node):
+        if isinstance(node, tuple):
+            if len(node) == 2 and node[0] == 'args' and isinstance(node[1], str):
+                found.add(node[1])
+            for part in node:
+                visit(part)
+    
+    for name in world.room_info:
+        compiled = pickle.loads(world._room_blobs[name])
+        visit(tuple(compiled['commands'].values()))
+        visit(compiled['fallback'])
+    return found
+
+
+def build_vocabulary(world, extra=()):
+    """Candidate commands to try in every state"""
+    commands = set(world.command_phrases())
+    arguments = collect_arguments(world) - {''}
+    wrong = 'x'
+    while wrong in arguments:
+        wrong += 'x'
+    for verb in world.grammar.get('free_text', ()):
+        commands.add(verb)
+        commands.update(f"{verb} {argument}" for argument in arguments | {wrong})
+    commands.update(extra)
+    return sorted(command for command in commands if command.split()[0] not in SYSTEM_VERBS)
+
+
+# Worker side: each process loads the world once, then expands chunks of states
+
+_worker = None
+
+
+def _init_worker(world_path, commands):
+    global _worker
+    world = load_world(world_path)
+    parser = CommandParser(world.grammar)
+    _worker = (world, [parser.parse_uncached(text) for text in commands])
+
+
+def _successor(world, key, command):
+    """The state key after running command in the state key describes"""
+    game_state = restore_state(key)
+    host = ExplorerHost(game_state)
+    room = world.room(key[ROOM])
+    handler = room.find(command) if command is not None else None
+    handler = handler or room.fallback
+    if handler:
+        handler(host, command)
+    return state_key(game_state, host.ended or not game_state.is_alive())
+
+
+def _expand(keys):
+    """[(key, [successor key per command])] for a chunk of state keys"""
+    world, commands = _worker
+    return [(key, [_successor(world, key, command) for command in commands]) for key in keys]
+
+
+class StateExplorer:
+    def __init__(self, world_path=None, commands=(), workers=None):
+        self.world_path = world_path
+        self.world = load_world(world_path)
+        self.commands = build_vocabulary(self.world, commands)
+        self.workers = workers or os.cpu_count() or 1
+        
+        # Graph of explored states: key -> (parent key, command index) and key -> successor keys
+        self.parents = {}
+        self.successors = {}
+        self.unexpanded = set()
+        
+        # Statistics
+        self.depth = 0
+        self.elapsed = 0.0
+    
+    def run(self, max_states=1000000, max_depth=None):
+        """Breadth-first search from the start state; returns the number of states found"""
+        initial = GameState()
+        initial.current_state = self.world.start
+        root = state_key(initial)
+        self.parents = {root: None}
+        self.successors = {}
+        self.depth = 0
+        frontier = [root]
+        
+        start = time.perf_counter()
+        pool = None
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                       initargs=(self.world_path, self.commands))
+        else:
+            _init_worker(self.world_path, self.commands)
+        try:
+            while frontier:
+                if max_depth is not None and self.depth >= max_depth or len(self.parents) >= max_states:
+                    break
+                size = max(MIN_CHUNK, -(-len(frontier) // (self.workers * 4)))
+                chunks = [frontier[i:i + size] for i in range(0, len(frontier), size)]
+                results = pool.map(_expand, chunks) if pool else map(_expand, chunks)
+                
+                frontier = []
+                for chunk in results:
+                    for key, children in chunk:
+                        self.successors[key] = children
+                        for index, child in enumerate(children):
+                            if child not in self.parents:
+                                self.parents[child] = (key, index)
+                                if not child[ENDED]:
+                                    frontier.append(child)
+                self.depth += 1
+        finally:
+            if pool:
+                pool.shutdown()
+        self.elapsed = time.perf_counter() - start
+        self.unexpanded = set(frontier)
+        return len(self.parents)
+    
+    def states_per_second(self):
+        """Exploration throughput"""
+        return len(self.parents) / self.elapsed if self.elapsed > 0 else 0.0
+    
+    def path_to(self, key):
+        """Shortest list of commands that leads from the start to a state"""
+        path = []
+        link = self.parents[key]
+        while link is not None:
+            key, index = link
+            path.append(self.commands[index])
+            link = self.parents[key]
+        path.reverse()
+        return path
+    
+    def endings(self):
+        """{ending: nearest state ending that way}; an ending is the room, or a death there"""
+        endings = {}
+        for key in self.parents:
+            if key[ENDED]:
+                name = key[ROOM] if key[HEALTH] > 0 else f"{key[ROOM]} (game over)"
+                endings.setdefault(name, key)
+        return endings
+    
+    def unreachable_rooms(self):
+        """Rooms no explored state is in"""
+        reached = {key[ROOM] for key in self.parents}
+        return sorted(name for name in self.world.room_info if name not in reached)
+    
+    def dead_ends(self):
+        """Unfinished states where every command leaves the state as it was"""
+        return [key for key, children in self.successors.items()
+                if not key[ENDED] and all(child == key for child in children)]
+    
+    def soft_locks(self):
+        """Unfinished states from which no ending can be reached"""
+        # Walk the graph backwards from every ending; states still being
+        # explored when a limit stopped the search count as possibly finishing
+        predecessors = {}
+        for key, children in self.successors.items():
+            for child in set(children):
+                predecessors.setdefault(child, []).append(key)
+        can_finish = {key for key in self.parents if key[ENDED]} | self.unexpanded
+        queue = deque(can_finish)
+        while queue:
+            for parent in predecessors.get(queue.popleft(), ()):
+                if parent not in can_finish:
+                    can_finish.add(parent)
+                    queue.append(parent)
+        return [key for key in self.parents if key not in can_finish]
+    
+    def report(self, output=None):
+        """Write the findings; returns a process exit status"""
+        output = output or sys.stdout
+        
+        def line(text=""):
+            output.write(text + "\n")
+        
+        def describe(key):
+            inventory = ', '.join(key[4]) or 'nothing'
+            return f"{key[ROOM]}, health {key[HEALTH]}, carrying {inventory}"
+        
+        def listing(title, keys):
+            line(f"{title}: {len(keys) or 'none'}")
+            for key in sorted(keys, key=lambda key: len(self.path_to(key)))[:REPORT_LIMIT]:
+                line(f"  {describe(key)}")
+                line(f"    reached by: {'; '.join(self.path_to(key)) or '(start)'}")
+            if len(keys) > REPORT_LIMIT:
+                line(f"  ... and {len(keys) - REPORT_LIMIT} more")
+        
+        line(f"World: {self.world.title or self.world.path} ({len(self.world.room_info)} rooms)")
+        line(f"Vocabulary: {len(self.commands)} commands")
+        workers = f"{self.workers} worker processes" if self.workers > 1 else "in process"
+        line(f"Explored {len(self.parents)} states to depth {self.depth} in {self.elapsed:.2f} s "
+             f"({self.states_per_second():.0f} states/sec, {workers})")
+        if self.unexpanded:
+            line(f"Warning: stopped at a limit with {len(self.unexpanded)} states unexplored; results are partial")
+        
+        endings = self.endings()
+        line()
+        line(f"Endings: {len(endings) or 'none'}")
+        for name, key in sorted(endings.items()):
+            path = self.path_to(key)
+            line(f"  {name} in {len(path)} commands: {'; '.join(path)}")
+        
+        unreachable = self.unreachable_rooms()
+        soft_locks = self.soft_locks()
+        line()
+        line(f"Unreachable rooms: {', '.join(unreachable) or 'none'}")
+        listing("Dead ends", self.dead_ends())
+        listing("Soft locks", soft_locks)
+        return 1 if unreachable or soft_locks or not endings else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--world', metavar='FILE', help="world file to explore (default: the built-in world)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: one per CPU; 1 explores in process)")
+    parser.add_argument('--command', action='append', default=[], metavar='TEXT',
+                        help="extra command to try in every state (repeatable)")
+    parser.add_argument('--max-states', type=int, default=1000000, help="stop after this many states")
+    parser.add_argument('--max-depth', type=int, default=None, help="stop after this many commands")
+    args = parser.parse_args(argv)
+    
+    try:
+        explorer = StateExplorer(args.world, args.command, args.workers)
+    except WorldError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    explorer.run(args.max_states, args.max_depth)
+    return explorer.report()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""Fonts shared by everything that draws text.
+
+pygame.font.SysFont finds a font by name in a table of the installed fonts,
+which it builds on first use by scanning the system (running fc-list on
+Linux, reading the registry on Windows). That scan is one of the slower
+parts of starting the game. The registry resolves each name and style to a
+font file through SysFont once, keeps the answer in a small JSON file in
+the cache directory so later runs skip the scan, and hands out a single
+Font object per file, size and style.
+
+Fonts that aren't installed fall back to pygame's built-in font, exactly as
+with SysFont; those answers aren't written to disk, so installing the font
+later is picked up on the next run.
+"""
+import json
+import os
+
+import pygame
+
+import app_paths
+
+FONT_CACHE_VERSION = 1
+
+# (name, bold, italic) -> (font file or None, fake bold, fake italic)
+_resolved = {}
+
+# (name, size, bold, italic) -> Font
+_fonts = {}
+
+# The disk cache, loaded on first use
+_stored = None
+
+# Statistics
+stats = {'scans': 0, 'disk_hits': 0, 'fonts_created': 0}
+
+
+def _cache_path():
+    return os.path.join(app_paths.cache_dir(), 'fonts.json')
+
+
+def _load_stored():
+    """The font paths remembered by earlier runs"""
+    try:
+        with open(_cache_path(), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('version') != FONT_CACHE_VERSION:
+        return {}
+    return data.get('fonts', {})
+
+
+def _save_stored():
+    data = json.dumps({'version': FONT_CACHE_VERSION, 'fonts': _stored}, indent=1)
+    try:
+        app_paths.atomic_write(_cache_path(), data.encode('utf-8'))
+    except OSError as e:
+        print(f"Warning: Could not write font cache: {e}")
+
+
+def resolve(name, bold=False, italic=False):
+    """(font file or None for pygame's default, fake bold, fake italic) for a system font"""
+    global _stored
+    key = (name, bold, italic)
+    if key in _resolved:
+        return _resolved[key]
+    
+    if _stored is None:
+        _stored = _load_stored()
+    stored_key = f"{name}|{int(bold)}|{int(italic)}"
+    stored = _stored.get(stored_key)
+    if stored and len(stored) == 3 and isinstance(stored[0], str) and os.path.exists(stored[0]):
+        result = tuple(stored)
+        stats['disk_hits'] += 1
+    else:
+        # SysFont does the matching; the constructor just reports what it chose
+        result = pygame.font.SysFont(name, 0, bold, italic,
+                                     constructor=lambda path, size, fake_bold, fake_italic:
+                                     (path, fake_bold, fake_italic))
+        stats['scans'] += 1
+        if result[0] is not None:
+            _stored[stored_key] = list(result)
+            _save_stored()
+    _resolved[key] = result
+    return result
+
+
+def get_font(name, size, bold=False, italic=False):
+    """The shared Font for a system font name, size and style; same result as SysFont"""
+    key = (name, size, bold, italic)
+    font = _fonts.get(key)
+    if font is None:
+        path, fake_bold, fake_italic = resolve(name, bold, italic)
+        font = pygame.font.Font(path, size)
+        if fake_bold:
+            font.set_bold(True)
+        if fake_italic:
+            font.set_italic(True)
+        _fonts[key] = font
+        stats['fonts_created'] += 1
+    return font
+
+
+def release_fonts():
+    """Drop the shared Font objects, which don't survive pygame.quit; resolved paths are kept"""
+    _fonts.clear()
\ No newline at end of file
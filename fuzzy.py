@@ -0,0 +1,109 @@
+"""Typo-tolerant phrase lookup using a deletion-neighbourhood index.
+
+Every indexed phrase is stored under each string obtainable by deleting up
+to max_distance characters from its first prefix_length characters
+(SymSpell-style). A query generates the same deletions of its own prefix,
+so candidate lookup is a few dict probes regardless of how many phrases are
+indexed; candidates are then confirmed with a bounded edit distance.
+"""
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance, or limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    previous_min = 0
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            # Adjacent transposition counts as a single edit
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        # A transposition can reach back two rows, so both must be over the limit
+        if row_min > limit and previous_min > limit:
+            return limit + 1
+        previous2, previous, previous_min = previous, current, row_min
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+def allowed_distance(text):
+    """How many typos to tolerate for an input of this length"""
+    if len(text) < 3:
+        return 0
+    if len(text) < 6:
+        return 1
+    return 2
+
+
+class FuzzyIndex:
+    def __init__(self, phrases=(), max_distance=2, prefix_length=7, min_length=3):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.min_length = min_length
+        self.phrases = set()
+        self.deletes = {}
+        for phrase in phrases:
+            self.add(phrase)
+    
+    def __len__(self):
+        return len(self.phrases)
+    
+    def _deletions(self, word, distance):
+        """Every string reachable from word by deleting up to distance characters"""
+        results = {word}
+        frontier = {word}
+        for _ in range(distance):
+            next_frontier = set()
+            for item in frontier:
+                for i in range(len(item)):
+                    next_frontier.add(item[:i] + item[i + 1:])
+            results |= next_frontier
+            frontier = next_frontier
+        return results
+    
+    def add(self, phrase):
+        """Index a phrase; very short phrases are not worth suggesting"""
+        if len(phrase) < self.min_length or phrase in self.phrases:
+            return
+        self.phrases.add(phrase)
+        for key in self._deletions(phrase[:self.prefix_length], self.max_distance):
+            self.deletes.setdefault(key, []).append(phrase)
+    
+    def lookup(self, text, max_distance=None):
+        """Indexed phrases within max_distance of text, as (phrase, distance) pairs, closest first"""
+        if max_distance is None:
+            max_distance = allowed_distance(text)
+        max_distance = min(max_distance, self.max_distance)
+        if text in self.phrases:
+            return [(text, 0)]
+        if max_distance == 0:
+            return []
+        
+        seen = set()
+        matches = []
+        for key in self._deletions(text[:self.prefix_length], max_distance):
+            for phrase in self.deletes.get(key, ()):
+                if phrase in seen:
+                    continue
+                seen.add(phrase)
+                distance = edit_distance(text, phrase, max_distance)
+                if distance <= max_distance:
+                    matches.append((phrase, distance))
+        
+        matches.sort(key=lambda match: (match[1], match[0]))
+        return matches
+    
+    def correct(self, text, max_distance=None):
+        """The single phrase text most likely meant, or None if it is ambiguous"""
+        matches = self.lookup(text, max_distance)
+        if len(matches) == 1:
+            return matches[0][0]
+        return None
\ No newline at end of file
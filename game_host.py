@@ -0,0 +1,157 @@
+"""Game rules shared by everything that hosts a world.
+
+GameHost is a mixin holding what happens between a parsed command and the
+world's effects: dispatch to the current room, typo correction, undo and
+redo, the timed end of the game and the welcome text. CRTTextAdventure
+(the pygame window) and text_server.Session (one player on the text
+server) both use it and supply only their I/O.
+
+A host provides world, game_state, undo_history, parser, typo_index,
+sprite_key (the sprite on show), ending (the pending close of the game, or
+None), system_commands, the host interface of world.py, and:
+
+    add_system_message(text)   print a system message
+    stop()                     end the game now
+    _cancel_timers()           cancel every pending call_later timer
+
+and may override _echo_input(text) to show what the player typed and
+_follow_state() to catch up with the game state after a command.
+"""
+
+
+class GameHost:
+    def _welcome(self):
+        """The greeting every game starts with"""
+        self.add_game_message("WELCOME TO THE RETRO ADVENTURE", "YELLOW")
+        self.add_game_message("*******************************", "YELLOW")
+        self.add_game_message("You stand before the pixelated gate of destiny.", "GREEN")
+        self.add_game_message("Type 'start' or 'start journey' to begin.", "GREEN")
+        self.add_game_message("Type 'exit' to quit.", "GREEN")
+    
+    def _submit_command(self, command, input_text):
+        """Run one submitted command"""
+        if command.verb == 'exit':
+            self.add_game_message("Closing...", "RED")
+            self._set_ending(2, self.stop)
+            self.set_input_active(False)
+            self.play_sound('shutdown')
+        else:
+            self._process_command(command, input_text)
+    
+    def _find_handler(self, command):
+        """Handler for a command in the current room: exact (verb, object), then the bare verb"""
+        room = self.world.room(self.game_state.current_state)
+        return room.find(command) if room else None
+    
+    def _typo_candidates(self, command):
+        """Commands valid in the current state that the input was probably meant to be"""
+        parser = self.parser
+        texts = [phrase for phrase, _ in self.typo_index.lookup(command.text)]
+        if not texts:
+            # Try fixing just the verb, keeping whatever followed it
+            first, _, rest = command.text.partition(' ')
+            if rest:
+                texts = [f"{phrase} {rest}" for phrase, _ in self.typo_index.lookup(first)
+                         if phrase in parser.verb_index]
+        
+        candidates = {}
+        for text in texts:
+            candidate = parser.parse(text)
+            if self._find_handler(candidate):
+                candidates.setdefault((candidate.verb, candidate.obj, candidate.args), candidate)
+        return list(candidates.values())
+    
+    def _handle_unrecognized(self, command):
+        """Auto-correct an unambiguous typo, otherwise fall back with suggestions"""
+        room = self.world.room(self.game_state.current_state)
+        fallback = room.fallback if room else None
+        if fallback is None:
+            return command, None
+        
+        candidates = self._typo_candidates(command)
+        if len(candidates) == 1:
+            corrected = candidates[0]
+            self.add_game_message(f"(assuming '{corrected.describe()}')", "GRAY")
+            return corrected, self._find_handler(corrected)
+        
+        fallback(self, command)
+        if candidates:
+            options = ", ".join(f"'{candidate.describe()}'" for candidate in candidates[:3])
+            self.add_game_message(f"Did you mean {options}?", "YELLOW")
+        return command, None
+    
+    def _process_command(self, command, input_text):
+        """Process game commands"""
+        self._echo_input(input_text)
+        
+        handler = self._find_handler(command) or self.system_commands.get(command.verb)
+        if handler is None:
+            command, handler = self._handle_unrecognized(command)
+        if handler:
+            handler(self, command)
+        if command.verb not in ('undo', 'redo'):
+            self.undo_history.record(self.game_state, sprite=self.sprite_key)
+        self._follow_state()
+        
+        sound_name = self.world.command_sounds.get(command.key)
+        if sound_name:
+            self.play_sound(sound_name)
+    
+    def _echo_input(self, input_text):
+        """Show the player's input; hosts whose client echoes it leave this alone"""
+    
+    def _follow_state(self):
+        """Let whatever depends on the game state catch up after a change"""
+    
+    def after_timers(self):
+        """Checkpoint what timers changed as its own undo step, as if it were a command"""
+        self.undo_history.record(self.game_state, sprite=self.sprite_key)
+        self._follow_state()
+    
+    def undo_move(self):
+        """Step the game state back one command"""
+        snapshot = self.undo_history.undo(self.game_state)
+        if snapshot is None:
+            self.add_system_message("Nothing to undo.")
+            return
+        self._after_time_travel(snapshot)
+        self.add_system_message("Undid the last move.")
+    
+    def redo_move(self):
+        """Re-apply the last undone command's changes"""
+        snapshot = self.undo_history.redo(self.game_state)
+        if snapshot is None:
+            self.add_system_message("Nothing to redo.")
+            return
+        self._after_time_travel(snapshot)
+        self.add_system_message("Redid the last move.")
+    
+    def _after_time_travel(self, snapshot):
+        """Bring the sprite, pending timers and a game over in line with a restored state"""
+        self.set_sprite(snapshot.get('sprite'))
+        self._cancel_timers()
+        self.ending = None
+        if not self.game_state.is_alive():
+            self._set_ending(2, self._finish_game)
+    
+    def _set_ending(self, seconds, callback):
+        """Replace any pending close of the game with callback after seconds"""
+        if self.ending is not None:
+            self.ending.cancel()
+        self.ending = self.call_later(seconds, callback)
+    
+    def _finish_game(self):
+        """The game is over: thank a winner before closing, otherwise close now"""
+        if self.game_state.current_state == "end_game":
+            self.add_game_message("Thanks for playing the Enhanced CRT Adventure!", "YELLOW")
+            self._set_ending(2, self.stop)
+        else:
+            self.stop()
+    
+    def end_game(self, seconds):
+        """Close the game after a delay"""
+        self._set_ending(seconds, self._finish_game)
+    
+    def goto(self, room):
+        """Move the player to another room"""
+        self.game_state.change_state(room)
\ No newline at end of file
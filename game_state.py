@@ -1,84 +1,228 @@
+from collections import namedtuple
+from types import MappingProxyType
+
+# One field-level change: for collections `key` is the member and old/new
+# are its value (None when absent); for plain fields `key` is None
+StateChange = namedtuple('StateChange', ['field', 'key', 'old', 'new'])
+
+SCALAR_FIELDS = ('current_state', 'health', 'terminal_solved', 'door_unlocked')
+COLLECTION_FIELDS = ('inventory', 'game_flags', 'visited_locations', 'completed_puzzles')
+
 class GameState:
+    # Collections are dicts: ordered, O(1) membership, and for the sets the
+    # value is simply True. They are exposed read-only; changes go through
+    # the methods below so that every change reaches the subscribers.
+    __slots__ = ('_current_state', '_health', '_terminal_solved', '_door_unlocked',
+                 '_inventory', '_game_flags', '_visited_locations', '_completed_puzzles',
+                 '_listeners')
+    
     def __init__(self):
-        self.current_state = "main_menu"
-        self.terminal_solved = False
-        self.door_unlocked = False
-        self.health = 100
-        self.inventory = []
-        self.game_flags = {}
+        self._listeners = []
+        self._current_state = "main_menu"
+        self._terminal_solved = False
+        self._door_unlocked = False
+        self._health = 100
+        self._inventory = {}
+        self._game_flags = {}
         
         # Story progression tracking
-        self.visited_locations = set()
-        self.completed_puzzles = set()
-        
+        self._visited_locations = {}
+        self._completed_puzzles = {}
+    
+    # Change notification
+    
+    def subscribe(self, listener):
+        """Call listener(StateChange) after every change to the state"""
+        self._listeners.append(listener)
+    
+    def unsubscribe(self, listener):
+        """Stop notifying a listener"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _publish(self, field, key, old, new):
+        for listener in tuple(self._listeners):
+            listener(StateChange(field, key, old, new))
+    
+    def _set_scalar(self, field, value):
+        attribute = '_' + field
+        old = getattr(self, attribute)
+        if old != value:
+            setattr(self, attribute, value)
+            if self._listeners:
+                self._publish(field, None, old, value)
+    
+    # Plain fields
+    
+    @property
+    def current_state(self):
+        return self._current_state
+    
+    @current_state.setter
+    def current_state(self, value):
+        self._set_scalar('current_state', value)
+    
+    @property
+    def health(self):
+        return self._health
+    
+    @health.setter
+    def health(self, value):
+        self._set_scalar('health', value)
+    
+    @property
+    def terminal_solved(self):
+        return self._terminal_solved
+    
+    @terminal_solved.setter
+    def terminal_solved(self, value):
+        self._set_scalar('terminal_solved', value)
+    
+    @property
+    def door_unlocked(self):
+        return self._door_unlocked
+    
+    @door_unlocked.setter
+    def door_unlocked(self, value):
+        self._set_scalar('door_unlocked', value)
+    
+    # Collections: read-only views; assigning replaces the whole collection
+    
+    @property
+    def inventory(self):
+        return self._inventory.keys()
+    
+    @inventory.setter
+    def inventory(self, items):
+        self._replace('inventory', dict.fromkeys(items, True))
+    
+    @property
+    def game_flags(self):
+        return MappingProxyType(self._game_flags)
+    
+    @game_flags.setter
+    def game_flags(self, flags):
+        self._replace('game_flags', dict(flags))
+    
+    @property
+    def visited_locations(self):
+        return self._visited_locations.keys()
+    
+    @visited_locations.setter
+    def visited_locations(self, locations):
+        self._replace('visited_locations', dict.fromkeys(locations, True))
+    
+    @property
+    def completed_puzzles(self):
+        return self._completed_puzzles.keys()
+    
+    @completed_puzzles.setter
+    def completed_puzzles(self, puzzles):
+        self._replace('completed_puzzles', dict.fromkeys(puzzles, True))
+    
+    def _replace(self, field, new):
+        """Swap in a new collection, publishing only the members that differ"""
+        old = getattr(self, '_' + field)
+        setattr(self, '_' + field, new)
+        if not self._listeners:
+            return
+        for key, value in old.items():
+            if key not in new:
+                self._publish(field, key, value, None)
+        for key, value in new.items():
+            if old.get(key) != value:
+                self._publish(field, key, old.get(key), value)
+    
+    def set_member(self, field, key, value):
+        """Low-level collection update used by undo: None removes the member"""
+        members = getattr(self, '_' + field)
+        old = members.get(key)
+        if old == value and (value is not None or key not in members):
+            return
+        if value is None:
+            del members[key]
+        else:
+            members[key] = value
+        if self._listeners:
+            self._publish(field, key, old, value)
+    
+    # Game actions
+    
     def change_state(self, new_state):
         """Change the current game state"""
         self.current_state = new_state
-        self.visited_locations.add(new_state)
+        if new_state not in self._visited_locations:
+            self.set_member('visited_locations', new_state, True)
     
     def add_to_inventory(self, item):
         """Add an item to the inventory"""
-        if item not in self.inventory:
-            self.inventory.append(item)
+        if item not in self._inventory:
+            self.set_member('inventory', item, True)
     
     def remove_from_inventory(self, item):
         """Remove an item from the inventory"""
-        if item in self.inventory:
-            self.inventory.remove(item)
+        if item in self._inventory:
+            self.set_member('inventory', item, None)
     
     def has_item(self, item):
         """Check if player has an item"""
-        return item in self.inventory
+        return item in self._inventory
     
     def set_flag(self, flag_name, value=True):
         """Set a game flag"""
-        self.game_flags[flag_name] = value
+        present = flag_name in self._game_flags
+        old = self._game_flags.get(flag_name)
+        self._game_flags[flag_name] = value
+        if self._listeners and (not present or old != value):
+            self._publish('game_flags', flag_name, old, value)
     
     def get_flag(self, flag_name, default=False):
         """Get a game flag value"""
-        return self.game_flags.get(flag_name, default)
+        return self._game_flags.get(flag_name, default)
+    
+    def clear_flag(self, flag_name):
+        """Remove a game flag"""
+        if flag_name in self._game_flags:
+            self.set_member('game_flags', flag_name, None)
     
     def show_inventory(self, text_manager):
         """Display inventory contents"""
-        if not self.inventory:
+        if not self._inventory:
             text_manager.add_game_message("Your inventory is empty.", "YELLOW")
         else:
             text_manager.add_game_message("INVENTORY:", "YELLOW")
-            for item in self.inventory:
+            for item in self._inventory:
                 text_manager.add_game_message(f"- {item.upper()}", "GREEN")
     
     def take_damage(self, amount):
         """Reduce health by amount"""
-        self.health -= amount
-        if self.health < 0:
-            self.health = 0
+        self.health = max(0, self._health - amount)
     
     def heal(self, amount):
         """Increase health by amount"""
-        self.health += amount
-        if self.health > 100:
-            self.health = 100
+        self.health = min(100, self._health + amount)
     
     def is_alive(self):
         """Check if player is still alive"""
-        return self.health > 0
+        return self._health > 0
     
     def complete_puzzle(self, puzzle_name):
         """Mark a puzzle as completed"""
-        self.completed_puzzles.add(puzzle_name)
+        if puzzle_name not in self._completed_puzzles:
+            self.set_member('completed_puzzles', puzzle_name, True)
     
     def is_puzzle_completed(self, puzzle_name):
         """Check if a puzzle has been completed"""
-        return puzzle_name in self.completed_puzzles
+        return puzzle_name in self._completed_puzzles
     
     def get_state_info(self):
         """Get a dictionary of current state information"""
         return {
-            'current_state': self.current_state,
-            'health': self.health,
-            'inventory_count': len(self.inventory),
-            'terminal_solved': self.terminal_solved,
-            'door_unlocked': self.door_unlocked,
-            'visited_locations': len(self.visited_locations),
-            'completed_puzzles': len(self.completed_puzzles)
+            'current_state': self._current_state,
+            'health': self._health,
+            'inventory_count': len(self._inventory),
+            'terminal_solved': self._terminal_solved,
+            'door_unlocked': self._door_unlocked,
+            'visited_locations': len(self._visited_locations),
+            'completed_puzzles': len(self._completed_puzzles)
         }
\ No newline at end of file
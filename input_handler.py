@@ -1,52 +1,137 @@
 import pygame
+from collections import deque
+from command_parser import CommandParser
+from command_history import CommandHistory
+from completion import CompletionEngine
 
 class InputHandler:
-    def __init__(self):
+    def __init__(self, persist_history=True):
         self.input_text = ""
         self.input_active = True
         self.use_red = False
-        self.cursor_timer = 0
+        self.cursor_timer = 0.0
         self.cursor_visible = True
-        self.cursor_blink_rate = 30  # Frames between cursor blinks
+        self.cursor_blink_rate = 1.0  # Seconds between cursor blinks
         
-        # Command history
-        self.command_history = []
+        # Command history; history_index is the sequence number being shown
+        history_path = CommandHistory.default_path() if persist_history else None
+        self.command_history = CommandHistory(path=history_path)
         self.history_index = -1
         
-        # Input validation
-        self.max_input_length = 50
+        # Ctrl-R reverse search: the query and the (seq, text) it matched
+        self.search_active = False
+        self.search_query = ""
+        self.search_match = None
+        
+        # Input line editing; text arrives through TEXTINPUT events
+        self.max_input_length = 256
+        self.cursor_pos = 0
+        self.composition = ""
+        self.view_start = 0
+        
+        # Lines from a multi-line paste, submitted a few per frame by the game
+        self.queued_lines = deque()
+        
+        # Command grammar
+        self.parser = CommandParser()
+        
+        # TAB completion: matches are fixed on the first TAB, later TABs cycle
+        self.completion = CompletionEngine()
+        self.completion_matches = []
+        self.completion_index = -1
         
         # Color cycling
         self.color_cycle = ['GREEN', 'RED', 'BLUE', 'YELLOW', 'PURPLE', 'WHITE']
         self.current_color_index = 0
+        
+        # Called with no arguments for every key that edits the input line
+        self.on_keystroke = None
+        
+        # Returns the clipboard text to paste; replaced when recording or replaying
+        self.read_clipboard = self._clipboard_text
+    
+    def handle_events(self, events, game_state):
+        """Handle one frame's events, returning every (command, text) submitted"""
+        results = []
+        typed = []
+        for event in events:
+            # Bursts of TEXTINPUT are coalesced into a single insert
+            if event.type == pygame.TEXTINPUT:
+                typed.append(event.text)
+                continue
+            if typed:
+                self.insert_text(''.join(typed))
+                typed = []
+            
+            result = self.handle_event(event, game_state)
+            if result:
+                results.append(result)
+        
+        if typed:
+            self.insert_text(''.join(typed))
+        return results
     
     def handle_event(self, event, game_state):
         """Handle input events and return processed command"""
         if not self.input_active:
             return None
         
+        if event.type == pygame.TEXTINPUT:
+            self.insert_text(event.text)
+            return None
+        
+        if event.type == pygame.TEXTEDITING:
+            # IME composition in progress; shown at the cursor until committed
+            self.composition = event.text
+            return None
+        
         if event.type == pygame.KEYDOWN:
+            # Any key other than TAB ends a completion cycle
+            if event.key != pygame.K_TAB:
+                self.completion_matches = []
+            
+            if event.key == pygame.K_r and event.mod & pygame.KMOD_CTRL:
+                self._reverse_search_step()
+                return None
+            
+            if (event.key == pygame.K_v and event.mod & pygame.KMOD_CTRL) or \
+                    (event.key == pygame.K_INSERT and event.mod & pygame.KMOD_SHIFT):
+                self.paste(self.read_clipboard())
+                return None
+            
+            if self.search_active:
+                return self._handle_search_key(event)
+            
             # Handle special keys
             if event.key == pygame.K_RETURN:
                 return self._process_input()
             
             elif event.key == pygame.K_BACKSPACE:
-                if self.input_text:
-                    self.input_text = self.input_text[:-1]
+                if self.cursor_pos > 0:
+                    self.input_text = self.input_text[:self.cursor_pos - 1] + self.input_text[self.cursor_pos:]
+                    self.cursor_pos -= 1
+                    self._keystroke()
+            
+            elif event.key == pygame.K_DELETE:
+                if self.cursor_pos < len(self.input_text):
+                    self.input_text = self.input_text[:self.cursor_pos] + self.input_text[self.cursor_pos + 1:]
+                    self._keystroke()
             
-            elif event.key == pygame.K_SPACE:
-                # Toggle text color
-                if not self.input_text:  # Only if no text is being typed
-                    self.use_red = not self.use_red
-                    return None
-                else:
-                    self.input_text += " "
+            elif event.key == pygame.K_LEFT:
+                self.cursor_pos = max(0, self.cursor_pos - 1)
+            
+            elif event.key == pygame.K_RIGHT:
+                self.cursor_pos = min(len(self.input_text), self.cursor_pos + 1)
+            
+            elif event.key == pygame.K_HOME:
+                self.cursor_pos = 0
+            
+            elif event.key == pygame.K_END:
+                self.cursor_pos = len(self.input_text)
             
             elif event.key == pygame.K_TAB:
-                # Show inventory - we'll return a command instead
-                if not self.input_text:  # Only if no text is being typed
-                    return ('inventory', 'inventory')
-                return None
+                # Complete (or cycle) the current word
+                self._complete()
             
             elif event.key == pygame.K_UP:
                 # Navigate command history up
@@ -58,95 +143,190 @@ class InputHandler:
             
             elif event.key == pygame.K_ESCAPE:
                 # Clear current input
-                self.input_text = ""
+                self.set_text("")
                 self.history_index = -1
             
             elif event.key == pygame.K_F1:
                 # Cycle through colors
                 self._cycle_color()
-            
-            else:
-                # Handle regular character input
-                if len(self.input_text) < self.max_input_length:
-                    char = event.unicode
-                    if char.isprintable() and char != ' ':
-                        self.input_text += char
-                    elif event.key == pygame.K_SPACE:
-                        self.input_text += " "
-    
-    def _process_input(self):
-        """Process the current input and return command"""
-        if not self.input_text.strip():
-            return None
         
-        command_text = self.input_text.strip().lower()
-        original_text = self.input_text.strip()
+        return None
+    
+    def set_text(self, text):
+        """Replace the input line, leaving the cursor at the end"""
+        self.input_text = text[:self.max_input_length]
+        self.cursor_pos = len(self.input_text)
+    
+    def insert_text(self, text):
+        """Insert typed text at the cursor"""
+        if not self.input_active:
+            return
         
-        # Add to command history
-        if original_text and (not self.command_history or self.command_history[-1] != original_text):
-            self.command_history.append(original_text)
-            if len(self.command_history) > 20:  # Keep last 20 commands
-                self.command_history.pop(0)
+        self.composition = ""
+        text = ''.join(char for char in text if char.isprintable())
+        if not text:
+            return
         
-        # Reset input
-        self.input_text = ""
-        self.history_index = -1
+        if self.search_active:
+            self.search_query += text
+            self.search_match = self.command_history.search(self.search_query)
+            return
         
-        # Process special commands
-        if command_text in ['quit', 'exit', 'q']:
-            return ('exit', original_text)
+        # A lone space on an empty line toggles the text color instead
+        if text == " " and not self.input_text:
+            self.use_red = not self.use_red
+            return
         
-        elif command_text in ['help', 'h', '?']:
-            return ('help', original_text)
+        room = self.max_input_length - len(self.input_text)
+        text = text[:room]
+        if not text:
+            return
         
-        elif command_text in ['inventory', 'inv', 'i']:
-            return ('inventory', original_text)
+        self.completion_matches = []
+        self.input_text = self.input_text[:self.cursor_pos] + text + self.input_text[self.cursor_pos:]
+        self.cursor_pos += len(text)
+        self._keystroke()
+    
+    def paste(self, text):
+        """Insert pasted text; each complete line is queued as its own command"""
+        if not text or not self.input_active:
+            return
         
-        elif command_text in ['look', 'l', 'examine']:
-            return ('look', original_text)
+        lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+        if len(lines) == 1:
+            self.insert_text(lines[0])
+            return
         
-        elif command_text.startswith('password '):
-            return (command_text, original_text)
+        # The line being edited absorbs the first pasted line and is submitted with it
+        before, after = self.input_text[:self.cursor_pos], self.input_text[self.cursor_pos:]
+        lines[0] = before + lines[0]
+        lines[-1] = lines[-1] + after
+        self.queued_lines.extend(line for line in lines[:-1] if line.strip())
+        self.set_text(lines[-1])
+        self.cursor_pos = max(0, len(self.input_text) - len(after))
+        self.search_active = False
+    
+    def next_queued_command(self):
+        """Submit the next pasted line, returning (command, text) or None"""
+        while self.queued_lines and self.input_active:
+            result = self._submit(self.queued_lines.popleft())
+            if result:
+                return result
+        return None
+    
+    def has_queued_commands(self):
+        """Check whether pasted lines are waiting to run"""
+        return bool(self.queued_lines)
+    
+    def _clipboard_text(self):
+        """Read text from the system clipboard, or '' if unavailable"""
+        get_text = getattr(pygame.scrap, 'get_text', None)
+        try:
+            if get_text is not None:
+                return get_text()
+            if not pygame.scrap.get_init():
+                pygame.scrap.init()
+            data = pygame.scrap.get(pygame.SCRAP_TEXT)
+        except pygame.error:
+            return ""
+        if not data:
+            return ""
+        return data.decode('utf-8', errors='replace').rstrip('\x00')
+    
+    def _complete(self):
+        """Replace the input with the next completion for the current prefix"""
+        if not self.completion_matches:
+            self.completion_matches = self.completion.complete(self.input_text)
+            self.completion_index = -1
+            if not self.completion_matches:
+                return
         
-        elif command_text in ['start', 'start journey', 'begin']:
-            return ('start', original_text)
+        self.completion_index = (self.completion_index + 1) % len(self.completion_matches)
+        self.set_text(self.completion_matches[self.completion_index])
+    
+    def _keystroke(self):
+        """Notify the keystroke listener, if any"""
+        if self.on_keystroke:
+            self.on_keystroke()
+    
+    def _process_input(self):
+        """Process the current input and return command"""
+        text = self.input_text
         
-        elif command_text in ['use terminal', 'terminal', 'computer']:
-            return ('use terminal', original_text)
+        # Reset input
+        self.set_text("")
+        self.history_index = -1
         
-        elif command_text in ['open door', 'door', 'use door']:
-            return ('open door', original_text)
+        return self._submit(text)
+    
+    def _submit(self, text):
+        """Record a line in history and parse it into (command, text)"""
+        original_text = text.strip()
+        if not original_text:
+            return None
         
-        elif command_text in ['use keycard', 'keycard']:
-            return ('use keycard', original_text)
+        # Add to command history
+        self.command_history.add(original_text)
         
-        # Return the command as-is if no special processing needed
-        return (command_text, original_text)
+        return (self.parser.parse(original_text), original_text)
     
     def _navigate_history_up(self):
         """Navigate up in command history"""
-        if not self.command_history:
+        before = None if self.history_index == -1 else self.history_index
+        entry = self.command_history.previous(before)
+        if entry is None:
             return
         
-        if self.history_index == -1:
-            self.history_index = len(self.command_history) - 1
-        elif self.history_index > 0:
-            self.history_index -= 1
-        
-        if 0 <= self.history_index < len(self.command_history):
-            self.input_text = self.command_history[self.history_index]
+        self.history_index = entry[0]
+        self.set_text(entry[1])
     
     def _navigate_history_down(self):
         """Navigate down in command history"""
-        if not self.command_history or self.history_index == -1:
+        if self.history_index == -1:
             return
         
-        if self.history_index < len(self.command_history) - 1:
-            self.history_index += 1
-            self.input_text = self.command_history[self.history_index]
+        entry = self.command_history.next(self.history_index)
+        if entry is not None:
+            self.history_index = entry[0]
+            self.set_text(entry[1])
         else:
             self.history_index = -1
-            self.input_text = ""
+            self.set_text("")
+    
+    def _reverse_search_step(self):
+        """Start a Ctrl-R search, or jump to the next older match"""
+        if not self.search_active:
+            self.search_active = True
+            self.search_query = ""
+            self.search_match = None
+            return
+        
+        before = self.search_match[0] if self.search_match else None
+        match = self.command_history.search(self.search_query, before)
+        if match is not None:
+            self.search_match = match
+    
+    def _handle_search_key(self, event):
+        """Edit the reverse search query, or leave search mode"""
+        if event.key == pygame.K_ESCAPE:
+            self.search_active = False
+            return None
+        
+        if event.key in (pygame.K_RETURN, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_TAB):
+            # Accept the match; Enter also runs it
+            self.search_active = False
+            if self.search_match is not None:
+                self.set_text(self.search_match[1])
+            if event.key == pygame.K_RETURN:
+                return self._process_input()
+            return None
+        
+        if event.key != pygame.K_BACKSPACE:
+            return None
+        
+        self.search_query = self.search_query[:-1]
+        self.search_match = self.command_history.search(self.search_query)
+        return None
     
     def _cycle_color(self):
         """Cycle through available colors"""
@@ -158,12 +338,12 @@ class InputHandler:
             return 'RED'
         return self.color_cycle[self.current_color_index]
     
-    def update(self):
-        """Update input handler (called each frame)"""
+    def update(self, dt):
+        """Advance the cursor blink by dt seconds"""
         # Update cursor blink
-        self.cursor_timer += 1
+        self.cursor_timer += dt
         if self.cursor_timer >= self.cursor_blink_rate:
-            self.cursor_timer = 0
+            self.cursor_timer -= self.cursor_blink_rate
             self.cursor_visible = not self.cursor_visible
     
     def render(self, surface, crt_renderer, content_height):
@@ -171,15 +351,14 @@ class InputHandler:
         if not self.input_active:
             return
         
-        # Update cursor animation
-        self.update()
-        
         # Calculate input area position
-        input_y = content_height + 20
-        input_x = 20
+        input_y = content_height + crt_renderer.scaled(20)
+        input_x = crt_renderer.scaled(20)
         
         # Render input prompt
         prompt_text = "> "
+        if self.search_active:
+            prompt_text = f"(reverse-i-search)'{self.search_query}': "
         crt_renderer.render_text_with_effects(surface, prompt_text, (input_x, input_y), self.get_current_color())
         
         # Calculate text position after prompt - FIXED THIS LINE
@@ -187,40 +366,56 @@ class InputHandler:
         text_x = input_x + prompt_width
         
         # Render input text
-        display_text = self.input_text
-        if self.cursor_visible and self.input_active:
-            display_text += "_"
+        if self.search_active:
+            display_text = self.search_match[1] if self.search_match else ""
+            cursor = len(display_text)
+        else:
+            display_text = self.input_text[:self.cursor_pos] + self.composition + self.input_text[self.cursor_pos:]
+            cursor = self.cursor_pos + len(self.composition)
+        
+        # Scroll long lines horizontally so the cursor stays on screen
+        char_width = max(1, crt_renderer.font.size("M")[0])
+        columns = max(1, (surface.get_width() - text_x - input_x) // char_width - 1)
+        if cursor < self.view_start:
+            self.view_start = cursor
+        elif cursor > self.view_start + columns:
+            self.view_start = cursor - columns
+        self.view_start = max(0, min(self.view_start, max(0, len(display_text) - columns)))
+        visible_text = display_text[self.view_start:self.view_start + columns]
         
-        crt_renderer.render_text_with_effects(surface, display_text, (text_x, input_y), self.get_current_color())
+        crt_renderer.render_text_with_effects(surface, visible_text, (text_x, input_y), self.get_current_color())
+        
+        if self.cursor_visible:
+            cursor_x = text_x + crt_renderer.font.size(visible_text[:cursor - self.view_start])[0]
+            crt_renderer.render_text_with_effects(surface, "_", (cursor_x, input_y), self.get_current_color())
         
         # Render help text
-        help_y = input_y + 35
+        help_y = input_y + crt_renderer.scaled(35)
         help_texts = [
             "Commands: look, help, inventory/inv, start, exit",
-            "Special: SPACE=color, TAB=inventory, ↑↓=history, F1=cycle colors, ESC=clear"
+            "Special: SPACE=color, TAB=complete, ↑↓=history, ←→=move, Ctrl-R=search, Ctrl-V=paste, F1=colors, ESC=clear"
         ]
         
         for i, help_text in enumerate(help_texts):
-            crt_renderer.render_ui_text(surface, help_text, (input_x, help_y + i * 20), 'GRAY')
+            crt_renderer.render_ui_text(surface, help_text, (input_x, help_y + i * crt_renderer.scaled(20)), 'GRAY')
     
     def set_input_active(self, active):
         """Enable/disable input handling"""
         self.input_active = active
         if not active:
-            self.input_text = ""
+            self.set_text("")
+            self.composition = ""
+            self.queued_lines.clear()
     
     def clear_input(self):
         """Clear current input text"""
-        self.input_text = ""
+        self.set_text("")
         self.history_index = -1
     
     def get_command_history(self):
         """Get the command history list"""
-        return self.command_history.copy()
+        return self.command_history.entries()
     
     def add_command_to_history(self, command):
         """Manually add a command to history"""
-        if command and (not self.command_history or self.command_history[-1] != command):
-            self.command_history.append(command)
-            if len(self.command_history) > 20:
-                self.command_history.pop(0)
\ No newline at end of file
+        self.command_history.add(command)
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""Load generator for the text server.
+
+Usage: python load_client.py [--host HOST] [--port N] [--sessions N] [--concurrency N] [--commands N]
+
+Plays --sessions sessions against a running text_server.py, at most
+--concurrency of them connected at once. Each session waits for the welcome
+prompt, sends --commands commands taken in turn from a script of moves that
+never end the game, waits for the prompt after each one and hangs up. The
+report gives sessions and commands per second and the latency of both.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from text_server import DEFAULT_PORT, PROMPT
+
+PROMPT_BYTES = PROMPT.encode('utf-8')
+
+# Seconds to wait for a connection or a reply before counting the session as failed
+TIMEOUT = 10.0
+
+# Commands a session sends in turn: moves, lookups, typos, time travel and saves
+SCRIPT = [
+    'help', 'start', 'look', 'inventory', 'use terminal', 'password wrong', 'lok',
+    'undo', 'redo', 'save', 'open door', 'load', 'look around', 'help',
+]
+
+
+def percentile(values, fraction):
+    """The value a fraction of the sorted values are at or below"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class LoadClient:
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, commands=len(SCRIPT), script=SCRIPT):
+        self.host = host
+        self.port = port
+        self.commands = commands
+        self.script = script
+        
+        # Statistics: seconds from connecting to the first prompt, and per command
+        self.connect_times = []
+        self.command_times = []
+        self.failures = 0
+        self.elapsed = 0.0
+    
+    async def session(self):
+        """Play one session from connection to hang-up"""
+        start = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), TIMEOUT)
+        except (OSError, asyncio.TimeoutError):
+            self.failures += 1
+            return
+        try:
+            await asyncio.wait_for(reader.readuntil(PROMPT_BYTES), TIMEOUT)
+            self.connect_times.append(time.perf_counter() - start)
+            for index in range(self.commands):
+                sent = time.perf_counter()
+                writer.write(f"{self.script[index % len(self.script)]}\r\n".encode('utf-8'))
+                await asyncio.wait_for(reader.readuntil(PROMPT_BYTES), TIMEOUT)
+                self.command_times.append(time.perf_counter() - sent)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            self.failures += 1
+        finally:
+            writer.close()
+    
+    async def run(self, sessions, concurrency):
+        """Play sessions sessions, concurrency at a time; returns the elapsed seconds"""
+        remaining = iter(range(sessions))
+        
+        async def worker():
+            for _ in remaining:
+                await self.session()
+        
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, sessions))))
+        self.elapsed = time.perf_counter() - start
+        return self.elapsed
+    
+    def report(self, output=None):
+        """Write the throughput and latency figures"""
+        output = output or sys.stdout
+        sessions = len(self.connect_times)
+        commands = len(self.command_times)
+        elapsed = self.elapsed or 1e-9
+        output.write(f"{sessions} sessions, {commands} commands in {self.elapsed:.2f} s"
+                     f"{f' ({self.failures} failed)' if self.failures else ''}\n")
+        output.write(f"  {sessions / elapsed:.0f} sessions/sec, {commands / elapsed:.0f} commands/sec\n")
+        for label, values in (("connect to prompt", self.connect_times), ("command round trip", self.command_times)):
+            output.write(f"  {label}: median {percentile(values, 0.5) * 1000:.2f} ms, "
+                         f"p99 {percentile(values, 0.99) * 1000:.2f} ms\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1', help="server address (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"server port (default: {DEFAULT_PORT})")
+    parser.add_argument('--sessions', type=int, default=1000, help="sessions to play in total")
+    parser.add_argument('--concurrency', type=int, default=100, help="sessions connected at once")
+    parser.add_argument('--commands', type=int, default=len(SCRIPT), help="commands each session sends")
+    args = parser.parse_args(argv)
+    
+    client = LoadClient(args.host, args.port, args.commands)
+    asyncio.run(client.run(args.sessions, args.concurrency))
+    client.report()
+    return 1 if client.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
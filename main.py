@@ -1,5 +1,10 @@
+import argparse
 import pygame
+import os
+import random
 import sys
+import time
+import zlib
 from game_state import GameState
 from crt_effects import CRTRenderer
 from ascii_art import ASCIIManager
@@ -7,248 +12,627 @@ from sound_manager import SoundManager
 from input_handler import InputHandler
 from text_manager import TextManager
 from skull_3d import Skull3D
+from fuzzy import FuzzyIndex
+from command_parser import CommandParser
+from world import load_world, WorldError
+import save_game
+import font_registry
+from undo_history import UndoHistory
+from game_host import GameHost
+from replay import InputRecorder, InputReplayer, ReplayError
+from scheduler import Scheduler
+from post_process import PostProcessor
+from upscaler import Upscaler, UPSCALE_MODES
 
-class CRTTextAdventure:
-    def __init__(self):
+# Target seconds per tick spent running commands queued by a multi-line
+# paste. A target, not a bound: one slow command can overrun it on its own.
+PASTE_BUDGET = 0.004
+
+# Pasted commands run per tick when recording or replaying, where a
+# wall-clock budget would make the outcome depend on machine speed
+PASTE_COMMANDS_PER_TICK = 8
+
+# Longest stretch of wall time one frame may catch up on, so a stall (a
+# dragged window, a breakpoint) doesn't trigger a burst of logic ticks
+MAX_FRAME_TIME = 0.25
+
+# Seconds without input before the game drops to IDLE_FPS. The idle rate
+# matches MAX_FRAME_TIME so logic ticks still keep up with wall time.
+IDLE_AFTER = 30.0
+IDLE_FPS = 4
+
+# Resolution the screen layout is designed for; other render sizes scale it
+DESIGN_SIZE = (800, 600)
+
+class CRTTextAdventure(GameHost):
+    def __init__(self, headless=False, on_message=None, world_path=None, seed=None,
+                 record_path=None, replay_path=None, fast=False, render_fps=60, pipelined=False,
+                 render_size=None, window_size=None, upscale=None):
+        # Headless runs (scripted batches) need no window, audio or saved history
+        self.headless = headless
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
         pygame.init()
         
-        # Constants
-        self.WIDTH, self.HEIGHT = 800, 600
-        self.FPS = 30
+        # Constants: game logic runs at a fixed TICK_RATE whatever the
+        # render rate; render_fps caps drawing (0 for uncapped)
+        if render_size and render_size != DESIGN_SIZE and (record_path or replay_path):
+            # Messages wrap to the layout, and a replay's final state includes them
+            print(f"Warning: Recordings and replays render at {DESIGN_SIZE[0]}x{DESIGN_SIZE[1]}; "
+                  f"ignoring the render size")
+            render_size = DESIGN_SIZE
+        self.WIDTH, self.HEIGHT = render_size or DESIGN_SIZE
+        self.scale = min(self.WIDTH / DESIGN_SIZE[0], self.HEIGHT / DESIGN_SIZE[1])
+        self.TICK_RATE = 60
+        self.render_fps = render_fps
         
-        # Initialize pygame
-        self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
+        # Record/replay: a replay brings its own seed, a recording stores one
+        self.replayer = InputReplayer(replay_path) if replay_path else None
+        if self.replayer and self.replayer.tick_rate != self.TICK_RATE:
+            raise ReplayError(f"recording was made at {self.replayer.tick_rate} ticks/sec, "
+                              f"the game runs at {self.TICK_RATE}")
+        if self.replayer:
+            seed = self.replayer.seed
+        elif record_path and seed is None:
+            seed = random.getrandbits(63)
+        self.seed = seed
+        self.deterministic = bool(record_path or replay_path)
+        self.fast = fast
+        self.tick = 0
+        self.frames = 0
+        self.accumulator = 0.0
+        
+        # Idle throttling: wall time of the last input, and any event that woke an idle wait
+        self.idle_after = IDLE_AFTER
+        self.last_input = time.perf_counter()
+        self.woken_events = []
+        
+        # Initialize pygame. By default the game draws straight into an
+        # 800x600 window; given a render size, window size or upscale mode it
+        # draws into a fixed-size target scaled to fit a resizable window
+        self.upscaler = None
+        if upscale == 'sdl':
+            self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT), pygame.SCALED | pygame.RESIZABLE)
+        elif render_size or window_size or upscale:
+            if window_size is None:
+                factor = max(1, -(-DESIGN_SIZE[0] // self.WIDTH))
+                window_size = (self.WIDTH * factor, self.HEIGHT * factor)
+            pygame.display.set_mode(window_size, pygame.RESIZABLE)
+            self.screen = pygame.Surface((self.WIDTH, self.HEIGHT)).convert()
+            self.upscaler = Upscaler((self.WIDTH, self.HEIGHT), upscale or 'integer')
+        else:
+            self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
         pygame.display.set_caption("CRT Text Adventure - Enhanced Edition")
+        pygame.key.start_text_input()
         self.clock = pygame.time.Clock()
         
         # Initialize game components
+        self.world = load_world(world_path)
         self.game_state = GameState()
-        self.crt_renderer = CRTRenderer(self.WIDTH, self.HEIGHT)
+        self.game_state.current_state = self.world.start
+        self.game_state.subscribe(self._on_state_change)
+        self.crt_renderer = CRTRenderer(self.WIDTH, self.HEIGHT, seed=seed, scale=self.scale)
+        # Pipelined: final effects run on a worker while the next frame is drawn
+        self.post_processor = PostProcessor(self.crt_renderer, self.screen, self.present) if pipelined else None
         self.ascii_manager = ASCIIManager()
-        self.sound_manager = SoundManager()
-        self.input_handler = InputHandler()
-        self.text_manager = TextManager(self.WIDTH, self.HEIGHT)
-        self.skull_3d = Skull3D()
+        self.sound_manager = SoundManager(library={} if headless else None, seed=seed, defer_library=True)
+        self.input_handler = InputHandler(persist_history=not (headless or self.deterministic))
+        self.input_handler.parser = CommandParser(self.world.grammar)
+        self.text_manager = TextManager(self.WIDTH, self.HEIGHT, self.scale)
+        self.text_manager.on_message = on_message
+        self._skull_3d = None
+        self.input_handler.on_keystroke = self.sound_manager.play_keystroke
         
         # Game state
         self.running = True
-        self.game_ending_countdown = -1
+        
+        # Timers on the logic clock; ending is the pending close of the game, if any
+        self.scheduler = Scheduler()
+        self.ending = None
+        
+        # Set by state change events; each consumer clears its own flag
+        self.completion_dirty = True
+        self.save_dirty = False
+        self.ui_dirty = True
+        self.ui_surfaces = None
+        
+        # Saving: commands that work in every room, plus a background autosave
+        self.system_commands = {
+            'save': lambda host, command: self.save_game(command.args or 'save'),
+            'load': lambda host, command: self.load_game(command.args or 'save'),
+            'undo': lambda host, command: self.undo_move(),
+            'redo': lambda host, command: self.redo_move(),
+        }
+        self.undo_history = UndoHistory()
+        self.autosaver = None if headless or self.replayer else save_game.Autosaver(save_game.slot_path('autosave'))
+        
+        self.recorder = InputRecorder(record_path, seed, self.TICK_RATE) if record_path else None
+        if self.recorder:
+            self.input_handler.read_clipboard = self._read_recorded_clipboard
+        elif self.replayer:
+            self.input_handler.read_clipboard = self.replayer.read_clipboard
         
         # Initialize game
+        self._build_typo_index()
+        self._refresh_completion()
         self._initialize_game()
+        self.undo_history.reset(self.game_state, sprite=self.sprite_key)
+    
+    @property
+    def skull_3d(self):
+        """The main menu's spinning skull, built the first time it is drawn"""
+        if self._skull_3d is None:
+            self._skull_3d = Skull3D(self.scale)
+        return self._skull_3d
     
     def _initialize_game(self):
         """Initialize the game with welcome messages"""
-        self.text_manager.add_game_message("WELCOME TO THE RETRO ADVENTURE", "YELLOW")
-        self.text_manager.add_game_message("*******************************", "YELLOW")
-        self.text_manager.add_game_message("You stand before the pixelated gate of destiny.", "GREEN")
-        self.text_manager.add_game_message("Type 'start' or 'start journey' to begin.", "GREEN")
-        self.text_manager.add_game_message("Type 'exit' to quit.", "GREEN")
+        self._welcome()
         self.text_manager.add_game_message("Press SPACE to toggle text color.", "BLUE")
-        self.text_manager.add_game_message("Press TAB for inventory.", "PURPLE")
+        self.text_manager.add_game_message("Press TAB to complete commands.", "PURPLE")
+        self.sound_manager.start_ambient(self.game_state.current_state)
     
     def handle_events(self):
         """Handle all pygame events"""
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
-                return
-            
-            # Handle input events
-            result = self.input_handler.handle_event(event, self.game_state)
+        events = self.woken_events + pygame.event.get()
+        self.woken_events = []
+        if events:
+            self.last_input = time.perf_counter()
+        if self.replayer:
+            # Live input is ignored, apart from closing the window
+            live_quit = [event for event in events if event.type == pygame.QUIT]
+            events = self.replayer.events_for(self.tick) + live_quit
+        elif self.recorder:
+            self.recorder.record_events(self.tick, events)
+        
+        if any(event.type == pygame.QUIT for event in events):
+            self.running = False
+            return
+        
+        # Handle input events
+        for command, input_text in self.input_handler.handle_events(events, self.game_state):
+            self._submit_command(command, input_text)
+        
+        # Run pasted commands a few at a time, stopping before one that would
+        # likely take the tick past PASTE_BUDGET; at least one runs per tick
+        start = time.perf_counter()
+        slowest = 0.0
+        count = 0
+        while self.running and self.input_handler.has_queued_commands():
+            if self.deterministic:
+                if count >= PASTE_COMMANDS_PER_TICK:
+                    break
+            elif count and time.perf_counter() - start + slowest > PASTE_BUDGET:
+                break
+            before = time.perf_counter()
+            result = self.input_handler.next_queued_command()
             if result:
-                command, input_text = result
-                
-                if command == 'exit':
-                    self.text_manager.add_game_message("Closing...", "RED")
-                    self.game_ending_countdown = self.FPS * 2
-                    self.input_handler.input_active = False
-                    self.sound_manager.play_sound('shutdown')
-                else:
-                    self._process_command(command, input_text)
-    
-    def _process_command(self, command, input_text):
-        """Process game commands"""
-        # Add player input to display
+                self._submit_command(*result)
+            slowest = max(slowest, time.perf_counter() - before)
+            count += 1
+    
+    def _read_recorded_clipboard(self):
+        """Read the clipboard and keep what was pasted in the recording"""
+        text = self.input_handler._clipboard_text()
+        self.recorder.record_clipboard(self.tick, text)
+        return text
+    
+    def _build_typo_index(self):
+        """Index every known verb and phrase for typo correction"""
+        phrases = set(self.input_handler.parser.vocabulary()) | self.world.command_phrases()
+        self.typo_index = FuzzyIndex(phrases)
+    
+    def _on_state_change(self, change):
+        """Mark whatever depends on the changed field as out of date"""
+        if change.field in ('current_state', 'inventory'):
+            self.completion_dirty = True
+        if change.field in ('health', 'inventory'):
+            self.ui_dirty = True
+        self.save_dirty = True
+    
+    def _refresh_completion(self):
+        """Point TAB completion at the current state's verbs, objects and inventory"""
+        if not self.completion_dirty:
+            return
+        self.completion_dirty = False
+        
+        room = self.world.room(self.game_state.current_state)
+        verbs = room.verbs if room else set()
+        objects = room.objects if room else set()
+        self.input_handler.completion.set_context(verbs, objects | set(self.game_state.inventory))
+    
+    @property
+    def parser(self):
+        """The world's command parser, which the input handler owns"""
+        return self.input_handler.parser
+    
+    @property
+    def sprite_key(self):
+        """Name of the sprite on show"""
+        return self.ascii_manager.current_sprite_key
+    
+    def _echo_input(self, input_text):
+        """Add player input to display"""
         self.text_manager.add_player_input(input_text, self.input_handler.use_red)
+    
+    def _follow_state(self):
+        """Let the ambience, TAB completion and autosave catch up with the game state"""
+        self.sound_manager.set_ambient_room(self.game_state.current_state)
+        self._refresh_completion()
+        self._autosave()
+    
+    def snapshot(self):
+        """Immutable copy of everything a save file holds"""
+        return save_game.capture(
+            self.game_state,
+            world=self.world.title,
+            sprite=self.sprite_key,
+            messages=self.text_manager.messages,
+            scroll_offset=self.text_manager.scroll_offset,
+            history=self.input_handler.command_history.entries(),
+            use_red=self.input_handler.use_red,
+        )
+    
+    def restore(self, snapshot):
+        """Put the game back into a saved state"""
+        if snapshot.current_state not in self.world:
+            self.text_manager.add_system_message(f"That save is for another world ({snapshot.world}).")
+            return False
+        
+        save_game.apply_state(snapshot, self.game_state)
+        self.ascii_manager.change_sprite(snapshot.sprite)
+        self.text_manager.clear_messages()
+        now = pygame.time.get_ticks()
+        self.text_manager.messages.extend({'text': text, 'color': color, 'type': message_type, 'timestamp': now}
+                                          for text, color, message_type in snapshot.messages)
+        self.text_manager.scroll_offset = snapshot.scroll_offset
+        self.input_handler.command_history.replace(list(snapshot.history))
+        self.input_handler.use_red = snapshot.use_red
+        self.input_handler.set_input_active(True)
+        self.scheduler.cancel_all()
+        self.ending = None
+        self.undo_history.reset(self.game_state, sprite=snapshot.sprite)
+        self.sound_manager.set_ambient_room(self.game_state.current_state)
+        self._refresh_completion()
+        return True
+    
+    def run_io(self, work, done):
+        """Run the blocking work() and hand its result to done(result)
+        
+        This runs them back to back; the asyncio loop replaces it to run work
+        on a thread and call done on the main loop once it has finished.
+        """
+        done(work())
+    
+    def save_game(self, slot):
+        """Write the current state to a save slot"""
+        snapshot = self.snapshot()
+        
+        def write():
+            try:
+                save_game.write_save(save_game.slot_path(slot), snapshot)
+            except (OSError, save_game.SaveError) as e:
+                return f"Could not save: {e}"
+            return f"Game saved to slot '{slot}'."
+        self.run_io(write, self.text_manager.add_system_message)
+    
+    def load_game(self, slot):
+        """Restore the state stored in a save slot; returns whether it was loaded
+        
+        Unlike saving this doesn't go through run_io: a save is one small
+        file, and commands typed while it loaded would be overwritten by it.
+        """
+        try:
+            snapshot = save_game.read_save(save_game.slot_path(slot))
+        except save_game.SaveError as e:
+            self.text_manager.add_system_message(f"Could not load '{slot}': {e}")
+            return False
+        if self.restore(snapshot):
+            self.text_manager.add_system_message(f"Game loaded from slot '{slot}'.")
+            return True
+        return False
+    
+    def _cancel_timers(self):
+        """Cancel every pending timer on the logic clock"""
+        self.scheduler.cancel_all()
+    
+    def stop(self):
+        """Leave the main loop after the current frame"""
+        self.ending = None
+        self.running = False
+    
+    def _autosave(self):
+        """Hand a snapshot to the autosave thread when the state changed during play"""
+        if self.autosaver and self.save_dirty and self.input_handler.input_active and self.ending is None:
+            self.save_dirty = False
+            self.autosaver.submit(self.snapshot())
+    
+    # Host interface used by the world's effects
+    
+    def add_game_message(self, text, color='GREEN'):
+        """Print a game message"""
+        self.text_manager.add_game_message(text, color)
+    
+    def add_system_message(self, text):
+        """Print a system message"""
+        self.text_manager.add_system_message(text)
+    
+    def clear_messages(self):
+        """Clear the message log"""
+        self.text_manager.clear_messages()
+    
+    def set_sprite(self, name):
+        """Show a different ASCII sprite"""
+        self.ascii_manager.change_sprite(name)
+    
+    def play_sound(self, name):
+        """Play a sound effect"""
+        self.sound_manager.play_sound(name)
+    
+    def call_later(self, seconds, callback):
+        """Run callback() after seconds of game time"""
+        return self.scheduler.call_later(seconds, callback)
+    
+    def set_input_active(self, active):
+        """Enable or disable player input"""
+        self.input_handler.set_input_active(active)
+    
+    def update(self, dt):
+        """Advance game logic and animation by one tick of dt seconds"""
+        self.ascii_manager.update(dt)
+        self.sound_manager.update()
+        self.crt_renderer.update(dt)
+        if self._skull_3d is not None:
+            self._skull_3d.update(dt)
+        self.input_handler.update(dt)
+        
+        # Delayed effects and the game's ending
+        if self.scheduler.advance(dt):
+            self.after_timers()
+    
+    def render(self, alpha=1.0):
+        """Render everything to screen, alpha of the way between the last two ticks"""
+        screen = self.post_processor.back_buffer() if self.post_processor else self.screen
         
-        # Get current state
-        current_state = self.game_state.current_state
-        
-        # Process command based on current state
-        if current_state == "main_menu":
-            self._handle_main_menu_commands(command)
-        elif current_state == "start":
-            self._handle_start_commands(command)
-        elif current_state == "terminal_prompt":
-            self._handle_terminal_commands(command)
-        elif current_state == "door_unlocked_state":
-            self._handle_door_unlocked_commands(command)
-        elif current_state == "end_game":
-            pass  # No commands in end game
-        
-        # Play appropriate sound
-        if command in ['look', 'use terminal', 'terminal']:
-            self.sound_manager.play_sound('beep')
-        elif command.startswith('password'):
-            self.sound_manager.play_sound('type')
-    
-    def _handle_main_menu_commands(self, command):
-        """Handle main menu commands"""
-        if command in ['start', 'start journey']:
-            self.text_manager.clear_messages()
-            self.text_manager.add_game_message("The air is thick with static...", "GREEN")
-            self.text_manager.add_game_message("A faint hum emanates from the archaic console before you.", "GREEN")
-            self.text_manager.add_game_message("Type 'look' to observe your surroundings, or 'help' for assistance.", "GREEN")
-            self.game_state.change_state("start")
-            self.ascii_manager.change_sprite("door_closed")
-            self.sound_manager.play_sound('startup')
-        elif command == 'help':
-            self.text_manager.add_game_message("Available commands: start, help, exit", "YELLOW")
-        elif command == 'inventory' or command == 'inv':
-            self.game_state.show_inventory(self.text_manager)
-        else:
-            self.text_manager.add_game_message(f"Command '{command}' not recognized.", "RED")
-    
-    def _handle_start_commands(self, command):
-        """Handle start state commands"""
-        if command == 'look':
-            self.text_manager.add_game_message("You are in a dimly lit room. A rusty metal door is to your left.", "BLUE")
-            self.text_manager.add_game_message("In front of you, a blinking TERMINAL sits on a dusty desk.", "BLUE")
-        elif command in ['use terminal', 'terminal']:
-            self.text_manager.add_game_message("The terminal screen flickers to life, asking for a PASSWORD.", "PURPLE")
-            self.game_state.change_state("terminal_prompt")
-            self.ascii_manager.change_sprite("monitor")
-        elif command in ['open door', 'door']:
-            self.text_manager.add_game_message("The door is bolted shut. It needs a key or a code.", "RED")
-        elif command == 'help':
-            self.text_manager.add_game_message("Try 'look' or 'use terminal'.", "YELLOW")
-        elif command == 'inventory' or command == 'inv':
-            self.game_state.show_inventory(self.text_manager)
-        else:
-            self.text_manager.add_game_message(f"Command '{command}' not recognized.", "RED")
-    
-    def _handle_terminal_commands(self, command):
-        """Handle terminal state commands"""
-        if command.startswith('password '):
-            entered_password = command.split(' ', 1)[1]
-            if entered_password == 'retr0':
-                self.text_manager.add_game_message("Access granted. A soft click echoes from the door.", "BLUE")
-                self.text_manager.add_game_message("You found a KEYCARD!", "YELLOW")
-                self.game_state.terminal_solved = True
-                self.game_state.door_unlocked = True
-                self.game_state.add_to_inventory("keycard")
-                self.game_state.change_state("door_unlocked_state")
-                self.ascii_manager.change_sprite("door_open")
-                self.sound_manager.play_sound('success')
-            else:
-                self.text_manager.add_game_message("Incorrect password. The terminal hums ominously.", "RED")
-                self.game_state.health -= 5
-                if self.game_state.health <= 0:
-                    self.text_manager.add_game_message("The terminal overloads! Game Over.", "RED")
-                    self.game_ending_countdown = self.FPS * 2
-                else:
-                    self.text_manager.add_game_message(f"Health: {self.game_state.health}/100", "YELLOW")
-        elif command == 'look':
-            self.text_manager.add_game_message("The terminal screen demands a password.", "BLUE")
-        elif command == 'help':
-            self.text_manager.add_game_message("Enter: 'password <your_guess>'", "YELLOW")
-        elif command == 'inventory' or command == 'inv':
-            self.game_state.show_inventory(self.text_manager)
-        else:
-            self.text_manager.add_game_message(f"Focus on the terminal. '{command}' won't help here.", "RED")
-    
-    def _handle_door_unlocked_commands(self, command):
-        """Handle door unlocked state commands"""
-        if command in ['open door', 'door', 'use keycard']:
-            if 'keycard' in self.game_state.inventory:
-                self.text_manager.add_game_message("The door creaks open, revealing blinding light...", "YELLOW")
-                self.text_manager.add_game_message("You step through to victory!", "GREEN")
-                self.game_state.change_state("end_game")
-                self.ascii_manager.change_sprite("end_game_sprite")
-                self.game_ending_countdown = self.FPS * 3
-                self.input_handler.input_active = False
-                self.sound_manager.play_sound('victory')
-            else:
-                self.text_manager.add_game_message("You need something to unlock the door.", "RED")
-        elif command == 'look':
-            self.text_manager.add_game_message("The door is now unlocked. Freedom awaits!", "BLUE")
-        elif command == 'help':
-            self.text_manager.add_game_message("Perhaps it's time to leave?", "YELLOW")
-        elif command == 'inventory' or command == 'inv':
-            self.game_state.show_inventory(self.text_manager)
-        else:
-            self.text_manager.add_game_message(f"You're almost free. What about '{command}'?", "PURPLE")
-    
-    def update(self):
-        """Update game logic"""
-        self.ascii_manager.update()
-        self.crt_renderer.update()
-        self.skull_3d.update()
-        
-        # Handle game ending countdown
-        if self.game_ending_countdown > 0:
-            self.game_ending_countdown -= 1
-            if self.game_ending_countdown == 0:
-                if self.game_state.current_state == "end_game":
-                    self.text_manager.add_game_message("Thanks for playing the Enhanced CRT Adventure!", "YELLOW")
-                    pygame.time.wait(2000)
-                self.running = False
-    
-    def render(self):
-        """Render everything to screen"""
         # Clear screen
-        self.screen.fill((0, 0, 0))
+        screen.fill((0, 0, 0))
         
         # Apply CRT base effects
-        self.crt_renderer.apply_base_effects(self.screen)
+        self.crt_renderer.apply_base_effects(screen, alpha)
         
         # Render text
-        self.text_manager.render(self.screen, self.crt_renderer)
+        self.text_manager.render(screen, self.crt_renderer)
         
         # Render ASCII art
         current_sprite = self.ascii_manager.get_current_sprite()
-        self.crt_renderer.render_ascii_sprite(self.screen, current_sprite, self.input_handler.get_current_color())
+        self.crt_renderer.render_ascii_sprite(screen, current_sprite, self.input_handler.get_current_color())
         
         # Render 3D skull on main menu
         if self.game_state.current_state == "main_menu":
-            self.skull_3d.render(self.screen, self.WIDTH - 150, self.HEIGHT - 120)
+            scaled = self.crt_renderer.scaled
+            self.skull_3d.render(screen, self.WIDTH - scaled(150), self.HEIGHT - scaled(120), alpha)
         
         # Render input area
-        self.input_handler.render(self.screen, self.crt_renderer, self.text_manager.get_content_height())
+        self.input_handler.render(screen, self.crt_renderer, self.text_manager.get_content_height())
         
         # Render UI elements
-        self._render_ui()
+        self._render_ui(screen)
+        
+        if self.post_processor:
+            # Final effects and the display update happen in the pipeline
+            self.post_processor.present()
+            return
         
         # Apply final CRT effects
-        self.crt_renderer.apply_final_effects(self.screen)
+        self.crt_renderer.apply_final_effects(screen)
         
         # Update display
+        self.present(screen)
+    
+    def present(self, frame):
+        """Put a finished frame on the display, scaling it to the window if need be"""
+        if self.upscaler:
+            self.upscaler.present(frame)
+            return
+        if frame is not self.screen:
+            self.screen.blit(frame, (0, 0))
         pygame.display.flip()
     
-    def _render_ui(self):
+    def _render_ui(self, screen):
         """Render UI elements like health, inventory count, etc."""
         if self.game_state.current_state != "main_menu":
-            # Health bar
-            health_text = f"Health: {self.game_state.health}/100"
-            self.crt_renderer.render_ui_text(self.screen, health_text, (10, 10), "GREEN")
+            # Text is only re-rendered when health or inventory changed
+            if self.ui_dirty or self.ui_surfaces is None:
+                self.ui_dirty = False
+                
+                # Health bar
+                health_text = f"Health: {self.game_state.health}/100"
+                
+                # Inventory count
+                inv_count = len(self.game_state.inventory)
+                inv_text = f"Items: {inv_count}"
+                
+                scaled = self.crt_renderer.scaled
+                self.ui_surfaces = [
+                    (self.crt_renderer.render_ui_surface(health_text, "GREEN"), (scaled(10), scaled(10))),
+                    (self.crt_renderer.render_ui_surface(inv_text, "BLUE"), (scaled(10), scaled(35))),
+                ]
             
-            # Inventory count
-            inv_count = len(self.game_state.inventory)
-            inv_text = f"Items: {inv_count}"
-            self.crt_renderer.render_ui_text(self.screen, inv_text, (10, 35), "BLUE")
+            for surface, pos in self.ui_surfaces:
+                screen.blit(surface, pos)
+    
+    def step(self, dt):
+        """One fixed logic tick: input, then game logic"""
+        if self.replayer and self.replayer.finished(self.tick):
+            self.running = False
+            return
+        self.handle_events()
+        self.update(dt)
+        self.tick += 1
+    
+    def run_frame(self, elapsed):
+        """Run the logic ticks that elapsed seconds of wall time allow, then render"""
+        dt = 1.0 / self.TICK_RATE
+        if self.fast:
+            # Fast replays run one tick per frame, unpaced
+            self.accumulator = dt
+        else:
+            self.accumulator += min(elapsed, MAX_FRAME_TIME)
+        
+        while self.accumulator >= dt and self.running:
+            self.step(dt)
+            self.accumulator -= dt
+        
+        # Draw between the last two ticks by the fraction of a tick left over
+        self.render(self.accumulator / dt)
+        self.frames += 1
+        if self.frames == 1:
+            # The sound library is opened and synthesized once the first frame is up
+            self.sound_manager.load_library()
+    
+    def idle_timeout(self):
+        """Seconds the loop may sleep waiting for input, or None while the game is active
+        
+        The game is idle once nothing has happened for idle_after seconds and
+        no pasted commands or ending are pending; the wait is cut short for
+        the next timer that falls due.
+        """
+        if self.deterministic or self.fast or self.ending is not None:
+            return None
+        if time.perf_counter() - self.last_input < self.idle_after or self.input_handler.has_queued_commands():
+            return None
+        timeout = 1.0 / IDLE_FPS
+        deadline = self.scheduler.next_deadline()
+        if deadline is not None:
+            # Game time to wall time: the accumulator already holds part of a tick
+            timeout = min(timeout, max(0.0, deadline - self.scheduler.now - self.accumulator))
+        return timeout
+    
+    def wait_for_input(self, timeout):
+        """Block until an event arrives or timeout seconds pass"""
+        event = pygame.event.wait(int(timeout * 1000))
+        if event.type != pygame.NOEVENT:
+            # Handled with the rest of the queue on the next tick
+            self.woken_events.append(event)
+            self.last_input = time.perf_counter()
     
     def run(self):
-        """Main game loop"""
+        """Main game loop: fixed-rate logic ticks, rendering as often as render_fps allows"""
+        start = previous = time.perf_counter()
         while self.running:
-            self.handle_events()
-            self.update()
-            self.render()
-            self.clock.tick(self.FPS)
+            now = time.perf_counter()
+            self.run_frame(now - previous)
+            previous = now
+            timeout = self.idle_timeout() if self.running else None
+            if timeout is None:
+                self.clock.tick(0 if self.fast else self.render_fps)
+            else:
+                self.wait_for_input(timeout)
         
-        pygame.quit()
+        self.finish(time.perf_counter() - start)
         sys.exit()
+    
+    def finish(self, elapsed):
+        """Report on a finished run and shut down"""
+        if self.replayer:
+            print(f"Replayed {self.tick} ticks ({self.replayer.events} events) in {elapsed:.2f} s "
+                  f"({self.tick / elapsed if elapsed > 0 else 0:.1f} ticks/sec, "
+                  f"{self.frames / elapsed if elapsed > 0 else 0:.1f} FPS)")
+        self.shutdown()
+    
+    def state_digest(self):
+        """CRC32 of everything a save holds, for checking a replay against its recording"""
+        return zlib.crc32(save_game.encode(self.snapshot()))
+    
+    def shutdown(self):
+        """Stop background workers and close pygame"""
+        if self.recorder:
+            self.recorder.close(self.tick, self.state_digest())
+            print(f"Recorded {self.recorder.events} events over {self.tick} ticks to {self.recorder.path} "
+                  f"(seed {self.seed})")
+        elif self.replayer and not self.replayer.finished(self.tick):
+            print(f"Warning: Replay stopped at tick {self.tick} of {self.replayer.end_tick}")
+        elif self.replayer and self.state_digest() != self.replayer.digest:
+            print("Warning: Replay diverged: the final state differs from the recording")
+        elif self.replayer:
+            print("Replay matched the recording's final state")
+        if self.post_processor:
+            self.post_processor.close()
+        self.sound_manager.cleanup()
+        if self.autosaver:
+            self.autosaver.close()
+        self.input_handler.command_history.close()
+        font_registry.release_fonts()
+        pygame.quit()
+
+def parse_size(text):
+    """WIDTHxHEIGHT as a (width, height) tuple, for argparse"""
+    try:
+        width, height = (int(part) for part in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    if width < 80 or height < 60:
+        raise argparse.ArgumentTypeError(f"{text} is too small")
+    return width, height
+
+def parse_args(argv=None):
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="CRT Text Adventure")
+    parser.add_argument('--script', metavar='FILE',
+                        help="run commands from FILE ('-' for stdin) headless, then exit")
+    parser.add_argument('--output', metavar='FILE',
+                        help="write scripted output to FILE instead of stdout")
+    parser.add_argument('--trace', action='store_true',
+                        help="with --script, also write every game state change")
+    parser.add_argument('--continue', dest='resume', action='store_true',
+                        help="resume from the last autosave")
+    parser.add_argument('--world', metavar='FILE',
+                        help="world file to play (JSON, or TOML on Python 3.11+)")
+    parser.add_argument('--seed', type=int,
+                        help="seed the visual and sound effect randomness")
+    parser.add_argument('--record', metavar='FILE',
+                        help="record input events to FILE for replay")
+    parser.add_argument('--replay', metavar='FILE',
+                        help="replay a recording tick by tick instead of reading input")
+    parser.add_argument('--fast', action='store_true',
+                        help="with --replay, run as fast as possible instead of in real time")
+    parser.add_argument('--fps', type=int, default=60,
+                        help="render frame rate cap, independent of the game's logic rate (0 for uncapped)")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="apply the CRT effects on a worker thread while the next frame is drawn")
+    parser.add_argument('--render-size', type=parse_size, metavar='WxH',
+                        help="draw at this internal resolution, e.g. 400x300, and scale it to the window")
+    parser.add_argument('--window', type=parse_size, metavar='WxH',
+                        help="initial size of the (resizable) window")
+    parser.add_argument('--upscale', choices=UPSCALE_MODES,
+                        help="how the render target is scaled to the window (default: integer)")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="run the game loop on asyncio, with save and load I/O off the main thread")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    game = CRTTextAdventure()
+    args = parse_args()
+    if args.script:
+        from batch_runner import run_script_file
+        sys.exit(run_script_file(args.script, args.output, args.world, args.trace))
+    if args.record and args.replay:
+        sys.exit("Error: --record and --replay can't be used together")
+    if args.seed is not None and args.seed < 0:
+        sys.exit("Error: --seed must not be negative")
+    try:
+        game = CRTTextAdventure(world_path=args.world, seed=args.seed, record_path=args.record,
+                                replay_path=args.replay, fast=args.fast, render_fps=args.fps,
+                                pipelined=args.pipeline, render_size=args.render_size,
+                                window_size=args.window, upscale=args.upscale)
+    except WorldError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+    except (ReplayError, OSError) as e:
+        sys.exit(f"Error: {e}")
+    if args.resume and not (args.record or args.replay):
+        game.load_game('autosave')
+    if args.use_async:
+        from async_loop import AsyncGameLoop
+        sys.exit(AsyncGameLoop(game).run())
     game.run()
\ No newline at end of file
@@ -0,0 +1,264 @@
+"""Immutable hash map with structural sharing (a hash array mapped trie).
+
+PMap.set and PMap.delete return a new map and leave the original untouched.
+Only the nodes on the path to the changed key are copied, which is at most
+seven small nodes for 32-bit hashes. Everything else is shared between the
+old and new maps, so keeping many versions of a large map costs memory in
+proportion to how much changed between them, not to their size.
+
+Every node allocation is added to ALLOCATED, so callers can estimate how
+much memory a series of updates created.
+"""
+import sys
+
+BITS = 5
+WIDTH = 1 << BITS
+MASK = WIDTH - 1
+HASH_MASK = 0xFFFFFFFF
+MAX_SHIFT = 30
+
+# Running totals of nodes allocated by every PMap, for memory accounting
+ALLOCATED = {'nodes': 0, 'bytes': 0}
+
+
+def _popcount(value):
+    return bin(value).count('1')
+
+
+class _Node:
+    """Bitmap-indexed branch; entries are (hash, key, value) leaves or child nodes"""
+    __slots__ = ('bitmap', 'entries')
+    
+    def __init__(self, bitmap, entries):
+        self.bitmap = bitmap
+        self.entries = entries
+        ALLOCATED['nodes'] += 1
+        ALLOCATED['bytes'] += sys.getsizeof(self) + sys.getsizeof(entries)
+
+
+class _Collision:
+    """Keys whose full hashes are equal"""
+    __slots__ = ('hash', 'pairs')
+    
+    def __init__(self, key_hash, pairs):
+        self.hash = key_hash
+        self.pairs = pairs
+        ALLOCATED['nodes'] += 1
+        ALLOCATED['bytes'] += sys.getsizeof(self) + sys.getsizeof(pairs)
+
+
+_MISSING = object()
+
+
+def _hash(key):
+    return hash(key) & HASH_MASK
+
+
+def _lookup(node, shift, key_hash, key):
+    while True:
+        if isinstance(node, _Collision):
+            for pair_key, value in node.pairs:
+                if pair_key == key:
+                    return value
+            return _MISSING
+        bit = 1 << ((key_hash >> shift) & MASK)
+        if not node.bitmap & bit:
+            return _MISSING
+        entry = node.entries[_popcount(node.bitmap & (bit - 1))]
+        if isinstance(entry, tuple):
+            return entry[2] if entry[0] == key_hash and entry[1] == key else _MISSING
+        node = entry
+        shift += BITS
+
+
+def _merge(leaf, other, shift):
+    """Smallest subtree holding two leaves with different keys"""
+    if leaf[0] == other[0] or shift > MAX_SHIFT:
+        return _Collision(leaf[0], ((leaf[1], leaf[2]), (other[1], other[2])))
+    index, other_index = (leaf[0] >> shift) & MASK, (other[0] >> shift) & MASK
+    if index == other_index:
+        return _Node(1 << index, (_merge(leaf, other, shift + BITS),))
+    entries = (leaf, other) if index < other_index else (other, leaf)
+    return _Node((1 << index) | (1 << other_index), entries)
+
+
+def _assoc(node, shift, key_hash, key, value):
+    """Return (new node, whether a key was added); the node itself if nothing changed"""
+    if isinstance(node, _Collision):
+        pairs = node.pairs
+        for position, (pair_key, pair_value) in enumerate(pairs):
+            if pair_key == key:
+                if pair_value is value:
+                    return node, False
+                return _Collision(node.hash, pairs[:position] + ((key, value),) + pairs[position + 1:]), False
+        return _Collision(node.hash, pairs + ((key, value),)), True
+    
+    bit = 1 << ((key_hash >> shift) & MASK)
+    position = _popcount(node.bitmap & (bit - 1))
+    entries = node.entries
+    if not node.bitmap & bit:
+        leaf = (key_hash, key, value)
+        return _Node(node.bitmap | bit, entries[:position] + (leaf,) + entries[position:]), True
+    
+    entry = entries[position]
+    if isinstance(entry, tuple):
+        if entry[0] == key_hash and entry[1] == key:
+            if entry[2] is value:
+                return node, False
+            replacement, added = (key_hash, key, value), False
+        else:
+            replacement, added = _merge(entry, (key_hash, key, value), shift + BITS), True
+    else:
+        replacement, added = _assoc(entry, shift + BITS, key_hash, key, value)
+        if replacement is entry:
+            return node, False
+    return _Node(node.bitmap, entries[:position] + (replacement,) + entries[position + 1:]), added
+
+
+def _dissoc(node, shift, key_hash, key):
+    """Return the node without key: the same node if absent, None if it became empty"""
+    if isinstance(node, _Collision):
+        pairs = tuple(pair for pair in node.pairs if pair[0] != key)
+        if len(pairs) == len(node.pairs):
+            return node
+        if len(pairs) == 1:
+            return (node.hash, pairs[0][0], pairs[0][1])
+        return _Collision(node.hash, pairs)
+    
+    bit = 1 << ((key_hash >> shift) & MASK)
+    if not node.bitmap & bit:
+        return node
+    position = _popcount(node.bitmap & (bit - 1))
+    entries = node.entries
+    entry = entries[position]
+    if isinstance(entry, tuple):
+        if entry[0] != key_hash or entry[1] != key:
+            return node
+        replacement = None
+    else:
+        replacement = _dissoc(entry, shift + BITS, key_hash, key)
+        if replacement is entry:
+            return node
+        # A branch left holding a single leaf collapses into that leaf
+        if isinstance(replacement, _Node) and len(replacement.entries) == 1 \
+                and isinstance(replacement.entries[0], tuple):
+            replacement = replacement.entries[0]
+    
+    if replacement is None:
+        if node.bitmap == bit:
+            return None
+        return _Node(node.bitmap & ~bit, entries[:position] + entries[position + 1:])
+    return _Node(node.bitmap, entries[:position] + (replacement,) + entries[position + 1:])
+
+
+def _build(leaves, shift):
+    """Build a subtree from leaves with distinct keys in one pass"""
+    if shift > MAX_SHIFT or len({leaf[0] for leaf in leaves}) == 1 and len(leaves) > 1:
+        return _Collision(leaves[0][0], tuple((leaf[1], leaf[2]) for leaf in leaves))
+    groups = {}
+    for leaf in leaves:
+        groups.setdefault((leaf[0] >> shift) & MASK, []).append(leaf)
+    bitmap = 0
+    entries = []
+    for index in sorted(groups):
+        group = groups[index]
+        bitmap |= 1 << index
+        entries.append(group[0] if len(group) == 1 else _build(group, shift + BITS))
+    return _Node(bitmap, tuple(entries))
+
+
+def _iterate(node):
+    if isinstance(node, _Collision):
+        yield from node.pairs
+        return
+    for entry in node.entries:
+        if isinstance(entry, tuple):
+            yield entry[1], entry[2]
+        else:
+            yield from _iterate(entry)
+
+
+class PMap:
+    __slots__ = ('_root', '_size')
+    
+    def __init__(self, items=()):
+        # Bulk construction builds each node once instead of path-copying per key
+        items = dict(items)
+        self._root = _build([(_hash(key), key, value) for key, value in items.items()], 0) if items else None
+        self._size = len(items)
+    
+    @classmethod
+    def _make(cls, root, size):
+        pmap = cls.__new__(cls)
+        pmap._root = root
+        pmap._size = size
+        return pmap
+    
+    def __len__(self):
+        return self._size
+    
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+    
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+    
+    def __iter__(self):
+        return (key for key, _ in self.items())
+    
+    def __eq__(self, other):
+        if not isinstance(other, PMap):
+            return NotImplemented
+        if self._root is other._root:
+            return True
+        return self._size == other._size and dict(self.items()) == dict(other.items())
+    
+    def __repr__(self):
+        return f"PMap({dict(self.items())!r})"
+    
+    def get(self, key, default=None):
+        """Value for key, or default"""
+        if self._root is None:
+            return default
+        value = _lookup(self._root, 0, _hash(key), key)
+        return default if value is _MISSING else value
+    
+    def items(self):
+        """(key, value) pairs in no particular order"""
+        if self._root is None:
+            return iter(())
+        return _iterate(self._root)
+    
+    def set(self, key, value):
+        """A new map with key set to value"""
+        key_hash = _hash(key)
+        if self._root is None:
+            return self._make(_Node(1 << (key_hash & MASK), ((key_hash, key, value),)), 1)
+        root, added = _assoc(self._root, 0, key_hash, key, value)
+        if root is self._root:
+            return self
+        return self._make(root, self._size + 1 if added else self._size)
+    
+    def delete(self, key):
+        """A new map without key; the same map if key is absent"""
+        if self._root is None:
+            return self
+        root = _dissoc(self._root, 0, _hash(key), key)
+        if root is self._root:
+            return self
+        if isinstance(root, tuple):
+            # A collision root left with one key; the root must be a node
+            root = _Node(1 << (root[0] & MASK), (root,))
+        return self._make(root, self._size - 1)
+    
+    def update(self, items):
+        """A new map with every (key, value) pair (or mapping entry) applied"""
+        if hasattr(items, 'items'):
+            items = items.items()
+        pmap = self
+        for key, value in items:
+            pmap = pmap.set(key, value)
+        return pmap
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""Pipelined CRT post-processing.
+
+With a PostProcessor the game draws each frame into one of two back buffers
+instead of the screen. Presenting the frame captures the effect parameters
+on the main thread, hands the buffer to a worker thread for the full-screen
+effects (CRTRenderer.apply_final_effects), and shows the frame before it,
+whose effects were applied while this one was being drawn. The next frame
+is drawn into that other buffer, so the worker and the main thread never
+share a surface.
+
+The effects are blits and fills, which pygame runs with the GIL released,
+so on a machine with more than one core they overlap the next frame's game
+logic and text rendering. The price is one frame of display latency.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PostProcessor:
+    def __init__(self, renderer, screen, show):
+        self.renderer = renderer
+        self.show = show
+        self.buffers = [screen.copy(), screen.copy()]
+        self.index = 0
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix="postfx")
+        self.pending = None
+        
+        # Statistics: frames presented and main-thread time spent waiting on the worker
+        self.frames = 0
+        self.waited = 0.0
+    
+    def back_buffer(self):
+        """The surface to draw the next frame into"""
+        return self.buffers[self.index]
+    
+    def present(self):
+        """Start the effects on the frame just drawn and show the one before it"""
+        params = self.renderer.capture_final_effects()
+        job = self.executor.submit(self.renderer.apply_final_effects, self.buffers[self.index], params)
+        previous, self.pending = self.pending, job
+        self.index ^= 1
+        if previous is not None:
+            self._show(previous, self.buffers[self.index])
+    
+    def _show(self, job, buffer):
+        start = time.perf_counter()
+        job.result()
+        self.waited += time.perf_counter() - start
+        self.show(buffer)
+        self.frames += 1
+    
+    def close(self):
+        """Show the frame still in flight and stop the worker"""
+        if self.pending is not None:
+            self._show(self.pending, self.buffers[self.index ^ 1])
+            self.pending = None
+        self.executor.shutdown()
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""Input recording and tick-exact replay.
+
+A recording is a small header followed by one record per input event:
+    
+    magic b'CRTI' | u16 format version | u64 RNG seed | u16 frames per second
+
+Each record is a varint count of frames since the previous record, a kind
+byte, then the event's fields: integers as varints, text as a varint byte
+length plus UTF-8. Clipboard reads are recorded too, since a replay can't
+rely on the clipboard holding the same text. The last record marks the
+tick the session ended on and a CRC32 of the final game state, so a replay
+can both stop on the same tick and check that it ended up in the same
+place.
+
+Everything else the game logic does is a function of the seed, the tick
+number and these events, so replaying the events on the ticks they arrived
+reproduces the session exactly, whatever the render rate.
+"""
+import struct
+from collections import deque
+
+import pygame
+
+REPLAY_MAGIC = b'CRTI'
+REPLAY_VERSION = 1
+HEADER = struct.Struct('<4sHQH')
+
+KIND_KEYDOWN, KIND_TEXTINPUT, KIND_TEXTEDITING, KIND_QUIT, KIND_CLIPBOARD, KIND_END = range(1, 7)
+
+
+class ReplayError(Exception):
+    """A recording that can't be read"""
+
+
+def _pack_varint(parts, value):
+    while value >= 0x80:
+        parts.append(value & 0x7F | 0x80)
+        value >>= 7
+    parts.append(value)
+
+
+def _pack_text(parts, text):
+    data = text.encode('utf-8')
+    _pack_varint(parts, len(data))
+    parts.extend(data)
+
+
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        if offset >= len(data):
+            raise ReplayError("recording is truncated")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _read_text(data, offset):
+    length, offset = _read_varint(data, offset)
+    if offset + length > len(data):
+        raise ReplayError("recording is truncated")
+    return str(data[offset:offset + length], 'utf-8'), offset + length
+
+
+class InputRecorder:
+    def __init__(self, path, seed, tick_rate):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, seed, tick_rate))
+        self.last_tick = 0
+        
+        # Statistics
+        self.events = 0
+    
+    def _write(self, tick, kind, fields=()):
+        """Append one record; fields are ints and strings"""
+        parts = bytearray()
+        _pack_varint(parts, tick - self.last_tick)
+        parts.append(kind)
+        for field in fields:
+            if isinstance(field, str):
+                _pack_text(parts, field)
+            else:
+                _pack_varint(parts, field)
+        self.file.write(parts)
+        self.last_tick = tick
+    
+    def record_events(self, tick, events):
+        """Record the input events the game is about to handle on a tick"""
+        for event in events:
+            if event.type == pygame.KEYDOWN:
+                self._write(tick, KIND_KEYDOWN, (event.key, event.mod, event.unicode))
+            elif event.type == pygame.TEXTINPUT:
+                self._write(tick, KIND_TEXTINPUT, (event.text,))
+            elif event.type == pygame.TEXTEDITING:
+                self._write(tick, KIND_TEXTEDITING, (event.text, event.start, event.length))
+            elif event.type == pygame.QUIT:
+                self._write(tick, KIND_QUIT)
+            else:
+                continue
+            self.events += 1
+    
+    def record_clipboard(self, tick, text):
+        """Record text read from the clipboard"""
+        self._write(tick, KIND_CLIPBOARD, (text,))
+        self.events += 1
+    
+    def close(self, tick, digest):
+        """Mark the end of the session and close the file"""
+        if self.file is None:
+            return
+        self._write(tick, KIND_END, (digest,))
+        self.file.close()
+        self.file = None
+
+
+class InputReplayer:
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            raise ReplayError(f"could not read {path}: {e}") from e
+        
+        if len(data) < HEADER.size:
+            raise ReplayError("file is too short to be a recording")
+        magic, version, self.seed, self.tick_rate = HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC:
+            raise ReplayError("not a recording")
+        if version != REPLAY_VERSION:
+            raise ReplayError(f"recording format {version} is not supported")
+        
+        # tick -> events, plus clipboard texts in the order they were read
+        self.ticks = {}
+        self.clipboard = deque()
+        self.end_tick = None
+        self.digest = None
+        try:
+            self._parse(data, HEADER.size)
+        except (UnicodeDecodeError, ValueError) as e:
+            raise ReplayError(f"recording is malformed: {e}") from e
+        if self.end_tick is None:
+            raise ReplayError("recording has no end marker (the game didn't close cleanly)")
+        
+        # Statistics
+        self.events = sum(len(events) for events in self.ticks.values())
+    
+    def _parse(self, data, offset):
+        tick = 0
+        while offset < len(data):
+            delta, offset = _read_varint(data, offset)
+            tick += delta
+            if offset >= len(data):
+                raise ReplayError("recording is truncated")
+            kind = data[offset]
+            offset += 1
+            
+            if kind == KIND_KEYDOWN:
+                key, offset = _read_varint(data, offset)
+                mod, offset = _read_varint(data, offset)
+                unicode, offset = _read_text(data, offset)
+                event = pygame.event.Event(pygame.KEYDOWN, key=key, mod=mod, unicode=unicode, scancode=0)
+            elif kind == KIND_TEXTINPUT:
+                text, offset = _read_text(data, offset)
+                event = pygame.event.Event(pygame.TEXTINPUT, text=text)
+            elif kind == KIND_TEXTEDITING:
+                text, offset = _read_text(data, offset)
+                start, offset = _read_varint(data, offset)
+                length, offset = _read_varint(data, offset)
+                event = pygame.event.Event(pygame.TEXTEDITING, text=text, start=start, length=length)
+            elif kind == KIND_QUIT:
+                event = pygame.event.Event(pygame.QUIT)
+            elif kind == KIND_CLIPBOARD:
+                text, offset = _read_text(data, offset)
+                self.clipboard.append(text)
+                continue
+            elif kind == KIND_END:
+                self.digest, offset = _read_varint(data, offset)
+                self.end_tick = tick
+                return
+            else:
+                raise ReplayError(f"unknown record type {kind}")
+            self.ticks.setdefault(tick, []).append(event)
+    
+    def events_for(self, tick):
+        """The recorded events to handle on a tick"""
+        return self.ticks.pop(tick, [])
+    
+    def read_clipboard(self):
+        """The next recorded clipboard text"""
+        return self.clipboard.popleft() if self.clipboard else ""
+    
+    def finished(self, tick):
+        """Whether the recorded session had ended by this tick"""
+        return tick >= self.end_tick
\ No newline at end of file
@@ -0,0 +1,342 @@
+"""Versioned binary save files.
+
+A save file is a fixed header followed by a payload:
+
+    magic b'CRTS' | u16 format version | u32 payload length | u32 CRC32 of payload
+
+The payload is the fields of SAVE_SCHEMAS[version] packed one after another
+with no names or padding. A string is a u32 byte length plus UTF-8. A list
+of strings is a u32 count plus one NUL-joined string, so loading it is a
+single decode and split. Flag tables are stored as columns: the names, one
+type tag byte per flag, then packed arrays of the int, float and string
+values. Files are written atomically, so a crash mid-save leaves the
+previous save intact, and a checksum mismatch is reported instead of loading
+garbage.
+
+SaveSnapshot is an immutable copy of everything a save holds. It is taken on
+the main thread, and Autosaver encodes and writes it on a background thread.
+"""
+import os
+import queue
+import struct
+import threading
+import zlib
+from collections import namedtuple
+
+import app_paths
+
+SAVE_MAGIC = b'CRTS'
+SAVE_VERSION = 1
+HEADER = struct.Struct('<4sHII')
+
+# Field layout of each save format version, in file order
+SAVE_SCHEMAS = {
+    1: (
+        ('world', 'str'),
+        ('current_state', 'str'),
+        ('health', 'i32'),
+        ('terminal_solved', 'bool'),
+        ('door_unlocked', 'bool'),
+        ('inventory', 'strs'),
+        ('game_flags', 'flags'),
+        ('visited_locations', 'strs'),
+        ('completed_puzzles', 'strs'),
+        ('sprite', 'str'),
+        ('messages', 'messages'),
+        ('scroll_offset', 'i32'),
+        ('history', 'strs'),
+        ('use_red', 'bool'),
+    ),
+}
+
+SaveSnapshot = namedtuple('SaveSnapshot', [name for name, _ in SAVE_SCHEMAS[SAVE_VERSION]])
+
+# Separates the strings of a list inside its text block
+SEPARATOR = '\0'
+
+# Type tags for flag values
+FLAG_NONE, FLAG_FALSE, FLAG_TRUE, FLAG_INT, FLAG_FLOAT, FLAG_STR = range(6)
+
+_U8 = struct.Struct('<B')
+_U32 = struct.Struct('<I')
+_I32 = struct.Struct('<i')
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+
+
+class SaveError(Exception):
+    """A save file that can't be read"""
+
+
+def capture(game_state, world='', sprite='', messages=(), scroll_offset=0, history=(), use_red=False):
+    """Copy the game's state into an immutable SaveSnapshot"""
+    return SaveSnapshot(
+        world=world,
+        current_state=game_state.current_state,
+        health=game_state.health,
+        terminal_solved=game_state.terminal_solved,
+        door_unlocked=game_state.door_unlocked,
+        inventory=tuple(game_state.inventory),
+        game_flags=tuple(game_state.game_flags.items()),
+        visited_locations=tuple(game_state.visited_locations),
+        completed_puzzles=tuple(game_state.completed_puzzles),
+        sprite=sprite,
+        messages=tuple((message['text'], message['color'], message['type']) for message in messages),
+        scroll_offset=scroll_offset,
+        history=tuple(history),
+        use_red=use_red,
+    )
+
+
+def apply_state(snapshot, game_state):
+    """Copy a snapshot's GameState fields back into a GameState"""
+    game_state.current_state = snapshot.current_state
+    game_state.health = snapshot.health
+    game_state.terminal_solved = snapshot.terminal_solved
+    game_state.door_unlocked = snapshot.door_unlocked
+    game_state.inventory = list(snapshot.inventory)
+    game_state.game_flags = dict(snapshot.game_flags)
+    game_state.visited_locations = set(snapshot.visited_locations)
+    game_state.completed_puzzles = set(snapshot.completed_puzzles)
+
+
+# Encoding. Lists are stored column-wise: all the strings of a list as one
+# NUL-separated UTF-8 block, all the numbers as one packed array.
+
+def _pack_str(parts, text):
+    data = text.encode('utf-8')
+    parts.append(_U32.pack(len(data)))
+    parts.append(data)
+
+
+def _pack_strs(parts, items):
+    joined = SEPARATOR.join(items)
+    if joined.count(SEPARATOR) != max(len(items) - 1, 0):
+        raise SaveError("text can't contain NUL characters")
+    parts.append(_U32.pack(len(items)))
+    _pack_str(parts, joined)
+
+
+def _flag_tag(name, value):
+    if value is None:
+        return FLAG_NONE
+    if value is True or value is False:
+        return FLAG_TRUE if value else FLAG_FALSE
+    if isinstance(value, int):
+        return FLAG_INT
+    if isinstance(value, float):
+        return FLAG_FLOAT
+    if isinstance(value, str):
+        return FLAG_STR
+    raise SaveError(f"flag '{name}' has a value of unsupported type {type(value).__name__}")
+
+
+def _pack_flags(parts, flags):
+    tags = bytes(_flag_tag(name, value) for name, value in flags)
+    ints = [value for (_, value), tag in zip(flags, tags) if tag == FLAG_INT]
+    floats = [value for (_, value), tag in zip(flags, tags) if tag == FLAG_FLOAT]
+    texts = [value for (_, value), tag in zip(flags, tags) if tag == FLAG_STR]
+    
+    _pack_strs(parts, [name for name, _ in flags])
+    parts.append(tags)
+    try:
+        parts.append(struct.pack(f'<{len(ints)}q', *ints))
+    except struct.error as e:
+        raise SaveError(f"flag value out of range: {e}") from e
+    parts.append(struct.pack(f'<{len(floats)}d', *floats))
+    _pack_strs(parts, texts)
+
+
+def _pack_messages(parts, messages):
+    columns = list(zip(*messages)) if messages else [(), (), ()]
+    parts.append(_U32.pack(len(messages)))
+    for column in columns:
+        _pack_strs(parts, column)
+
+
+_PACKERS = {
+    'str': _pack_str,
+    'strs': _pack_strs,
+    'i32': lambda parts, value: parts.append(_I32.pack(value)),
+    'bool': lambda parts, value: parts.append(_U8.pack(1 if value else 0)),
+    'flags': _pack_flags,
+    'messages': _pack_messages,
+}
+
+
+def encode(snapshot):
+    """Serialize a snapshot to bytes in the current format"""
+    parts = []
+    for name, kind in SAVE_SCHEMAS[SAVE_VERSION]:
+        try:
+            _PACKERS[kind](parts, getattr(snapshot, name))
+        except struct.error as e:
+            raise SaveError(f"can't save {name}: {e}") from e
+    payload = b''.join(parts)
+    return HEADER.pack(SAVE_MAGIC, SAVE_VERSION, len(payload), zlib.crc32(payload)) + payload
+
+
+# Decoding: each reader takes (buffer, offset) and returns (value, new offset)
+
+def _read_str(data, offset):
+    (length,) = _U32.unpack_from(data, offset)
+    offset += 4
+    if offset + length > len(data):
+        raise SaveError("save file is truncated")
+    return str(data[offset:offset + length], 'utf-8'), offset + length
+
+
+def _read_strs(data, offset):
+    (count,) = _U32.unpack_from(data, offset)
+    joined, offset = _read_str(data, offset + 4)
+    items = tuple(joined.split(SEPARATOR)) if count else ()
+    if len(items) != count:
+        raise SaveError("save file has a malformed list")
+    return items, offset
+
+
+def _read_array(data, offset, code, count):
+    array = struct.Struct(f'<{count}{code}')
+    return array.unpack_from(data, offset), offset + array.size
+
+
+def _read_flags(data, offset):
+    names, offset = _read_strs(data, offset)
+    tags = bytes(data[offset:offset + len(names)])
+    offset += len(names)
+    ints, offset = _read_array(data, offset, 'q', tags.count(FLAG_INT))
+    floats, offset = _read_array(data, offset, 'd', tags.count(FLAG_FLOAT))
+    texts, offset = _read_strs(data, offset)
+    
+    columns = {FLAG_INT: iter(ints), FLAG_FLOAT: iter(floats), FLAG_STR: iter(texts)}
+    constants = {FLAG_NONE: None, FLAG_FALSE: False, FLAG_TRUE: True}
+    values = []
+    for tag in tags:
+        if tag in constants:
+            values.append(constants[tag])
+        elif tag in columns:
+            values.append(next(columns[tag]))
+        else:
+            raise SaveError(f"unknown flag type {tag}")
+    return tuple(zip(names, values)), offset
+
+
+def _read_messages(data, offset):
+    (count,) = _U32.unpack_from(data, offset)
+    offset += 4
+    columns = []
+    for _ in range(3):
+        column, offset = _read_strs(data, offset)
+        if len(column) != count:
+            raise SaveError("save file has a malformed message log")
+        columns.append(column)
+    return tuple(zip(*columns)), offset
+
+
+_READERS = {
+    'str': _read_str,
+    'strs': _read_strs,
+    'i32': lambda data, offset: (_I32.unpack_from(data, offset)[0], offset + 4),
+    'bool': lambda data, offset: (data[offset] != 0, offset + 1),
+    'flags': _read_flags,
+    'messages': _read_messages,
+}
+
+# Values for fields an older format version doesn't have
+_DEFAULTS = SaveSnapshot('', 'main_menu', 100, False, False, (), (), (), (), '', (), 0, (), False)
+
+
+def decode(data):
+    """Parse save file bytes into a SaveSnapshot"""
+    if len(data) < HEADER.size:
+        raise SaveError("file is too short to be a save")
+    magic, version, length, checksum = HEADER.unpack_from(data)
+    if magic != SAVE_MAGIC:
+        raise SaveError("not a save file")
+    if version not in SAVE_SCHEMAS:
+        raise SaveError(f"save format {version} is newer than this game supports")
+    
+    payload = memoryview(data)[HEADER.size:HEADER.size + length]
+    if len(payload) != length or zlib.crc32(payload) != checksum:
+        raise SaveError("save file is damaged (checksum mismatch)")
+    
+    fields = {}
+    offset = 0
+    try:
+        for name, kind in SAVE_SCHEMAS[version]:
+            fields[name], offset = _READERS[kind](payload, offset)
+    except (struct.error, IndexError, StopIteration, UnicodeDecodeError) as e:
+        raise SaveError(f"save file is malformed: {e}") from e
+    return _DEFAULTS._replace(**fields)
+
+
+def slot_path(slot):
+    """File for a named save slot in the per-user data directory"""
+    name = ''.join(char for char in slot.lower() if char.isalnum() or char in '-_') or 'save'
+    return os.path.join(app_paths.data_dir('saves'), f"{name}.sav")
+
+
+def write_save(path, snapshot):
+    """Encode a snapshot and write it atomically"""
+    app_paths.atomic_write(path, encode(snapshot))
+
+
+def read_save(path):
+    """Read and verify a save file"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError as e:
+        raise SaveError("no such save") from e
+    except OSError as e:
+        raise SaveError(f"could not read {path}: {e}") from e
+    return decode(data)
+
+
+class Autosaver:
+    def __init__(self, path):
+        self.path = path
+        
+        # Only the newest snapshot matters; older pending ones are dropped
+        self._pending = queue.Queue(maxsize=1)
+        self._thread = None
+        
+        # Statistics
+        self.saves = 0
+        self.skipped = 0
+    
+    def submit(self, snapshot):
+        """Queue a snapshot to be written; never blocks"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._save_loop, name="autosave", daemon=True)
+            self._thread.start()
+        while True:
+            try:
+                self._pending.put_nowait(snapshot)
+                return
+            except queue.Full:
+                try:
+                    self._pending.get_nowait()
+                    self.skipped += 1
+                except queue.Empty:
+                    pass
+    
+    def _save_loop(self):
+        """Write snapshots as they arrive"""
+        while True:
+            snapshot = self._pending.get()
+            if snapshot is None:
+                return
+            try:
+                write_save(self.path, snapshot)
+                self.saves += 1
+            except (OSError, SaveError) as e:
+                print(f"Warning: Autosave failed: {e}")
+    
+    def close(self):
+        """Finish the pending save and stop the thread"""
+        if self._thread is not None:
+            # Blocks until the writer has taken the last snapshot
+            self._pending.put(None)
+            self._thread.join(timeout=5.0)
+            self._thread = None
\ No newline at end of file
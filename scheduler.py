@@ -0,0 +1,116 @@
+"""Timers on the game's logic clock.
+
+Callbacks are kept in a min-heap ordered by deadline, so finding what is due
+costs nothing while nothing is, and scheduling or firing a timer is
+O(log n). Cancelling marks the handle and leaves the entry in the heap to be
+skipped when it comes up; the heap is rebuilt if cancelled entries ever
+outnumber live ones.
+
+The clock only moves when the game advances it by a logic tick, so timers
+are deterministic under replay and never block the main thread.
+"""
+import heapq
+import itertools
+
+
+class TimerHandle:
+    """A scheduled callback that can be cancelled until it fires"""
+    __slots__ = ('deadline', 'callback', 'args', 'cancelled', '_scheduler')
+    
+    def __init__(self, scheduler, deadline, callback, args):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self._scheduler = scheduler
+    
+    def cancel(self):
+        """Stop the callback from running; harmless once it has run"""
+        if not self.cancelled:
+            self.cancelled = True
+            if self._scheduler is not None:
+                self._scheduler._cancelled(self)
+    
+    @property
+    def pending(self):
+        """Whether the callback is still waiting to run"""
+        return not self.cancelled and self._scheduler is not None
+
+
+class Scheduler:
+    def __init__(self):
+        self.now = 0.0
+        self._heap = []
+        self._order = itertools.count()
+        self._live = 0
+        
+        # Statistics
+        self.fired = 0
+    
+    def __len__(self):
+        return self._live
+    
+    def call_later(self, delay, callback, *args):
+        """Run callback(*args) once delay seconds of game time have passed"""
+        return self.call_at(self.now + max(0.0, delay), callback, *args)
+    
+    def call_at(self, deadline, callback, *args):
+        """Run callback(*args) when the clock reaches deadline"""
+        handle = TimerHandle(self, deadline, callback, args)
+        heapq.heappush(self._heap, (deadline, next(self._order), handle))
+        self._live += 1
+        return handle
+    
+    def _cancelled(self, handle):
+        self._live -= 1
+        if len(self._heap) > 2 * self._live + 16:
+            self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+            heapq.heapify(self._heap)
+    
+    def _pop(self):
+        """Remove the earliest live timer and return it, or None"""
+        while self._heap:
+            handle = heapq.heappop(self._heap)[2]
+            if not handle.cancelled:
+                self._live -= 1
+                handle._scheduler = None
+                return handle
+        return None
+    
+    def next_deadline(self):
+        """Clock time of the earliest live timer, or None"""
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+    
+    def advance(self, dt):
+        """Move the clock on by dt seconds and run every timer now due; returns how many ran"""
+        self.now += dt
+        fired = self.fired
+        deadline = self.next_deadline()
+        while deadline is not None and deadline <= self.now:
+            self._fire(self._pop())
+            deadline = self.next_deadline()
+        return self.fired - fired
+    
+    def run_all(self):
+        """Run every pending timer in deadline order, jumping the clock forward to each; returns how many ran"""
+        fired = self.fired
+        handle = self._pop()
+        while handle is not None:
+            self.now = max(self.now, handle.deadline)
+            self._fire(handle)
+            handle = self._pop()
+        return self.fired - fired
+    
+    def _fire(self, handle):
+        self.fired += 1
+        handle.callback(*handle.args)
+    
+    def cancel_all(self):
+        """Cancel every pending timer"""
+        for _, _, handle in self._heap:
+            handle.cancelled = True
+            handle._scheduler = None
+        self._heap.clear()
+        self._live = 0
\ No newline at end of file
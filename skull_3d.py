@@ -1,14 +1,19 @@
 import math
 import pygame
+from font_registry import get_font
 
 class Skull3D:
-    def __init__(self):
+    def __init__(self, scale=1.0):
+        # Size relative to the 800x600 layout
+        self.scale = scale
         self.rotation_x = 0
         self.rotation_y = 0
         self.rotation_z = 0
-        self.rotation_speed_x = 0.00
-        self.rotation_speed_y = 0.03
-        self.rotation_speed_z = 0.00
+        # Radians per second; previous_rotation is the angles before the last update
+        self.rotation_speed_x = 0.0
+        self.rotation_speed_y = 0.9
+        self.rotation_speed_z = 0.0
+        self.previous_rotation = (0, 0, 0)
         
         # 3D skull vertices (simplified skull shape)
         self.original_vertices = [
@@ -76,7 +81,7 @@ class Skull3D:
         ]
         
         self.transformed_vertices = []
-        self.font = pygame.font.SysFont("Courier", 12, bold=True)
+        self.font = get_font("Courier", max(1, round(12 * scale)), bold=True)
         
         # Colors for different parts
         self.skull_color = (0, 255, 0)      # Green CRT color
@@ -114,35 +119,39 @@ class Skull3D:
         
         return (screen_x, screen_y, z)  # Return z for depth sorting
     
-    def update(self):
-        """Update rotation angles"""
-        self.rotation_x += self.rotation_speed_x
-        self.rotation_y += self.rotation_speed_y
-        self.rotation_z += self.rotation_speed_z
-        
-        # Keep rotations within 2π
+    def update(self, dt):
+        """Advance rotation angles by dt seconds"""
+        previous_x, previous_y, previous_z = self.rotation_x, self.rotation_y, self.rotation_z
+        self.rotation_x += self.rotation_speed_x * dt
+        self.rotation_y += self.rotation_speed_y * dt
+        self.rotation_z += self.rotation_speed_z * dt
+        
+        # Keep rotations within 2π, moving the previous angles along so
+        # interpolating between them never spins the long way round
         if self.rotation_x >= 2 * math.pi:
             self.rotation_x -= 2 * math.pi
+            previous_x -= 2 * math.pi
         if self.rotation_y >= 2 * math.pi:
             self.rotation_y -= 2 * math.pi
+            previous_y -= 2 * math.pi
         if self.rotation_z >= 2 * math.pi:
             self.rotation_z -= 2 * math.pi
-        
-        # Transform all vertices
-        self.transformed_vertices = []
-        for vertex in self.original_vertices:
-            rotated = self.rotate_point_3d(vertex, self.rotation_x, self.rotation_y, self.rotation_z)
-            self.transformed_vertices.append(rotated)
+            previous_z -= 2 * math.pi
+        self.previous_rotation = (previous_x, previous_y, previous_z)
     
-    def render(self, surface, center_x, center_y):
-        """Render the 3D skull to the surface"""
-        if not self.transformed_vertices:
-            return
+    def render(self, surface, center_x, center_y, alpha=1.0):
+        """Render the 3D skull, alpha of the way from the previous update's angles to the latest"""
+        # Transform all vertices
+        previous_x, previous_y, previous_z = self.previous_rotation
+        rx = previous_x + (self.rotation_x - previous_x) * alpha
+        ry = previous_y + (self.rotation_y - previous_y) * alpha
+        rz = previous_z + (self.rotation_z - previous_z) * alpha
+        self.transformed_vertices = [self.rotate_point_3d(vertex, rx, ry, rz) for vertex in self.original_vertices]
         
         # Project all vertices to 2D
         projected_vertices = []
         for vertex in self.transformed_vertices:
-            projected = self.project_to_2d(vertex, center_x, center_y)
+            projected = self.project_to_2d(vertex, center_x, center_y, 3 * self.scale)
             projected_vertices.append(projected)
         
         # Sort edges by average depth for proper rendering order
@@ -187,7 +196,7 @@ class Skull3D:
                 # Draw the line with anti-aliasing if possible
                 try:
                     if abs(x2 - x1) > 1 or abs(y2 - y1) > 1:  # Only draw if points are different
-                        pygame.draw.line(surface, adjusted_color, (x1, y1), (x2, y2), 2)
+                        pygame.draw.line(surface, adjusted_color, (x1, y1), (x2, y2), max(1, round(2 * self.scale)))
                 except:
                     pass  # Skip invalid coordinates
         
@@ -204,7 +213,7 @@ class Skull3D:
             
             # Draw a small filled circle for the eye socket
             try:
-                pygame.draw.circle(surface, (100, 0, 0), (x, y), 3)
+                pygame.draw.circle(surface, (100, 0, 0), (x, y), max(1, round(3 * self.scale)))
             except:
                 pass
         
@@ -214,7 +223,7 @@ class Skull3D:
             x, y = int(right_eye_center[0]), int(right_eye_center[1])
             
             try:
-                pygame.draw.circle(surface, (100, 0, 0), (x, y), 3)
+                pygame.draw.circle(surface, (100, 0, 0), (x, y), max(1, round(3 * self.scale)))
             except:
                 pass
     
@@ -224,13 +233,13 @@ class Skull3D:
         text_surface = self.font.render(title_text, True, (0, 150, 0))
         text_rect = text_surface.get_rect()
         text_rect.centerx = center_x
-        text_rect.y = center_y + 60
+        text_rect.y = center_y + round(60 * self.scale)
         
         # Add some glow effect to the title
         glow_surface = self.font.render(title_text, True, (0, 50, 0))
         glow_rect = glow_surface.get_rect()
         glow_rect.centerx = center_x + 1
-        glow_rect.y = center_y + 61
+        glow_rect.y = center_y + round(60 * self.scale) + 1
         
         surface.blit(glow_surface, glow_rect)
         surface.blit(text_surface, text_rect)
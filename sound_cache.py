@@ -0,0 +1,110 @@
+"""Content-addressed on-disk cache for synthesized PCM.
+
+Each cached sound is a raw PCM file named after a hash of everything that
+affects its samples: the ToneSpec fields, sample rate, channel count, the
+synthesis backend and the source of sound_synth itself. Editing a sound's
+parameters or the synthesis code therefore yields a new key and the stale
+file is simply never read again.
+
+File names start with a generation: a short hash of the cache format, the
+synthesis code and the backend. Pruning deletes only files from other
+generations, which no run of the current code can read, so the entries of
+every sound library (the game's, a benchmark's) survive each other's runs.
+"""
+import hashlib
+import mmap
+import os
+
+import app_paths
+import sound_synth
+
+CACHE_FORMAT_VERSION = 1
+
+
+def _code_fingerprint():
+    """Hash of the synthesis code, so code changes invalidate the cache"""
+    try:
+        with open(sound_synth.__file__, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return 'unknown'
+
+
+class SoundCache:
+    def __init__(self, directory=None):
+        self.directory = directory or app_paths.cache_dir('sounds')
+        self.code_fingerprint = _code_fingerprint()
+        self.backend = 'numpy' if sound_synth.numpy is not None else 'array'
+        generation = (CACHE_FORMAT_VERSION, self.code_fingerprint, self.backend)
+        self.generation = hashlib.sha256(repr(generation).encode('utf-8')).hexdigest()[:16]
+        
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.used_keys = set()
+    
+    def key_for(self, spec, sample_rate, channels):
+        """Build the content address for a sound"""
+        parts = (
+            CACHE_FORMAT_VERSION,
+            self.code_fingerprint,
+            self.backend,
+            tuple(spec.frequencies),
+            spec.note_duration,
+            spec.amplitude,
+            spec.waveform,
+            spec.fade,
+            sample_rate,
+            channels,
+        )
+        return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+    
+    def _path(self, key):
+        """Path of the PCM file for a key"""
+        return os.path.join(self.directory, f"{self.generation}-{key}.pcm")
+    
+    def load(self, key):
+        """Memory-map a cached PCM file, or return None on a miss"""
+        try:
+            with open(self._path(key), 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return None
+    
+    def store(self, key, pcm):
+        """Write synthesized PCM to the cache"""
+        app_paths.atomic_write(self._path(key), memoryview(pcm).cast('B'))
+    
+    def get_or_render(self, spec, sample_rate, channels):
+        """Return PCM for a spec, synthesizing and caching it on a miss"""
+        key = self.key_for(spec, sample_rate, channels)
+        self.used_keys.add(key)
+        pcm = self.load(key)
+        if pcm is not None:
+            self.hits += 1
+            return pcm
+        
+        self.misses += 1
+        pcm = sound_synth.render_pcm(spec, sample_rate, channels)
+        try:
+            self.store(key, pcm)
+        except OSError as e:
+            print(f"Warning: Could not write sound cache: {e}")
+        return pcm
+    
+    def prune(self):
+        """Delete cached files written by other versions of the synthesis code"""
+        prefix = f"{self.generation}-"
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        
+        for name in names:
+            if name.endswith('.pcm') and not name.startswith(prefix):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
\ No newline at end of file
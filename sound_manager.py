@@ -1,159 +1,289 @@
+import itertools
+import mmap
+import queue
+import random
+import threading
+import time
 import pygame
-import math
+import sound_synth
+from ambient_engine import AmbientEngine
+from sound_cache import SoundCache
+from sound_synth import ToneSpec
+from voice_manager import VoiceManager
+
+# Default sound library: sequences play at 0.2 amplitude, single beeps at 0.3
+DEFAULT_SOUNDS = {
+    'startup': ToneSpec((440, 880, 1320), 0.1, 0.2),     # ascending beeps
+    'shutdown': ToneSpec((1320, 880, 440), 0.1, 0.2),    # descending beeps
+    'success': ToneSpec((523, 659, 784), 0.15, 0.2),     # happy chord
+    'victory': ToneSpec((523, 659, 784, 1047), 0.2, 0.2),  # triumph
+    'beep': ToneSpec((800,), 0.1, 0.3),
+    'type': ToneSpec((1200,), 0.05, 0.3),
+    'error': ToneSpec((200,), 0.3, 0.3),
+}
+
+# Keystroke clicks: short square blips at slightly different pitches, picked at
+# random per key so fast typing doesn't sound like a machine gun
+KEYSTROKE_PITCHES = (1100, 1150, 1200, 1260, 1320, 1380)
+KEYSTROKE_SOUNDS = {
+    f'key_{pitch}': ToneSpec((pitch,), 0.025, 0.12, 'square', 0.2) for pitch in KEYSTROKE_PITCHES
+}
+
+# Voice pool each sound plays on; anything not listed is 'sfx'
+SOUND_CATEGORIES = {
+    'beep': 'ui',
+    'type': 'ui',
+    'error': 'ui',
+}
+
+# Synthesis order for the background worker (lower first). Sounds the player
+# can trigger in the first few seconds come before the ending fanfares.
+SOUND_PRIORITIES = {
+    'type': 0,
+    'beep': 0,
+    'error': 1,
+    'startup': 1,
+    'success': 2,
+    'shutdown': 3,
+    'victory': 3,
+}
+SOUND_PRIORITIES.update({name: 0 for name in KEYSTROKE_SOUNDS})
+DEFAULT_PRIORITY = 5
+URGENT_PRIORITY = -1
+
+# How long a play_sound call may wait for its sound to finish synthesizing
+PLAY_DEADLINE = 0.15
+
+# Mixer channel reserved for the streaming ambience
+AMBIENT_CHANNEL = 0
 
 class SoundManager:
-    def __init__(self):
+    def __init__(self, use_cache=True, background=True, library=None, seed=None, defer_library=False):
+        self._worker = None
+        self._unloaded_library = None
+        
+        # Room the streaming ambience follows; None until start_ambient
+        self.ambient_room = None
+        
         # Initialize pygame mixer
         try:
-            pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
+            pygame.mixer.init(frequency=sound_synth.SAMPLE_RATE, size=-16, channels=2, buffer=512)
             self.sound_enabled = True
         except pygame.error:
             print("Warning: Could not initialize sound system")
             self.sound_enabled = False
             return
         
+        # Use whatever format the mixer actually opened with
+        self.sample_rate, _, self.channels = pygame.mixer.get_init()
+        
         # Sound settings
         self.master_volume = 0.7
         self.sfx_volume = 0.8
         self.ambient_volume = 0.3
         
-        # Simple sound storage
+        # Sound storage: specs are registered by load_library, Sounds appear as they are built
+        self.library = {}
         self.sounds = {}
-        self._create_simple_sounds()
+        self.sound_cache = None
+        self.pending_plays = []
+        self.library_ready = threading.Event()
+        
+        # Background synthesis
+        self._queue = queue.PriorityQueue()
+        self._queue_order = itertools.count()
+        self._use_cache = use_cache
+        self._background = background
         
         # Ambient sound control
         self.ambient_playing = False
         self.ambient_channel = None
+        
+        # Streaming ambience gets a reserved channel so effects never steal it,
+        # and every effect category gets its own pool of channels after it
+        self.voice_manager = VoiceManager(AMBIENT_CHANNEL + 1)
+        self.ambient_engine = AmbientEngine(pygame.mixer.Channel(AMBIENT_CHANNEL),
+                                            self.sample_rate, self.channels, seed=seed)
+        
+        # Pre-synthesized keystroke variants, filled in as the worker builds them
+        self.keystroke_names = []
+        self.rng = random.Random(seed)
+        
+        # A deferred library waits for load_library, so the game can show its
+        # first frame before opening the cache and starting synthesis
+        self._unloaded_library = dict(DEFAULT_SOUNDS, **KEYSTROKE_SOUNDS) if library is None else library
+        if not defer_library:
+            self.load_library()
     
-    def _create_simple_sounds(self):
-        """Create simple synthetic sounds without numpy"""
+    def load_library(self):
+        """Register the sound library and start synthesizing it; does nothing once loaded"""
+        library, self._unloaded_library = self._unloaded_library, None
+        if library is None:
+            return
+        
+        if self._use_cache:
+            self.sound_cache = self._open_cache()
+        for name, spec in library.items():
+            self.register_sound(name, spec, SOUND_PRIORITIES.get(name, DEFAULT_PRIORITY))
+        
+        if self._background:
+            self._start_worker()
+        else:
+            self._create_simple_sounds()
+        self.keystroke_names = [name for name in KEYSTROKE_SOUNDS if name in self.library]
+    
+    def _open_cache(self):
+        """Open the on-disk sound cache, or run without one"""
+        try:
+            return SoundCache()
+        except OSError as e:
+            print(f"Warning: Sound cache unavailable: {e}")
+            return None
+    
+    def register_sound(self, name, spec, priority=DEFAULT_PRIORITY):
+        """Register a sound to be synthesized lazily"""
         if not self.sound_enabled:
             return
         
-        sample_rate = 22050
-        duration = 0.2  # 200ms sounds
+        self.library[name] = spec
+        self.sounds.pop(name, None)
+        self.library_ready.clear()
+        self._queue.put((priority, next(self._queue_order), name))
+    
+    def _start_worker(self):
+        """Start the background synthesis thread"""
+        self._worker = threading.Thread(target=self._synthesis_worker, name="sound-synthesis", daemon=True)
+        self._worker.start()
+    
+    def _synthesis_worker(self):
+        """Build queued sounds in priority order until told to stop"""
+        while True:
+            _, _, name = self._queue.get()
+            if name is None:
+                return
+            self._build_sound(name)
+    
+    def _create_simple_sounds(self):
+        """Synthesize every registered sound on the calling thread"""
+        while not self._queue.empty():
+            _, _, name = self._queue.get()
+            if name is not None:
+                self._build_sound(name)
+    
+    def _build_sound(self, name):
+        """Synthesize one registered sound if it isn't built yet"""
+        if name in self.sounds or name not in self.library:
+            return
         
-        # Create simple beep sounds using pure Python
         try:
-            # Startup sound - ascending beeps
-            self.sounds['startup'] = self._create_beep_sequence([440, 880, 1320], sample_rate, 0.1)
-            
-            # Shutdown sound - descending beeps
-            self.sounds['shutdown'] = self._create_beep_sequence([1320, 880, 440], sample_rate, 0.1)
-            
-            # Success sound - happy chord
-            self.sounds['success'] = self._create_beep_sequence([523, 659, 784], sample_rate, 0.15)
-            
-            # Victory sound - triumph
-            self.sounds['victory'] = self._create_beep_sequence([523, 659, 784, 1047], sample_rate, 0.2)
-            
-            # Simple beep
-            self.sounds['beep'] = self._create_single_beep(800, sample_rate, 0.1)
-            
-            # Typing sound
-            self.sounds['type'] = self._create_single_beep(1200, sample_rate, 0.05)
-            
-            # Error sound
-            self.sounds['error'] = self._create_single_beep(200, sample_rate, 0.3)
-            
+            self.sounds[name] = self._create_sound(self.library[name])
         except Exception as e:
-            print(f"Warning: Could not create sounds: {e}")
-            self.sound_enabled = False
+            print(f"Warning: Could not create sound {name}: {e}")
+            self.sounds[name] = None
+        
+        if all(key in self.sounds for key in self.library):
+            # A miss may mean the synthesis code changed; drop files it made obsolete
+            if self.sound_cache is not None and self.sound_cache.misses:
+                self.sound_cache.prune()
+            self.library_ready.set()
+    
+    def is_ready(self, sound_name):
+        """Check whether a sound has finished synthesizing"""
+        return self.sound_enabled and self.sounds.get(sound_name) is not None
+    
+    def wait_until_ready(self, timeout=None):
+        """Block until the whole library is synthesized"""
+        if not self.sound_enabled:
+            return True
+        self.load_library()
+        return self.library_ready.wait(timeout)
     
-    def _create_single_beep(self, frequency, sample_rate, duration):
-        """Create a single beep tone"""
+    def _create_sound(self, spec):
+        """Synthesize a ToneSpec into a pygame Sound, going through the cache"""
         if not self.sound_enabled:
             return None
         
+        if self.sound_cache is None:
+            return sound_synth.make_sound(sound_synth.render_pcm(spec, self.sample_rate, self.channels))
+        
+        pcm = self.sound_cache.get_or_render(spec, self.sample_rate, self.channels)
         try:
-            frames = int(duration * sample_rate)
-            arr = []
-            
-            for i in range(frames):
-                # Generate sine wave
-                time_point = float(i) / sample_rate
-                wave = math.sin(2 * math.pi * frequency * time_point)
-                
-                # Apply envelope (fade in/out to avoid clicks)
-                envelope = 1.0
-                fade_frames = frames // 10  # 10% fade
-                if i < fade_frames:
-                    envelope = float(i) / fade_frames
-                elif i > frames - fade_frames:
-                    envelope = float(frames - i) / fade_frames
-                
-                # Convert to 16-bit signed integer
-                sample = int(wave * envelope * 32767 * 0.3)  # Reduce volume
-                arr.append([sample, sample])  # Stereo
-            
-            # Convert to bytes
-            sound_bytes = b''
-            for sample_pair in arr:
-                for sample in sample_pair:
-                    # Convert to 16-bit little-endian
-                    sound_bytes += sample.to_bytes(2, 'little', signed=True)
-            
-            # Create sound from raw bytes
-            sound = pygame.mixer.Sound(buffer=sound_bytes)
-            return sound
-            
+            return sound_synth.make_sound(pcm)
+        finally:
+            if isinstance(pcm, mmap.mmap):
+                pcm.close()
+    
+    def _create_single_beep(self, frequency, duration, waveform='sine'):
+        """Create a single beep tone at the mixer's sample rate"""
+        try:
+            return self._create_sound(ToneSpec((frequency,), duration, 0.3, waveform))
         except Exception as e:
             print(f"Error creating beep: {e}")
             return None
     
-    def _create_beep_sequence(self, frequencies, sample_rate, note_duration):
+    def _create_beep_sequence(self, frequencies, note_duration, waveform='sine'):
         """Create a sequence of beeps"""
-        if not self.sound_enabled:
-            return None
-        
         try:
-            total_frames = int(len(frequencies) * note_duration * sample_rate)
-            frames_per_note = int(note_duration * sample_rate)
-            arr = []
-            
-            for freq_index, frequency in enumerate(frequencies):
-                start_frame = freq_index * frames_per_note
-                
-                for i in range(frames_per_note):
-                    time_point = float(i) / sample_rate
-                    wave = math.sin(2 * math.pi * frequency * time_point)
-                    
-                    # Apply envelope
-                    envelope = 1.0
-                    fade_frames = frames_per_note // 10
-                    if i < fade_frames:
-                        envelope = float(i) / fade_frames
-                    elif i > frames_per_note - fade_frames:
-                        envelope = float(frames_per_note - i) / fade_frames
-                    
-                    sample = int(wave * envelope * 32767 * 0.2)
-                    arr.append([sample, sample])
-            
-            # Convert to bytes
-            sound_bytes = b''
-            for sample_pair in arr:
-                for sample in sample_pair:
-                    sound_bytes += sample.to_bytes(2, 'little', signed=True)
-            
-            sound = pygame.mixer.Sound(buffer=sound_bytes)
-            return sound
-            
+            return self._create_sound(ToneSpec(tuple(frequencies), note_duration, 0.2, waveform))
         except Exception as e:
             print(f"Error creating beep sequence: {e}")
             return None
     
     def play_sound(self, sound_name):
-        """Play a named sound effect"""
+        """Play a named sound effect, or queue it briefly if it is still being built"""
         if not self.sound_enabled:
             return
+        self.load_library()
+        if sound_name not in self.library:
+            return
         
-        if sound_name in self.sounds and self.sounds[sound_name]:
-            try:
-                channel = self.sounds[sound_name].play()
-                if channel:
-                    channel.set_volume(self.sfx_volume * self.master_volume)
-            except pygame.error as e:
-                print(f"Error playing sound {sound_name}: {e}")
+        if sound_name in self.sounds:
+            self._play_ready(sound_name)
+            return
+        
+        # Not synthesized yet: move it to the front and play it if it lands in time
+        self.pending_plays.append((sound_name, time.monotonic() + PLAY_DEADLINE))
+        self._queue.put((URGENT_PRIORITY, next(self._queue_order), sound_name))
+        if self._worker is None:
+            self._create_simple_sounds()
+            self.update()
+    
+    def _play_ready(self, sound_name, category=None):
+        """Play a sound that has already been synthesized on its voice pool"""
+        sound = self.sounds.get(sound_name)
+        if sound is None:
+            return
+        
+        category = category or SOUND_CATEGORIES.get(sound_name, 'sfx')
+        try:
+            self.voice_manager.play(category, sound, self.sfx_volume * self.master_volume)
+        except pygame.error as e:
+            print(f"Error playing sound {sound_name}: {e}")
+    
+    def play_keystroke(self):
+        """Click for a single keystroke; never synthesizes on the input path"""
+        if not self.sound_enabled or not self.keystroke_names:
+            return
+        
+        sound_name = self.rng.choice(self.keystroke_names)
+        if sound_name in self.sounds:
+            self._play_ready(sound_name, 'keys')
+    
+    def update(self):
+        """Start queued sounds that became ready, dropping ones past their deadline"""
+        if not self.sound_enabled or not self.pending_plays:
+            return
+        
+        now = time.monotonic()
+        still_pending = []
+        for sound_name, deadline in self.pending_plays:
+            if now > deadline:
+                continue
+            if sound_name in self.sounds:
+                self._play_ready(sound_name)
+            else:
+                still_pending.append((sound_name, deadline))
+        self.pending_plays = still_pending
     
     def stop_all_sounds(self):
         """Stop all currently playing sounds"""
@@ -163,6 +293,8 @@ class SoundManager:
     def set_master_volume(self, volume):
         """Set master volume (0.0 to 1.0)"""
         self.master_volume = max(0.0, min(1.0, volume))
+        if self.sound_enabled:
+            self.ambient_engine.channel.set_volume(self.ambient_volume * self.master_volume)
     
     def set_sfx_volume(self, volume):
         """Set sound effects volume (0.0 to 1.0)"""
@@ -172,7 +304,10 @@ class SoundManager:
         """Toggle sound on/off"""
         self.sound_enabled = not self.sound_enabled
         if not self.sound_enabled:
+            self.ambient_engine.stop()
             self.stop_all_sounds()
+        elif self.ambient_room is not None:
+            self.start_ambient(self.ambient_room)
     
     def is_sound_enabled(self):
         """Check if sound is enabled"""
@@ -180,7 +315,7 @@ class SoundManager:
     
     def play_ambient_sound(self, sound_name):
         """Play ambient sound on loop"""
-        if not self.sound_enabled or sound_name not in self.sounds:
+        if not self.is_ready(sound_name):
             return
         
         try:
@@ -200,8 +335,44 @@ class SoundManager:
             self.ambient_channel.stop()
             self.ambient_playing = False
     
+    def start_ambient(self, room):
+        """Start the streaming ambience with a room's preset"""
+        self.ambient_room = room
+        if not self.sound_enabled:
+            return
+        
+        self.ambient_engine.set_preset(room)
+        self.ambient_engine.channel.set_volume(self.ambient_volume * self.master_volume)
+        self.ambient_engine.start()
+    
+    def set_ambient_room(self, room):
+        """Glide the streaming ambience to another room's preset"""
+        if self.ambient_room is not None:
+            # Followed while sound is off too, so turning it back on resumes in the right room
+            self.ambient_room = room
+        if self.sound_enabled and self.ambient_engine.is_running():
+            self.ambient_engine.set_preset(room)
+    
+    def stop_ambient_stream(self):
+        """Stop the streaming ambience"""
+        self.ambient_room = None
+        if self.sound_enabled:
+            self.ambient_engine.stop()
+    
+    def get_ambient_stats(self):
+        """Get streaming ambience counters (underruns, render times)"""
+        if not self.sound_enabled:
+            return {}
+        return self.ambient_engine.get_stats()
+    
     def cleanup(self):
         """Clean up sound resources"""
+        if self._worker is not None:
+            self._queue.put((URGENT_PRIORITY - 1, next(self._queue_order), None))
+            self._worker.join(timeout=1.0)
+            self._worker = None
+        
         if self.sound_enabled:
+            self.ambient_engine.stop()
             self.stop_all_sounds()
             pygame.mixer.quit()
\ No newline at end of file
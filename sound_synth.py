@@ -0,0 +1,124 @@
+"""Bulk PCM synthesis used by SoundManager.
+
+Waveforms and envelopes are generated a whole buffer at a time, with NumPy
+when it is installed and with the standard library ``array`` module when it
+is not. The result is a buffer-protocol object that can be handed straight
+to ``pygame.mixer.Sound(buffer=...)`` without building an intermediate
+bytes object.
+"""
+import math
+import random
+from array import array
+from collections import namedtuple
+
+import pygame
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SAMPLE_RATE = 22050
+OSCILLATORS = ('sine', 'square', 'noise')
+
+# A sound made of one or more equal-length notes
+ToneSpec = namedtuple('ToneSpec', ['frequencies', 'note_duration', 'amplitude', 'waveform', 'fade'])
+ToneSpec.__new__.__defaults__ = (0.3, 'sine', 0.1)
+
+
+def _check_waveform(waveform):
+    """Reject oscillator names we don't know how to render"""
+    if waveform not in OSCILLATORS:
+        raise ValueError(f"Unknown waveform '{waveform}', expected one of {OSCILLATORS}")
+
+
+def _envelope_python(frames, fade):
+    """Linear fade in/out envelope as a list of gains"""
+    fade_frames = int(frames * fade + 1e-9)
+    env = [1.0] * frames
+    if fade_frames <= 0:
+        return env
+    for i in range(fade_frames):
+        env[i] = i / fade_frames
+    for i in range(frames - fade_frames + 1, frames):
+        env[i] = (frames - i) / fade_frames
+    return env
+
+
+def _note_python(frequency, frames, sample_rate, waveform, gain, fade, rng):
+    """Render one note to a list of ints using the standard library"""
+    env = _envelope_python(frames, fade)
+    step = 2 * math.pi * frequency / sample_rate
+    sin = math.sin
+    
+    if waveform == 'sine':
+        return [int(sin(step * i) * e * gain) for i, e in enumerate(env)]
+    if waveform == 'square':
+        return [int((gain if sin(step * i) >= 0 else -gain) * e) for i, e in enumerate(env)]
+    uniform = rng.uniform
+    return [int(uniform(-1.0, 1.0) * e * gain) for e in env]
+
+
+def _note_numpy(frequency, frames, sample_rate, waveform, gain, fade, rng):
+    """Render one note to a float64 ndarray using NumPy"""
+    index = numpy.arange(frames, dtype=numpy.float64)
+    
+    if waveform == 'noise':
+        wave = numpy.random.default_rng(rng.getrandbits(32)).uniform(-1.0, 1.0, frames)
+    else:
+        wave = numpy.sin(index * (2 * numpy.pi * frequency / sample_rate))
+        if waveform == 'square':
+            wave = numpy.where(wave >= 0, 1.0, -1.0)
+    
+    fade_frames = int(frames * fade + 1e-9)
+    if fade_frames > 0:
+        env = numpy.ones(frames)
+        env[:fade_frames] = index[:fade_frames] / fade_frames
+        tail = slice(frames - fade_frames + 1, frames)
+        env[tail] = (frames - index[tail]) / fade_frames
+        wave *= env
+    return wave * gain
+
+
+def render_mono(spec, sample_rate=SAMPLE_RATE, seed=0):
+    """Render a ToneSpec to signed 16-bit mono samples"""
+    _check_waveform(spec.waveform)
+    frames_per_note = int(spec.note_duration * sample_rate)
+    gain = 32767 * spec.amplitude
+    rng = random.Random(seed)
+    
+    if numpy is not None:
+        notes = [_note_numpy(f, frames_per_note, sample_rate, spec.waveform, gain, spec.fade, rng)
+                 for f in spec.frequencies]
+        # astype truncates toward zero, matching int() in the pure Python path
+        return numpy.concatenate(notes).astype(numpy.int16)
+    
+    samples = array('h')
+    for frequency in spec.frequencies:
+        samples.extend(_note_python(frequency, frames_per_note, sample_rate,
+                                    spec.waveform, gain, spec.fade, rng))
+    return samples
+
+
+def to_channels(mono, channels=2):
+    """Duplicate mono samples into an interleaved multi-channel buffer"""
+    if channels == 1:
+        return mono
+    
+    if numpy is not None and isinstance(mono, numpy.ndarray):
+        return numpy.repeat(mono, channels)
+    
+    interleaved = array('h', bytes(len(mono) * channels * 2))
+    for channel in range(channels):
+        interleaved[channel::channels] = mono
+    return interleaved
+
+
+def render_pcm(spec, sample_rate=SAMPLE_RATE, channels=2, seed=0):
+    """Render a ToneSpec to an interleaved 16-bit PCM buffer"""
+    return to_channels(render_mono(spec, sample_rate, seed), channels)
+
+
+def make_sound(pcm):
+    """Wrap a PCM buffer in a pygame Sound"""
+    return pygame.mixer.Sound(buffer=pcm)
\ No newline at end of file
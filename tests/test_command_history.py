@@ -0,0 +1,67 @@
+"""CommandHistory: ring eviction, browsing and reverse search with deferred indexing"""
+import random
+
+from command_history import CommandHistory
+
+
+def brute_force_search(history, query, before=None):
+    """Newest live entry containing query, by scanning every entry"""
+    limit = history._next_seq if before is None else before
+    matches = [(seq, text) for text, seq in history._latest.items() if seq < limit and query in text]
+    return max(matches, default=None)
+
+
+def test_search_matches_a_scan_while_entries_are_evicted():
+    rng = random.Random(3)
+    history = CommandHistory(capacity=50)
+    queries = ['thing1', 'ing', 'o', 'look thing', 'zzz', 'e t']
+    for step in range(3000):
+        history.add(f"{rng.choice(['look', 'use', 'open'])} thing{rng.randrange(80)}")
+        # Search only now and then, so some texts are evicted before they are ever indexed
+        if step % 37 == 0:
+            for query in queries:
+                assert history.search(query) == brute_force_search(history, query)
+    for query in queries:
+        assert history.search(query) == brute_force_search(history, query)
+        found = history.search(query)
+        if found is not None:
+            assert history.search(query, before=found[0]) == brute_force_search(history, query, found[0])
+    # Nothing evicted is left behind in the index
+    indexed = set().union(*history._index.values())
+    assert indexed == set(history._latest)
+
+
+def test_re_adding_moves_an_entry_to_the_front():
+    history = CommandHistory(capacity=10)
+    for text in ['look', 'use terminal', 'open door']:
+        history.add(text)
+    history.add('look')
+    history.add('look')
+    assert history.entries() == ['use terminal', 'open door', 'look']
+    assert history.search('o') == (3, 'look')
+    seq, text = history.previous()
+    assert text == 'look'
+    assert history.previous(seq)[1] == 'open door'
+    assert history.next(seq) is None
+
+
+def test_replace_resets_the_index():
+    history = CommandHistory(capacity=10)
+    history.add('look')
+    history.search('lo')
+    history.replace(['open door', 'use terminal'])
+    assert history.search('lo') is None
+    assert history.search('door')[1] == 'open door'
+    assert history.entries() == ['open door', 'use terminal']
+
+
+def test_file_round_trip(tmp_path):
+    path = str(tmp_path / 'history.txt')
+    writer = CommandHistory(capacity=5, path=path)
+    for i in range(40):
+        writer.add(f"command {i}")
+    writer.close()
+    
+    reader = CommandHistory(capacity=5, path=path)
+    assert reader.entries() == [f"command {i}" for i in range(35, 40)]
+    assert reader.search('command 3')[1] == 'command 39'
\ No newline at end of file
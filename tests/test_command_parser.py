@@ -0,0 +1,50 @@
+"""CommandParser: phrases, verbs, objects, free text and the shortcuts taken for each"""
+import pytest
+
+from command_parser import Command, CommandParser
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('look', ('look', None, '')),
+    ('  LOOK ', ('look', None, '')),
+    ('l', ('look', None, '')),
+    ('start journey', ('start', None, '')),
+    ('Start   Journey', ('start', None, '')),
+    ('computer', ('use', 'terminal', '')),
+    ('use terminal', ('use', 'terminal', '')),
+    ('use the computer', ('use', 'terminal', '')),
+    ('look at the terminal', ('look', 'terminal', '')),
+    ('open the', ('open', None, '')),
+    ('open window', ('open', None, 'window')),
+    ('password Retr0', ('password', None, 'retr0')),
+    ('password the a', ('password', None, 'the a')),
+    ('dance wildly', (None, None, '')),
+])
+def test_parse(text, expected):
+    parser = CommandParser()
+    command = parser.parse_uncached(text)
+    assert type(command) is Command
+    assert command[:3] == expected
+    assert command.text == ' '.join(text.lower().split())
+    assert parser.parse(text) == command
+
+
+@pytest.mark.parametrize('text', ['', '   ', '\t'])
+def test_blank_input(text):
+    assert CommandParser().parse(text) is None
+
+
+def test_multi_word_verbs():
+    parser = CommandParser({'verbs': {'pick up': ['take'], 'pick': []}, 'nouns': {'lamp': []}})
+    assert parser.parse('pick up lamp')[:3] == ('pick up', 'lamp', '')
+    assert parser.parse('pick lamp')[:3] == ('pick', 'lamp', '')
+    assert parser.parse('take lamp')[:3] == ('pick up', 'lamp', '')
+
+
+def test_added_words_are_parsed():
+    parser = CommandParser()
+    assert parser.parse('xyzzy').verb is None
+    parser.add_verb('xyzzy', ['plugh'])
+    parser.add_phrase('magic', 'xyzzy door')
+    assert parser.parse('plugh').verb == 'xyzzy'
+    assert parser.parse('magic')[:3] == ('xyzzy', 'door', '')
\ No newline at end of file
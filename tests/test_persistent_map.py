@@ -0,0 +1,169 @@
+"""PMap: lookups, path copying, deletion and hash collisions"""
+import random
+
+import pytest
+
+from persistent_map import PMap, _Collision, _Node
+
+
+class Key:
+    """A key with a chosen hash, to force collisions and shared hash prefixes"""
+    
+    def __init__(self, name, key_hash):
+        self.name = name
+        self.key_hash = key_hash
+    
+    def __hash__(self):
+        return self.key_hash
+    
+    def __eq__(self, other):
+        return isinstance(other, Key) and self.name == other.name
+    
+    def __repr__(self):
+        return f"Key({self.name!r})"
+
+
+def nodes(pmap):
+    """Every node reachable from a map's root"""
+    found = []
+    stack = [pmap._root] if pmap._root is not None else []
+    while stack:
+        node = stack.pop()
+        found.append(node)
+        if isinstance(node, _Node):
+            stack.extend(entry for entry in node.entries if not isinstance(entry, tuple))
+    return found
+
+
+def test_empty():
+    pmap = PMap()
+    assert len(pmap) == 0
+    assert pmap.get('missing') is None
+    assert 'missing' not in pmap
+    assert list(pmap.items()) == []
+    assert pmap.delete('missing') is pmap
+    with pytest.raises(KeyError):
+        pmap['missing']
+
+
+def test_set_leaves_the_original_untouched():
+    old = PMap({'a': 1})
+    new = old.set('b', 2).set('a', 10)
+    assert dict(old.items()) == {'a': 1}
+    assert dict(new.items()) == {'a': 10, 'b': 2}
+    assert len(old) == 1 and len(new) == 2
+
+
+def test_setting_the_same_value_returns_the_same_map():
+    value = object()
+    pmap = PMap({'a': value})
+    assert pmap.set('a', value) is pmap
+
+
+def test_bulk_build_matches_repeated_set():
+    items = {f"key{i}": i for i in range(2000)}
+    built = PMap(items)
+    grown = PMap().update(items)
+    assert built == grown
+    assert dict(built.items()) == items
+    assert len(built) == len(grown) == len(items)
+
+
+def test_random_operations_match_a_dict():
+    rng = random.Random(1234)
+    pmap, expected = PMap(), {}
+    for _ in range(5000):
+        key = rng.randrange(300)
+        if rng.random() < 0.4:
+            pmap = pmap.delete(key)
+            expected.pop(key, None)
+        else:
+            value = rng.randrange(1000)
+            pmap = pmap.set(key, value)
+            expected[key] = value
+        assert len(pmap) == len(expected)
+    assert dict(pmap.items()) == expected
+    for key in range(300):
+        assert pmap.get(key, 'absent') == expected.get(key, 'absent')
+
+
+def test_delete_leaves_the_original_untouched():
+    old = PMap({i: str(i) for i in range(100)})
+    new = old.delete(50)
+    assert 50 in old and 50 not in new
+    assert len(old) == 100 and len(new) == 99
+    assert new.delete(50) is new
+
+
+def test_delete_everything_leaves_an_empty_map():
+    keys = list(range(500))
+    pmap = PMap(dict.fromkeys(keys, True))
+    random.Random(7).shuffle(keys)
+    for key in keys:
+        pmap = pmap.delete(key)
+    assert len(pmap) == 0
+    assert pmap._root is None
+    assert pmap == PMap()
+
+
+def test_delete_collapses_a_branch_left_with_one_leaf():
+    # Same low 5 bits, so both keys live in a child branch of the root
+    first, second = Key('first', 0b00001), Key('second', 0b100001)
+    pmap = PMap().set(first, 1).set(second, 2)
+    assert isinstance(pmap._root.entries[0], _Node)
+    
+    pmap = pmap.delete(second)
+    assert pmap._root.entries[0] == (first.key_hash, first, 1)
+    assert pmap[first] == 1
+
+
+def test_deep_paths_for_hashes_sharing_long_prefixes():
+    # Hashes differing only in their top bits reach the deepest level
+    keys = [Key(str(i), i << 30 | 0x3FFFFFFF) for i in range(4)]
+    pmap = PMap()
+    for index, key in enumerate(keys):
+        pmap = pmap.set(key, index)
+    assert [pmap[key] for key in keys] == [0, 1, 2, 3]
+    for key in keys[:3]:
+        pmap = pmap.delete(key)
+    assert list(pmap.items()) == [(keys[3], 3)]
+
+
+def test_collisions():
+    a, b, c = Key('a', 42), Key('b', 42), Key('c', 42)
+    pmap = PMap().set(a, 1).set(b, 2).set(c, 3)
+    assert any(isinstance(node, _Collision) for node in nodes(pmap))
+    assert (pmap[a], pmap[b], pmap[c]) == (1, 2, 3)
+    assert Key('d', 42) not in pmap
+    
+    replaced = pmap.set(b, 20)
+    assert replaced[b] == 20 and pmap[b] == 2
+    assert len(replaced) == 3
+
+
+def test_collision_delete_down_to_one_key():
+    a, b, c = Key('a', 42), Key('b', 42), Key('c', 42)
+    pmap = PMap([(a, 1), (b, 2), (c, 3)])
+    assert pmap.delete(Key('d', 42)) is pmap
+    
+    pmap = pmap.delete(b)
+    assert len(pmap) == 2 and b not in pmap
+    pmap = pmap.delete(a)
+    # The last colliding key is an ordinary leaf again
+    assert not any(isinstance(node, _Collision) for node in nodes(pmap))
+    assert dict(pmap.items()) == {c: 3}
+    assert pmap.delete(c) == PMap()
+
+
+def test_structural_sharing():
+    old = PMap({i: i for i in range(10000)})
+    new = old.set(5, 'changed')
+    shared = set(map(id, nodes(old))) & set(map(id, nodes(new)))
+    assert len(nodes(new)) - len(shared) <= 7
+
+
+def test_equality():
+    assert PMap({'a': 1, 'b': 2}) == PMap({'b': 2, 'a': 1})
+    assert PMap({'a': 1}) != PMap({'a': 2})
+    assert PMap({'a': 1}) != PMap({'a': 1, 'b': 2})
+    assert PMap() != {}
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""Recordings: varint and record round trips, and rejecting damaged files"""
+import pygame
+import pytest
+
+import replay
+from replay import HEADER, REPLAY_MAGIC, REPLAY_VERSION, InputRecorder, InputReplayer, ReplayError
+
+
+@pytest.mark.parametrize('value', [0, 1, 127, 128, 255, 16383, 16384, 2 ** 32 - 1, 2 ** 64 + 5])
+def test_varint_round_trip(value):
+    parts = bytearray()
+    replay._pack_varint(parts, value)
+    assert replay._read_varint(bytes(parts), 0) == (value, len(parts))
+
+
+def test_varint_lengths():
+    for value, size in ((0, 1), (127, 1), (128, 2), (16383, 2), (16384, 3)):
+        parts = bytearray()
+        replay._pack_varint(parts, value)
+        assert len(parts) == size
+
+
+def test_consecutive_varints_and_text():
+    parts = bytearray()
+    replay._pack_varint(parts, 300)
+    replay._pack_text(parts, 'héllo ✓')
+    replay._pack_text(parts, '')
+    data = bytes(parts)
+    value, offset = replay._read_varint(data, 0)
+    text, offset = replay._read_text(data, offset)
+    empty, offset = replay._read_text(data, offset)
+    assert (value, text, empty, offset) == (300, 'héllo ✓', '', len(data))
+
+
+def test_truncated_varint():
+    with pytest.raises(ReplayError, match="truncated"):
+        replay._read_varint(b'\x80\x80', 0)
+
+
+def test_truncated_text():
+    parts = bytearray()
+    replay._pack_text(parts, 'hello')
+    with pytest.raises(ReplayError, match="truncated"):
+        replay._read_text(bytes(parts[:-1]), 0)
+
+
+def record(path, seed=12345, tick_rate=60):
+    """A recording with every kind of record, several on one tick"""
+    recorder = InputRecorder(path, seed, tick_rate)
+    recorder.record_events(0, [pygame.event.Event(pygame.TEXTINPUT, text='l')])
+    recorder.record_events(3, [
+        pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RETURN, mod=pygame.KMOD_SHIFT, unicode='\r'),
+        pygame.event.Event(pygame.TEXTEDITING, text='ー', start=1, length=2),
+        pygame.event.Event(pygame.MOUSEMOTION, pos=(1, 2)),
+    ])
+    recorder.record_clipboard(200, 'pasted ✓')
+    recorder.record_events(200, [pygame.event.Event(pygame.QUIT)])
+    recorder.close(100000, 0xDEADBEEF)
+    return recorder
+
+
+def test_record_round_trip(tmp_path):
+    path = str(tmp_path / 'session.bin')
+    recorder = record(path)
+    assert recorder.events == 5
+    
+    replayer = InputReplayer(path)
+    assert (replayer.seed, replayer.tick_rate) == (12345, 60)
+    assert replayer.events == 4
+    assert (replayer.end_tick, replayer.digest) == (100000, 0xDEADBEEF)
+    
+    [text] = replayer.events_for(0)
+    assert text.type == pygame.TEXTINPUT and text.text == 'l'
+    key, editing = replayer.events_for(3)
+    assert (key.type, key.key, key.mod, key.unicode) == (pygame.KEYDOWN, pygame.K_RETURN, pygame.KMOD_SHIFT, '\r')
+    assert (editing.type, editing.text, editing.start, editing.length) == (pygame.TEXTEDITING, 'ー', 1, 2)
+    assert [event.type for event in replayer.events_for(200)] == [pygame.QUIT]
+    assert replayer.events_for(1) == []
+    
+    assert replayer.read_clipboard() == 'pasted ✓'
+    assert replayer.read_clipboard() == ''
+    assert not replayer.finished(99999) and replayer.finished(100000)
+
+
+def test_close_twice(tmp_path):
+    path = str(tmp_path / 'session.bin')
+    recorder = record(path)
+    recorder.close(200000, 1)
+    assert InputReplayer(path).end_tick == 100000
+
+
+def write(tmp_path, data):
+    path = tmp_path / 'broken.bin'
+    path.write_bytes(data)
+    return str(path)
+
+
+def header(version=REPLAY_VERSION, magic=REPLAY_MAGIC):
+    return HEADER.pack(magic, version, 1, 60)
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(ReplayError, match="could not read"):
+        InputReplayer(str(tmp_path / 'missing.bin'))
+
+
+@pytest.mark.parametrize('data, message', [
+    (b'CRTI', "too short"),
+    (header(magic=b'XXXX'), "not a recording"),
+    (header(version=REPLAY_VERSION + 1), "not supported"),
+    (header(), "no end marker"),
+    (header() + bytes([0, replay.KIND_TEXTINPUT, 1]) + b'a', "no end marker"),
+    (header() + bytes([5]), "truncated"),
+    (header() + bytes([0, 99]), "unknown record"),
+    (header() + bytes([0, replay.KIND_TEXTINPUT, 5]) + b'ab', "truncated"),
+    (header() + bytes([0, replay.KIND_TEXTINPUT, 1, 0xFF, 0, replay.KIND_END, 0]), "malformed"),
+    (header() + bytes([0, replay.KIND_END, 0x80]), "truncated"),
+])
+def test_damaged_recordings(tmp_path, data, message):
+    with pytest.raises(ReplayError, match=message):
+        InputReplayer(write(tmp_path, data))
+
+
+def test_truncated_recording(tmp_path):
+    path = str(tmp_path / 'session.bin')
+    record(path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    # Cutting the file anywhere inside the records must never load quietly
+    for end in range(HEADER.size, len(data)):
+        with pytest.raises(ReplayError):
+            InputReplayer(write(tmp_path, data[:end]))
\ No newline at end of file
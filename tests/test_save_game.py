@@ -0,0 +1,152 @@
+"""Save files: encode/decode round trips, header and checksum checks, older formats"""
+import struct
+import zlib
+
+import pytest
+
+import save_game
+from save_game import HEADER, SAVE_MAGIC, SAVE_VERSION, SaveError, SaveSnapshot, decode, encode
+
+
+def snapshot(**fields):
+    """A snapshot with every field filled in, overridden by fields"""
+    values = dict(
+        world='worlds/default.json',
+        current_state='corridor',
+        health=-5,
+        terminal_solved=True,
+        door_unlocked=False,
+        inventory=('keycard', 'lämp', ''),
+        game_flags=(('none', None), ('off', False), ('on', True), ('count', -(2 ** 63)),
+                    ('ratio', 0.25), ('name', 'Zoë'), ('empty', '')),
+        visited_locations=('main_menu', 'corridor'),
+        completed_puzzles=(),
+        sprite='skull',
+        messages=(('Hello', 'GREEN', 'game'), ('> look', 'WHITE', 'input')),
+        scroll_offset=3,
+        history=('start', 'look', 'ünïcode ✓'),
+        use_red=True,
+    )
+    values.update(fields)
+    return SaveSnapshot(**values)
+
+
+def with_header(payload, version=SAVE_VERSION, magic=SAVE_MAGIC):
+    return HEADER.pack(magic, version, len(payload), zlib.crc32(payload)) + payload
+
+
+def test_round_trip():
+    original = snapshot()
+    assert decode(encode(original)) == original
+
+
+def test_round_trip_of_empty_values():
+    original = snapshot(world='', inventory=(), game_flags=(), messages=(), history=(), sprite='')
+    assert decode(encode(original)) == original
+
+
+def test_list_holding_one_empty_string():
+    original = snapshot(inventory=('',), history=('', ''))
+    assert decode(encode(original)) == original
+
+
+def test_flag_types_survive():
+    flags = dict(decode(encode(snapshot())).game_flags)
+    assert flags['none'] is None
+    assert flags['off'] is False and flags['on'] is True
+    assert type(flags['count']) is int and type(flags['ratio']) is float
+
+
+def test_header():
+    data = encode(snapshot())
+    magic, version, length, checksum = HEADER.unpack_from(data)
+    assert magic == SAVE_MAGIC and version == SAVE_VERSION
+    assert length == len(data) - HEADER.size
+    assert checksum == zlib.crc32(data[HEADER.size:])
+
+
+def test_nul_in_text_is_refused():
+    with pytest.raises(SaveError):
+        encode(snapshot(inventory=('bad\0item',)))
+
+
+def test_unsupported_flag_value_is_refused():
+    with pytest.raises(SaveError):
+        encode(snapshot(game_flags=(('items', ['a']),)))
+    with pytest.raises(SaveError):
+        encode(snapshot(game_flags=(('big', 2 ** 64),)))
+
+
+@pytest.mark.parametrize('data', [b'', b'CRTS', encode(snapshot())[:HEADER.size - 1]])
+def test_too_short(data):
+    with pytest.raises(SaveError, match="too short"):
+        decode(data)
+
+
+def test_wrong_magic():
+    data = encode(snapshot())
+    with pytest.raises(SaveError, match="not a save"):
+        decode(b'XXXX' + data[4:])
+
+
+def test_newer_version():
+    payload = encode(snapshot())[HEADER.size:]
+    with pytest.raises(SaveError, match="newer"):
+        decode(with_header(payload, version=SAVE_VERSION + 1))
+
+
+def test_corrupted_payload():
+    data = bytearray(encode(snapshot()))
+    data[HEADER.size + 10] ^= 0xFF
+    with pytest.raises(SaveError, match="checksum"):
+        decode(bytes(data))
+
+
+def test_truncated_file():
+    data = encode(snapshot())
+    with pytest.raises(SaveError, match="checksum"):
+        decode(data[:-1])
+
+
+def test_trailing_bytes_are_ignored():
+    original = snapshot()
+    assert decode(encode(original) + b'junk') == original
+
+
+def test_malformed_payload_with_a_valid_checksum():
+    # A string claiming more bytes than the payload holds
+    with pytest.raises(SaveError, match="truncated"):
+        decode(with_header(struct.pack('<I', 1000) + b'abc'))
+    # A payload that stops partway through the fields
+    with pytest.raises(SaveError, match="malformed"):
+        decode(with_header(encode(snapshot())[HEADER.size:HEADER.size + 40]))
+
+
+def test_older_version_gets_defaults_for_missing_fields(monkeypatch):
+    schema = (('world', 'str'), ('current_state', 'str'), ('health', 'i32'), ('inventory', 'strs'))
+    monkeypatch.setitem(save_game.SAVE_SCHEMAS, 0, schema)
+    parts = []
+    for (_, kind), value in zip(schema, ('old.json', 'corridor', 42, ('keycard',))):
+        save_game._PACKERS[kind](parts, value)
+    
+    loaded = decode(with_header(b''.join(parts), version=0))
+    assert (loaded.world, loaded.current_state, loaded.health, loaded.inventory) == \
+        ('old.json', 'corridor', 42, ('keycard',))
+    assert loaded.sprite == '' and loaded.messages == () and loaded.use_red is False
+
+
+def test_write_and_read(tmp_path):
+    path = str(tmp_path / 'slot.sav')
+    original = snapshot()
+    save_game.write_save(path, original)
+    assert save_game.read_save(path) == original
+
+
+def test_read_missing_save(tmp_path):
+    with pytest.raises(SaveError, match="no such save"):
+        save_game.read_save(str(tmp_path / 'missing.sav'))
+
+@pytest.mark.parametrize('fields', [dict(health=97.5), dict(health=2 ** 31), dict(scroll_offset=-2 ** 40)])
+def test_unpackable_numbers_are_a_save_error(fields):
+    with pytest.raises(SaveError, match="can't save"):
+        encode(snapshot(**fields))
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""Scheduler: deadline order, cancelling, heap compaction and the fired counts"""
+from scheduler import Scheduler
+
+
+def test_timers_fire_in_deadline_order():
+    scheduler = Scheduler()
+    fired = []
+    for delay in (3.0, 1.0, 2.0):
+        scheduler.call_later(delay, fired.append, delay)
+    assert scheduler.next_deadline() == 1.0
+    assert scheduler.run_all() == 3
+    assert fired == [1.0, 2.0, 3.0]
+    assert scheduler.now == 3.0
+    assert len(scheduler) == 0
+
+
+def test_equal_deadlines_fire_in_scheduling_order():
+    scheduler = Scheduler()
+    fired = []
+    for name in 'abcde':
+        scheduler.call_at(1.0, fired.append, name)
+    scheduler.advance(1.0)
+    assert fired == list('abcde')
+
+
+def test_advance_runs_only_what_is_due():
+    scheduler = Scheduler()
+    fired = []
+    scheduler.call_later(0.5, fired.append, 'early')
+    scheduler.call_later(1.5, fired.append, 'late')
+    assert scheduler.advance(0.4) == 0
+    assert scheduler.advance(0.1) == 1
+    assert fired == ['early']
+    assert scheduler.advance(1.0) == 1
+    assert fired == ['early', 'late']
+    assert scheduler.advance(10.0) == 0
+
+
+def test_negative_delay_fires_on_the_next_advance():
+    scheduler = Scheduler()
+    fired = []
+    scheduler.advance(5.0)
+    scheduler.call_later(-1.0, fired.append, 'now')
+    assert scheduler.next_deadline() == 5.0
+    assert scheduler.advance(0.0) == 1
+    assert fired == ['now']
+
+
+def test_callbacks_can_schedule_more_timers():
+    scheduler = Scheduler()
+    fired = []
+    
+    def chain(count):
+        fired.append(scheduler.now)
+        if count:
+            scheduler.call_later(1.0, chain, count - 1)
+    
+    scheduler.call_later(1.0, chain, 2)
+    assert scheduler.advance(1.0) == 1
+    assert scheduler.run_all() == 2
+    assert fired == [1.0, 2.0, 3.0]
+
+
+def test_cancel():
+    scheduler = Scheduler()
+    fired = []
+    keep = scheduler.call_later(1.0, fired.append, 'keep')
+    drop = scheduler.call_later(1.0, fired.append, 'drop')
+    drop.cancel()
+    drop.cancel()
+    assert not drop.pending and keep.pending
+    assert len(scheduler) == 1
+    assert scheduler.advance(1.0) == 1
+    assert fired == ['keep']
+    assert not keep.pending
+    # Cancelling after firing changes nothing
+    keep.cancel()
+    assert len(scheduler) == 0
+
+
+def test_cancelled_head_is_skipped_by_next_deadline():
+    scheduler = Scheduler()
+    first = scheduler.call_later(1.0, lambda: None)
+    scheduler.call_later(2.0, lambda: None)
+    first.cancel()
+    assert scheduler.next_deadline() == 2.0
+    earlier = scheduler.call_later(0.5, lambda: None)
+    earlier.cancel()
+    scheduler.call_later(3.0, lambda: None)
+    assert scheduler.next_deadline() == 2.0
+
+
+def test_heap_is_compacted_when_cancelled_entries_outnumber_live_ones():
+    scheduler = Scheduler()
+    fired = []
+    handles = [scheduler.call_later(float(i), fired.append, i) for i in range(1000)]
+    for handle in handles[:900]:
+        handle.cancel()
+    assert len(scheduler) == 100
+    assert len(scheduler._heap) <= 2 * len(scheduler) + 16
+    assert scheduler.run_all() == 100
+    assert fired == list(range(900, 1000))
+
+
+def test_heap_stays_bounded_under_schedule_and_cancel_churn():
+    scheduler = Scheduler()
+    live = scheduler.call_later(100.0, lambda: None)
+    for i in range(10000):
+        scheduler.call_later(float(i % 50), lambda: None).cancel()
+        assert len(scheduler._heap) <= 2 * len(scheduler) + 16
+    assert len(scheduler) == 1 and live.pending
+
+
+def test_cancel_all():
+    scheduler = Scheduler()
+    fired = []
+    handles = [scheduler.call_later(1.0, fired.append, i) for i in range(5)]
+    scheduler.cancel_all()
+    assert len(scheduler) == 0
+    assert scheduler.next_deadline() is None
+    assert not any(handle.pending for handle in handles)
+    # Cancelling a handle afterwards must not disturb the count
+    handles[0].cancel()
+    assert len(scheduler) == 0
+    assert scheduler.advance(2.0) == 0 and scheduler.run_all() == 0
+    assert fired == []
+    assert scheduler.fired == 0
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""save, load, undo, redo and exit work in worlds that don't list them in their grammar"""
+import asyncio
+import json
+
+import pytest
+
+from command_parser import CommandParser, SYSTEM_VERBS
+from text_server import PROMPT, TextServer
+
+ROOMS = {
+    'hall': {
+        'commands': {'open door': [{'say': "The door creaks open."}, {'goto': 'yard'}]},
+        'fallback': [{'say': "Nothing happens."}],
+    },
+    'yard': {
+        'commands': {'look': [{'say': "An empty yard."}]},
+        'fallback': [{'say': "Nothing happens."}],
+    },
+}
+
+WORLDS = {
+    # Falls back to the built-in grammar
+    'no grammar': {'start': 'hall', 'rooms': ROOMS},
+    # Its own grammar, knowing nothing of the game's commands
+    'own grammar': {
+        'start': 'hall',
+        'grammar': {'verbs': {'open': ['pull'], 'look': []}, 'nouns': {'door': []}},
+        'rooms': ROOMS,
+    },
+}
+
+
+async def play(world_path, lines):
+    """Send lines to a text server session; returns the output after each one"""
+    server = TextServer(world_path, color=False)
+    port = await server.start(port=0)
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    prompt = PROMPT.encode('utf-8')
+    replies = []
+    try:
+        await reader.readuntil(prompt)
+        for line in lines:
+            writer.write(f"{line}\r\n".encode('utf-8'))
+            replies.append((await reader.readuntil(prompt)).decode('utf-8'))
+    finally:
+        writer.close()
+        await server.stop()
+    return replies
+
+
+@pytest.fixture(params=sorted(WORLDS))
+def world_path(request, tmp_path, monkeypatch):
+    monkeypatch.setenv('CRT_ADVENTURE_CACHE_DIR', str(tmp_path / 'cache'))
+    path = tmp_path / 'world.json'
+    path.write_text(json.dumps(WORLDS[request.param]), encoding='utf-8')
+    return str(path)
+
+
+def test_parser_adds_system_verbs(world_path):
+    with open(world_path, encoding='utf-8') as f:
+        grammar = json.load(f).get('grammar')
+    parser = CommandParser(grammar)
+    for verb in SYSTEM_VERBS:
+        assert parser.parse(verb).verb == verb
+    assert parser.parse('restore slot1')[:3] == ('load', None, 'slot1')
+    assert parser.parse('q').verb == 'exit'
+
+
+def test_system_commands_reach_the_game(world_path):
+    replies = asyncio.run(play(world_path, ['save', 'open door', 'undo', 'redo', 'load', 'look']))
+    saved, opened, undone, redone, loaded, look = replies
+    assert "Game saved to slot 'save'." in saved
+    assert "The door creaks open." in opened
+    assert "Undid the last move." in undone
+    assert "Redid the last move." in redone
+    assert "Game loaded from slot 'save'." in loaded
+    # Back in the hall, where 'look' isn't a command
+    assert "Nothing happens." in look
+    assert not any("Nothing happens." in reply for reply in replies[:-1])
+
+
+def test_grammar_keeps_its_own_words():
+    grammar = {'verbs': {'rescue': ['save'], 'leave': ['q']}}
+    parser = CommandParser(grammar)
+    assert parser.parse('save').verb == 'rescue'
+    assert parser.parse('q').verb == 'leave'
+    assert parser.parse('quit').verb == 'exit'
+    assert parser.parse('undo').verb == 'undo'
+    # The caller's grammar is left as it was
+    assert grammar == {'verbs': {'rescue': ['save'], 'leave': ['q']}}
\ No newline at end of file
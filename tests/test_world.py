@@ -0,0 +1,20 @@
+"""World compilation: effects that would leave the game in an unsaveable state"""
+import pytest
+
+from world import WorldError, compile_world
+
+
+def world(effects):
+    return {'start': 'hall', 'rooms': {'hall': {'commands': {'look': effects}}}}
+
+
+@pytest.mark.parametrize('action', ['damage', 'heal'])
+def test_health_changes_must_be_whole_numbers(action):
+    compile_world(world([{action: 5}]))
+    for value in (2.5, 5.0, '5', True):
+        with pytest.raises(WorldError, match=action):
+            compile_world(world([{action: value}]))
+
+
+def test_delays_may_be_fractional():
+    compile_world(world([{'end': 1.5}, {'after': 0.25, 'then': []}]))
\ No newline at end of file
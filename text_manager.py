@@ -1,30 +1,35 @@
 import pygame
 from collections import deque
+from font_registry import get_font
 
 class TextManager:
-    def __init__(self, width, height):
+    def __init__(self, width, height, scale=1.0):
         self.width = width
         self.height = height
-        self.font = pygame.font.SysFont("Courier", 20, bold=True)
-        self.small_font = pygame.font.SysFont("Courier", 16, bold=True)
+        self.scale = scale
+        self.font = get_font("Courier", self.scaled(20), bold=True)
+        self.small_font = get_font("Courier", self.scaled(16), bold=True)
         
         # Text display settings
         self.text_area_width = width // 2  # Left half for text
-        self.text_area_height = height - 120  # Reserve space for input
-        self.line_height = 25
+        self.text_area_height = height - self.scaled(120)  # Reserve space for input
+        self.line_height = self.scaled(25)
         self.max_lines = self.text_area_height // self.line_height
         
         # Message storage
         self.messages = deque(maxlen=self.max_lines)
         self.scroll_offset = 0
         
+        # Optional callback(text, color, message_type) for every message added
+        self.on_message = None
+        
         # Text formatting
-        self.margin_left = 20
-        self.margin_top = 20
+        self.margin_left = self.scaled(20)
+        self.margin_top = self.scaled(20)
         
         # Text effects
         self.typewriter_mode = False
-        self.typewriter_speed = 2  # Characters per frame
+        self.typewriter_speed = 60  # Characters per second
         self.current_message_chars = 0
         
         # Color definitions
@@ -38,6 +43,10 @@ class TextManager:
             'GRAY': (128, 128, 128)
         }
     
+    def scaled(self, length):
+        """A layout length in pixels at this render scale (the layout is designed for 800x600)"""
+        return max(1, round(length * self.scale))
+    
     def add_game_message(self, text, color='GREEN'):
         """Add a game message with specified color"""
         self._add_message(text, color, 'GAME')
@@ -53,8 +62,11 @@ class TextManager:
     
     def _add_message(self, text, color, message_type):
         """Add a message to the display queue"""
+        if self.on_message:
+            self.on_message(text, color, message_type)
+        
         # Word wrap long messages
-        wrapped_lines = self._wrap_text(text, self.text_area_width - 40)
+        wrapped_lines = self._wrap_text(text, self.text_area_width - self.scaled(40))
         
         for line in wrapped_lines:
             message = {
@@ -140,7 +152,7 @@ class TextManager:
             # Apply text effects based on message type
             if message['type'] == 'INPUT':
                 # Player input with slight indent
-                x_pos = self.margin_left + 10
+                x_pos = self.margin_left + self.scaled(10)
             else:
                 x_pos = self.margin_left
             
@@ -163,20 +175,21 @@ class TextManager:
             visible_messages = min(self.max_lines, total_messages)
             
             # Calculate scroll bar position
-            scroll_bar_height = max(20, (visible_messages / total_messages) * 100)
-            scroll_bar_y = self.margin_top + (self.scroll_offset / total_messages) * 100
+            track = self.scaled(100)
+            scroll_bar_height = max(self.scaled(20), (visible_messages / total_messages) * track)
+            scroll_bar_y = self.margin_top + (self.scroll_offset / total_messages) * track
             
             # Draw scroll bar
-            scroll_bar_x = self.text_area_width - 10
+            scroll_bar_x = self.text_area_width - self.scaled(10)
             pygame.draw.rect(surface, (50, 50, 50), 
-                           (scroll_bar_x, self.margin_top, 5, 100))
+                           (scroll_bar_x, self.margin_top, self.scaled(5), track))
             pygame.draw.rect(surface, (100, 100, 100), 
-                           (scroll_bar_x, scroll_bar_y, 5, scroll_bar_height))
+                           (scroll_bar_x, scroll_bar_y, self.scaled(5), scroll_bar_height))
             
             # Show scroll indicators
             if self.scroll_offset > 0:
                 crt_renderer.render_ui_text(surface, "↑ More", 
-                                          (self.margin_left, self.margin_top - 15), 'GRAY')
+                                          (self.margin_left, self.margin_top - self.scaled(15)), 'GRAY')
             
             if self.scroll_offset < len(self.messages) - self.max_lines:
                 bottom_y = self.margin_top + self.max_lines * self.line_height
@@ -228,7 +241,7 @@ class TextManager:
         self.typewriter_mode = enabled
         self.current_message_chars = 0
     
-    def update_typewriter(self):
-        """Update typewriter effect"""
+    def update_typewriter(self, dt):
+        """Advance the typewriter effect by dt seconds"""
         if self.typewriter_mode and self.messages:
-            self.current_message_chars += self.typewriter_speed
\ No newline at end of file
+            self.current_message_chars += self.typewriter_speed * dt
\ No newline at end of file
@@ -0,0 +1,427 @@
+"""Multi-session text server: the adventure for many players over TCP.
+
+Usage: python text_server.py [--host HOST] [--port N] [--world FILE] [--max-sessions N]
+
+Connect with any telnet-style client (telnet, nc). Every connection is a
+Session with its own GameState, undo history, command history, message log,
+save slots and timers. The world, the command parser, the typo index and the
+ASCII sprites are loaded once and shared by every session, since nothing a
+session does changes them. A Session is a GameHost (see game_host.py), so
+commands follow the same rules as in the game window; it supplies only the
+I/O, writing what the window would have drawn as lines of ANSI-coloured
+text, one write per command. An exception in the game is logged and
+reported to that player without closing the connection.
+
+Timers (delayed effects and the end of the game) run in wall-clock time on
+the asyncio loop. Saving keeps snapshots in the session's memory; nothing a
+player does touches the disk.
+
+Every STATS_INTERVAL seconds the server prints the number of sessions, the
+commands handled per second and the memory a sample of the sessions holds.
+A session's memory is its own objects walked with sys.getsizeof; strings it
+shares with the world, such as room and item names, are counted as well, so
+the figure is an upper bound.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import traceback
+from collections import deque
+
+import save_game
+from ascii_art import ASCIIManager
+from command_parser import CommandParser
+from fuzzy import FuzzyIndex
+from game_host import GameHost
+from game_state import GameState
+from undo_history import UndoHistory
+from world import load_world, WorldError
+
+DEFAULT_PORT = 4040
+MAX_SESSIONS = 5000
+
+# Longest line a client may send, in bytes
+MAX_LINE = 1024
+
+# Per-session limits: message log lines, history entries and save slots
+SESSION_LOG = 200
+SESSION_HISTORY = 100
+SESSION_SLOTS = 10
+
+# Seconds between statistics lines, and sessions whose memory each one measures
+STATS_INTERVAL = 10.0
+MEMORY_SAMPLE = 100
+
+PROMPT = "\r\n> "
+ANSI_RESET = "\x1b[0m"
+ANSI_CLEAR = "\x1b[2J\x1b[H"
+ANSI_COLORS = {
+    'GREEN': "\x1b[32m",
+    'RED': "\x1b[91m",
+    'BLUE': "\x1b[94m",
+    'YELLOW': "\x1b[93m",
+    'PURPLE': "\x1b[95m",
+    'WHITE': "\x1b[97m",
+    'GRAY': "\x1b[90m",
+}
+
+
+def deep_size(roots):
+    """Bytes held by the data reachable from roots, each object counted once"""
+    seen = set()
+    stack = list(roots)
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or obj is None or callable(obj):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        elif isinstance(obj, (str, bytes, int, float, bool)):
+            pass
+        elif hasattr(obj, '__slots__'):
+            stack.extend(getattr(obj, name, None) for name in obj.__slots__)
+        elif hasattr(obj, '__dict__'):
+            stack.append(obj.__dict__)
+    return total
+
+
+class Session(GameHost):
+    """One player's game, driven by lines of text and answered with ANSI text"""
+    def __init__(self, server, writer):
+        self.server = server
+        self.writer = writer
+        self.open = True
+        self.input_active = True
+        
+        self.game_state = GameState()
+        self.game_state.current_state = server.world.start
+        self.sprite_key = None
+        self.messages = deque(maxlen=SESSION_LOG)
+        # Recent commands; no search index, since a line-mode client can't browse them
+        self.history = deque(maxlen=SESSION_HISTORY)
+        self.undo_history = UndoHistory()
+        self.slots = {}
+        
+        # Pending asyncio timers; ending is the pending close of the game, if any
+        self.timers = set()
+        self.ending = None
+        
+        # Text written since the last flush
+        self._output = []
+        
+        self.system_commands = {
+            'save': lambda host, command: self.save_game(command.args or 'save'),
+            'load': lambda host, command: self.load_game(command.args or 'save'),
+            'undo': lambda host, command: self.undo_move(),
+            'redo': lambda host, command: self.redo_move(),
+        }
+    
+    # Shared with every other session
+    
+    @property
+    def world(self):
+        return self.server.world
+    
+    @property
+    def parser(self):
+        return self.server.parser
+    
+    @property
+    def typo_index(self):
+        return self.server.typo_index
+    
+    def start(self):
+        """Greet the player"""
+        self._welcome()
+        self.add_game_message("Type 'undo' to take back a move.", "BLUE")
+        self.undo_history.reset(self.game_state, sprite=self.sprite_key)
+        self.flush(prompt=True)
+    
+    def handle_line(self, text):
+        """Run one line the player sent"""
+        text = text.strip()
+        if not self.input_active:
+            return
+        if text:
+            self.history.append(text)
+            try:
+                self._submit_command(self.parser.parse(text), text)
+            except Exception as e:
+                self._game_error(e)
+            self.server.commands += 1
+        self.flush(prompt=self.input_active)
+    
+    def save_game(self, slot):
+        """Keep a snapshot of the current state in a save slot"""
+        if slot not in self.slots and len(self.slots) >= SESSION_SLOTS:
+            self.add_system_message(f"Could not save: at most {SESSION_SLOTS} slots per session.")
+            return
+        self.slots[slot] = save_game.capture(self.game_state, world=self.world.title, sprite=self.sprite_key)
+        self.add_system_message(f"Game saved to slot '{slot}'.")
+    
+    def load_game(self, slot):
+        """Restore the state kept in a save slot"""
+        snapshot = self.slots.get(slot)
+        if snapshot is None:
+            self.add_system_message(f"Could not load '{slot}': no such save.")
+            return
+        save_game.apply_state(snapshot, self.game_state)
+        self.set_sprite(snapshot.sprite)
+        self._cancel_timers()
+        self.ending = None
+        self.input_active = True
+        self.undo_history.reset(self.game_state, sprite=self.sprite_key)
+        self.add_system_message(f"Game loaded from slot '{slot}'.")
+    
+    def _cancel_timers(self):
+        """Cancel every pending asyncio timer of this session"""
+        for timer in self.timers:
+            timer.cancel()
+        self.timers.clear()
+    
+    def _fire(self, callback):
+        """Run a timer's callback, checkpoint what it changed and send whatever it printed"""
+        if not self.open:
+            return
+        try:
+            callback()
+            self.after_timers()
+        except Exception as e:
+            self._game_error(e)
+        self.flush()
+    
+    def _game_error(self, error):
+        """A bug in the game or the world: log it and keep the session going"""
+        self.server.log_error(self, error)
+        self.add_system_message("Something went wrong in the game; the last move may be incomplete.")
+    
+    def stop(self):
+        """End the session and hang up"""
+        if not self.open:
+            return
+        self.flush()
+        self.open = False
+        self.input_active = False
+        self._cancel_timers()
+        self.ending = None
+        self.writer.close()
+    
+    # Output
+    
+    def flush(self, prompt=False):
+        """Send the text written since the last flush in one write"""
+        if prompt:
+            self._output.append(PROMPT)
+        if self._output and self.open and not self.writer.is_closing():
+            self.writer.write(''.join(self._output).encode('utf-8'))
+        self._output.clear()
+    
+    def memory_bytes(self):
+        """Estimated bytes of memory this session holds (see the module docstring)"""
+        return deep_size((self.game_state, self.messages, self.history, self.undo_history, self.slots))
+    
+    # Host interface used by the world's effects
+    
+    def add_game_message(self, text, color='GREEN'):
+        """Print a game message"""
+        self.messages.append((text, color))
+        if self.server.color:
+            self._output.append(f"{ANSI_COLORS.get(color, ANSI_COLORS['GREEN'])}{text}{ANSI_RESET}\r\n")
+        else:
+            self._output.append(f"{text}\r\n")
+    
+    def add_system_message(self, text):
+        """Print a system message"""
+        self.add_game_message(text, 'GRAY')
+    
+    def clear_messages(self):
+        """Clear the message log and the client's screen"""
+        self.messages.clear()
+        if self.server.color:
+            self._output.append(ANSI_CLEAR)
+    
+    def set_sprite(self, name):
+        """Show a different ASCII sprite"""
+        frames = self.server.sprites.get(name)
+        if frames is None or name == self.sprite_key:
+            return
+        self.sprite_key = name
+        for line in frames[0]:
+            self.add_game_message(line, 'WHITE')
+    
+    def play_sound(self, name):
+        """Sounds aren't sent over the wire"""
+    
+    def call_later(self, seconds, callback):
+        """Run callback() after seconds of wall-clock time"""
+        loop = asyncio.get_running_loop()
+        # Forget timers that have fired or been cancelled; a session only has a few
+        self.timers = {timer for timer in self.timers if not timer.cancelled() and timer.when() > loop.time()}
+        timer = loop.call_later(seconds, self._fire, callback)
+        self.timers.add(timer)
+        return timer
+    
+    def set_input_active(self, active):
+        """Enable or disable player input"""
+        self.input_active = active
+
+
+class TextServer:
+    def __init__(self, world_path=None, color=True, max_sessions=MAX_SESSIONS):
+        # Shared by every session, and never changed by one
+        self.world = load_world(world_path)
+        self.parser = CommandParser(self.world.grammar)
+        self.typo_index = FuzzyIndex(set(self.parser.vocabulary()) | self.world.command_phrases())
+        self.sprites = ASCIIManager().sprites
+        
+        self.color = color
+        self.max_sessions = max_sessions
+        self.sessions = set()
+        self.server = None
+        
+        # Statistics
+        self.sessions_opened = 0
+        self.sessions_refused = 0
+        self.commands = 0
+        self.errors = 0
+    
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        """Start listening; returns the port actually bound (for port 0)"""
+        # A large backlog so a burst of connections queues rather than retrying SYNs
+        self.server = await asyncio.start_server(self._connection, host, port, limit=MAX_LINE,
+                                                 backlog=self.max_sessions)
+        return self.server.sockets[0].getsockname()[1]
+    
+    async def serve(self, host='127.0.0.1', port=DEFAULT_PORT, stats_interval=STATS_INTERVAL):
+        """Serve until cancelled"""
+        port = await self.start(host, port)
+        print(f"Serving '{self.world.title}' on {host}:{port}")
+        stats = asyncio.create_task(self._report(stats_interval)) if stats_interval > 0 else None
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            if stats:
+                stats.cancel()
+            self.close()
+    
+    async def _connection(self, reader, writer):
+        if len(self.sessions) >= self.max_sessions:
+            self.sessions_refused += 1
+            writer.write(b"Server full, try again later.\r\n")
+            writer.close()
+            return
+        
+        session = Session(self, writer)
+        self.sessions.add(session)
+        self.sessions_opened += 1
+        try:
+            session.start()
+            await writer.drain()
+            while session.open:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # readline's report of a line longer than MAX_LINE
+                    session.add_system_message("Line too long; closing.")
+                    break
+                if not line:
+                    break
+                # Telnet option negotiation and other control bytes aren't commands
+                text = ''.join(ch for ch in line.decode('utf-8', 'ignore') if ch.isprintable())
+                session.handle_line(text)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            session.stop()
+            self.sessions.discard(session)
+    
+    def log_error(self, session, error):
+        """Report an exception a session's game raised"""
+        self.errors += 1
+        peer = session.writer.get_extra_info('peername')
+        print(f"Warning: error in the session from {peer}: {error!r}", file=sys.stderr)
+        traceback.print_exception(type(error), error, error.__traceback__)
+    
+    def memory_sample(self, size=MEMORY_SAMPLE):
+        """Memory of up to size sessions picked at random, in bytes"""
+        sessions = list(self.sessions)
+        if len(sessions) > size:
+            sessions = random.sample(sessions, size)
+        return [session.memory_bytes() for session in sessions]
+    
+    def stats_line(self, commands_per_second):
+        """One line on the server's load"""
+        line = (f"{len(self.sessions)} sessions ({self.sessions_opened} opened, {self.sessions_refused} refused), "
+                f"{commands_per_second:.0f} commands/sec, {self.errors} errors")
+        sample = self.memory_sample()
+        if sample:
+            line += (f", memory per session mean {sum(sample) / len(sample) / 1024:.1f} KiB, "
+                     f"max {max(sample) / 1024:.1f} KiB")
+        return line
+    
+    async def _report(self, interval):
+        """Print a statistics line every interval seconds while anything is happening"""
+        commands = self.commands
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            if self.commands != commands or self.sessions:
+                print(self.stats_line((self.commands - commands) / (now - last)))
+            commands, last = self.commands, now
+    
+    def close(self):
+        """Hang up on every session and stop listening"""
+        for session in list(self.sessions):
+            session.stop()
+        if self.server:
+            self.server.close()
+    
+    async def stop(self):
+        """Hang up on every session, stop listening and wait until every session has ended"""
+        self.close()
+        while self.sessions:
+            await asyncio.sleep(0.01)
+        if self.server:
+            await self.server.wait_closed()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--world', metavar='FILE', help="world file to serve (default: the built-in world)")
+    parser.add_argument('--max-sessions', type=int, default=MAX_SESSIONS,
+                        help=f"refuse connections beyond this many sessions (default: {MAX_SESSIONS})")
+    parser.add_argument('--stats-interval', type=float, default=STATS_INTERVAL,
+                        help="seconds between statistics lines (0 to turn them off)")
+    parser.add_argument('--no-color', action='store_true', help="send plain text without ANSI colours")
+    args = parser.parse_args(argv)
+    
+    try:
+        server = TextServer(args.world, color=not args.no_color, max_sessions=args.max_sessions)
+    except WorldError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.stats_interval))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""Undo/redo for GameState using structurally shared snapshots.
+
+Each checkpoint is a PMap of the scalar fields plus one nested PMap per
+collection (inventory, flags, visited locations, completed puzzles).
+Recording a checkpoint only touches what changed since the previous one,
+which the history learns by subscribing to the GameState's change events.
+The new snapshot shares every untouched node with the old one, so a command
+that sets one flag in a state with thousands costs a handful of node copies.
+
+Undoing restores exactly the fields and members that the undone step
+changed, which is also proportional to the size of the change.
+"""
+from game_state import SCALAR_FIELDS
+from persistent_map import PMap, ALLOCATED
+
+UNDO_DEPTH = 100
+
+
+class UndoStep:
+    __slots__ = ('before', 'after', 'changes', 'bytes')
+    
+    def __init__(self, before, after, changes, allocated):
+        self.before = before
+        self.after = after
+        self.changes = changes  # scalar field names and (collection, member) pairs
+        self.bytes = allocated
+
+
+class UndoHistory:
+    def __init__(self, depth=UNDO_DEPTH):
+        self.depth = depth
+        self.undo_steps = []
+        self.redo_steps = []
+        self.current = None
+        self._inventory_order = 0
+        
+        # The state being tracked and what changed in it since the last checkpoint
+        self.game_state = None
+        self._pending = {}
+        self._applying = False
+        
+        # Statistics: estimated bytes of snapshot nodes held by the steps
+        self.memory_bytes = 0
+        self.recorded = 0
+    
+    def reset(self, game_state, **extra):
+        """Forget all steps and take a full snapshot of the state as it is now"""
+        if self.game_state is not game_state:
+            if self.game_state is not None:
+                self.game_state.unsubscribe(self._on_change)
+            game_state.subscribe(self._on_change)
+            self.game_state = game_state
+        
+        self._inventory_order = len(game_state.inventory)
+        fields = {name: getattr(game_state, name) for name in SCALAR_FIELDS}
+        fields.update(extra)
+        fields.update(
+            inventory=PMap((item, order) for order, item in enumerate(game_state.inventory)),
+            game_flags=PMap(game_state.game_flags),
+            visited_locations=PMap(dict.fromkeys(game_state.visited_locations, True)),
+            completed_puzzles=PMap(dict.fromkeys(game_state.completed_puzzles, True)),
+        )
+        self.current = PMap(fields)
+        self.undo_steps.clear()
+        self.redo_steps.clear()
+        self.memory_bytes = 0
+        self._pending.clear()
+    
+    def _on_change(self, change):
+        """Remember which field or member changed until the next checkpoint"""
+        if not self._applying:
+            self._pending[(change.field, change.key)] = change.new
+    
+    def record(self, game_state, **extra):
+        """Checkpoint whatever changed since the last checkpoint; returns whether anything did"""
+        if self.current is None or self.game_state is not game_state:
+            self.reset(game_state, **extra)
+            return False
+        
+        allocated = ALLOCATED['bytes']
+        snapshot = self.current
+        changes = []
+        for name, value in extra.items():
+            if snapshot.get(name) != value:
+                snapshot = snapshot.set(name, value)
+                changes.append(name)
+        
+        if self._pending:
+            collections = {}
+            for (field, key), value in self._pending.items():
+                if key is None and field in SCALAR_FIELDS:
+                    if snapshot.get(field) != value:
+                        snapshot = snapshot.set(field, value)
+                        changes.append(field)
+                    continue
+                
+                stored = collections[field] if field in collections else snapshot[field]
+                if value is None:
+                    stored = stored.delete(key)
+                elif field != 'inventory':
+                    stored = stored.set(key, value)
+                elif key not in stored:
+                    # Inventory members map to the order they were picked up in
+                    stored = stored.set(key, self._inventory_order)
+                    self._inventory_order += 1
+                collections[field] = stored
+                changes.append((field, key))
+            self._pending.clear()
+            for field, stored in collections.items():
+                snapshot = snapshot.set(field, stored)
+        
+        if snapshot is self.current:
+            return False
+        
+        step = UndoStep(self.current, snapshot, tuple(changes), ALLOCATED['bytes'] - allocated)
+        self.undo_steps.append(step)
+        self.memory_bytes += step.bytes
+        self.recorded += 1
+        if len(self.undo_steps) > self.depth:
+            self.memory_bytes -= self.undo_steps.pop(0).bytes
+        for dropped in self.redo_steps:
+            self.memory_bytes -= dropped.bytes
+        self.redo_steps.clear()
+        self.current = snapshot
+        return True
+    
+    def can_undo(self):
+        return bool(self.undo_steps)
+    
+    def can_redo(self):
+        return bool(self.redo_steps)
+    
+    def undo(self, game_state):
+        """Roll the state back one step; returns the restored snapshot or None"""
+        if not self.undo_steps:
+            return None
+        step = self.undo_steps.pop()
+        self.redo_steps.append(step)
+        # Changes not checkpointed yet would otherwise land in the next
+        # snapshot on top of the restored state
+        self._pending.clear()
+        self._apply(game_state, step.before, step.changes)
+        return self.current
+    
+    def redo(self, game_state):
+        """Re-apply the last undone step; returns the restored snapshot or None"""
+        if not self.redo_steps:
+            return None
+        step = self.redo_steps.pop()
+        self.undo_steps.append(step)
+        self._pending.clear()
+        self._apply(game_state, step.after, step.changes)
+        return self.current
+    
+    def _apply(self, game_state, snapshot, changes):
+        """Write the changed fields and members of snapshot back into game_state"""
+        self._applying = True
+        try:
+            appended = 0
+            for change in changes:
+                if isinstance(change, str):
+                    if change in SCALAR_FIELDS:
+                        setattr(game_state, change, snapshot.get(change))
+                    continue
+                
+                field, key = change
+                value = snapshot[field].get(key)
+                if field == 'inventory':
+                    if value is not None and key not in game_state.inventory:
+                        appended += 1
+                    value = None if value is None else True
+                game_state.set_member(field, key, value)
+            
+            if appended:
+                # Items come back in the order they were first picked up; usually
+                # that is the end of the list already
+                order = snapshot['inventory']
+                tail = [order.get(item) for item in list(game_state.inventory)[-appended - 1:]]
+                if tail != sorted(tail):
+                    game_state.inventory = sorted(game_state.inventory, key=order.get)
+        finally:
+            self._applying = False
+        self.current = snapshot
\ No newline at end of file
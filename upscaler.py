@@ -0,0 +1,84 @@
+"""Showing a fixed-size render target in a resizable window.
+
+The game draws the scene and all of its CRT effects into an internal
+surface whose size doesn't depend on the window, so the per-pixel effect
+work costs the same in a small window as in 4K fullscreen. Once per frame
+the Upscaler scales that surface into the window, centred, with black bars
+where the aspect ratios differ:
+
+    integer   nearest-neighbour by the largest whole factor that fits
+    scale2x   pygame.transform.scale2x as many times as fits, for smoother
+              diagonals, then nearest-neighbour for any odd factor left
+    smooth    pygame.transform.smoothscale to fill as much as the aspect allows
+
+Whole-factor modes fall back to smooth when the window is smaller than the
+render target. The fourth mode, sdl, is pygame.SCALED: SDL's renderer does
+the scaling (usually on the GPU) and no Upscaler is needed.
+"""
+import pygame
+
+UPSCALE_MODES = ('integer', 'scale2x', 'smooth', 'sdl')
+
+
+class Upscaler:
+    def __init__(self, size, mode='integer'):
+        self.size = size
+        self.mode = mode
+        self.window_size = None
+        self.target = None
+        self.scaled = False
+        self.smooth = False
+        self.doubles = []
+        
+        # Statistics
+        self.layouts = 0
+    
+    def _layout(self, display):
+        """Work out where frames go in a window of a new size"""
+        self.window_size = display.get_size()
+        window_width, window_height = self.window_size
+        width, height = self.size
+        factor = min(window_width // width, window_height // height)
+        self.smooth = self.mode == 'smooth' or factor < 1
+        if self.smooth:
+            fit = min(window_width / width, window_height / height)
+            size = (max(1, int(width * fit)), max(1, int(height * fit)))
+        else:
+            size = (width * factor, height * factor)
+        
+        # Frames are scaled straight into the middle of the window; the bars stay black
+        rect = pygame.Rect((0, 0), size)
+        rect.center = display.get_rect().center
+        display.fill((0, 0, 0))
+        self.target = display.subsurface(rect)
+        self.scaled = size != self.size
+        
+        # scale2x doubles as often as the factor allows; the last doubling
+        # goes straight into the window when nothing is left to scale
+        self.doubles = []
+        if self.mode == 'scale2x' and not self.smooth:
+            doubled = 2
+            while factor % doubled == 0:
+                self.doubles.append(pygame.Surface((width * doubled, height * doubled), 0, display))
+                doubled *= 2
+            if self.doubles and doubled // 2 == factor:
+                self.doubles[-1] = self.target
+        self.layouts += 1
+    
+    def present(self, frame):
+        """Scale a finished frame into the window and update the display"""
+        display = pygame.display.get_surface()
+        if display.get_size() != self.window_size:
+            self._layout(display)
+        
+        if not self.scaled:
+            self.target.blit(frame, (0, 0))
+        elif self.smooth:
+            pygame.transform.smoothscale(frame, self.target.get_size(), self.target)
+        else:
+            for double in self.doubles:
+                pygame.transform.scale2x(frame, double)
+                frame = double
+            if frame is not self.target:
+                pygame.transform.scale(frame, self.target.get_size(), self.target)
+        pygame.display.flip()
\ No newline at end of file
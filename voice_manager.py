@@ -0,0 +1,90 @@
+"""Per-category mixer channel pools with voice stealing and rate limits.
+
+Every sound category owns a fixed set of reserved channels. Triggering a
+sound takes a free channel from its pool, or steals the one that started
+longest ago, so a burst of keystrokes can never starve other categories or
+make the mixer refuse to play. A per-category minimum interval drops
+triggers that arrive faster than they could be heard anyway.
+"""
+import time
+
+import pygame
+
+# voices: channels reserved for the category
+# min_interval: seconds that must pass between two triggers
+VOICE_CATEGORIES = {
+    'ui': {'voices': 2, 'min_interval': 0.0},
+    'keys': {'voices': 3, 'min_interval': 0.03},
+    'sfx': {'voices': 3, 'min_interval': 0.0},
+}
+
+# Channels left unreserved for pygame's own Sound.play() allocation
+FREE_CHANNELS = 4
+
+
+class VoicePool:
+    def __init__(self, channels, min_interval):
+        self.channels = channels
+        self.started = [float('-inf')] * len(channels)
+        self.min_interval = min_interval
+        self.last_trigger = float('-inf')
+        
+        # Statistics
+        self.played = 0
+        self.stolen = 0
+        self.rate_limited = 0
+    
+    def acquire(self):
+        """Pick a channel index: a free one, else the oldest voice"""
+        for index, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return index
+        self.stolen += 1
+        return min(range(len(self.channels)), key=self.started.__getitem__)
+
+
+class VoiceManager:
+    def __init__(self, first_channel, categories=VOICE_CATEGORIES, clock=time.monotonic):
+        self.clock = clock
+        self.pools = {}
+        
+        next_channel = first_channel
+        total = first_channel + sum(config['voices'] for config in categories.values())
+        if pygame.mixer.get_num_channels() < total + FREE_CHANNELS:
+            pygame.mixer.set_num_channels(total + FREE_CHANNELS)
+        pygame.mixer.set_reserved(total)
+        
+        for name, config in categories.items():
+            channels = [pygame.mixer.Channel(next_channel + i) for i in range(config['voices'])]
+            self.pools[name] = VoicePool(channels, config['min_interval'])
+            next_channel += config['voices']
+    
+    def play(self, category, sound, volume=1.0):
+        """Play a sound on its category's pool; returns the Channel or None"""
+        pool = self.pools[category]
+        now = self.clock()
+        if now - pool.last_trigger < pool.min_interval:
+            pool.rate_limited += 1
+            return None
+        
+        index = pool.acquire()
+        channel = pool.channels[index]
+        channel.play(sound)
+        channel.set_volume(volume)
+        
+        pool.started[index] = now
+        pool.last_trigger = now
+        pool.played += 1
+        return channel
+    
+    def stop_category(self, category):
+        """Silence every voice in a category"""
+        for channel in self.pools[category].channels:
+            channel.stop()
+    
+    def get_stats(self):
+        """Get per-category play/steal/rate-limit counters"""
+        return {
+            name: {'played': pool.played, 'stolen': pool.stolen, 'rate_limited': pool.rate_limited}
+            for name, pool in self.pools.items()
+        }
\ No newline at end of file
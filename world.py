@@ -0,0 +1,481 @@
+"""Data-driven adventure worlds.
+
+A world file (JSON, or TOML on Python 3.11+) declares the grammar, the rooms,
+and for every room the commands it understands as lists of effects such as
+printing a message, moving to another room, changing the sprite or giving
+an item. Effects can be guarded by conditions on the inventory, flags,
+health or the command's arguments.
+
+Loading happens in two stages:
+
+1. The file is validated and compiled into an intermediate form of plain
+   tuples, with command text resolved to (verb, object) dispatch keys and
+   every room reference checked. That form is pickled into the cache,
+   keyed by a hash of the file and of this module, so an unchanged world
+   is never parsed twice. Each room is pickled separately.
+2. A room's tuples are unpickled and turned into closures the first time
+   the player enters it. Its dispatch table maps (verb, object) keys
+   straight to those closures.
+
+Effects run against a host object that provides game_state,
+add_game_message(text, color), clear_messages(), goto(room),
+set_sprite(name), play_sound(name), end_game(seconds),
+set_input_active(active) and call_later(seconds, callback), which the
+'after' effect uses to delay its effects. The game implements these, but
+so can anything else that wants to run a world without a window.
+"""
+import hashlib
+import json
+import os
+import pickle
+import string
+
+import app_paths
+from command_parser import CommandParser, DEFAULT_GRAMMAR
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+WORLD_FORMAT = 1
+DEFAULT_WORLD = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'worlds', 'default.json')
+DEFAULT_COLOR = 'GREEN'
+
+# Effect keys that may sit next to an effect's action key
+EFFECT_OPTIONS = {
+    'say': {'color'},
+    'set': {'value'},
+    'if': {'then', 'else'},
+    'after': {'then'},
+}
+EFFECT_ACTIONS = ('say', 'clear', 'goto', 'sprite', 'sound', 'give', 'take', 'set', 'damage', 'heal',
+                  'inventory', 'if', 'after', 'end', 'input', 'run')
+CONDITIONS = ('has', 'flag', 'health_at_most', 'args', 'not', 'all', 'any')
+
+# Placeholders a 'say' message may use, with a sample value of each one's type
+SAY_FIELDS = {'text': '', 'args': '', 'health': 0, 'room': ''}
+
+
+class WorldError(Exception):
+    """A world file that can't be read or compiled"""
+
+
+def _code_fingerprint():
+    """Hash of this module, so compiler changes invalidate cached worlds"""
+    try:
+        with open(__file__, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return 'unknown'
+
+
+# Compilation: world source -> plain, picklable tuples
+
+class _Compiler:
+    def __init__(self, source):
+        if not isinstance(source, dict):
+            raise WorldError("world must be a table of settings")
+        if source.get('format', WORLD_FORMAT) != WORLD_FORMAT:
+            raise WorldError(f"unsupported world format {source.get('format')!r}")
+        
+        self.source = source
+        self.grammar = source.get('grammar') or DEFAULT_GRAMMAR
+        self.parser = CommandParser(self.grammar)
+        self.rooms = source.get('rooms')
+        if not isinstance(self.rooms, dict) or not self.rooms:
+            raise WorldError("world has no rooms")
+    
+    def compile(self):
+        """Return (index, {room: room_tuples})"""
+        start = self.source.get('start', next(iter(self.rooms)))
+        if start not in self.rooms:
+            raise WorldError(f"start room '{start}' is not defined")
+        
+        command_sounds = {}
+        for text, sound in (self.source.get('command_sounds') or {}).items():
+            command_sounds[self._key(text, 'command_sounds')] = sound
+        
+        index = {
+            'title': self.source.get('title', ''),
+            'start': start,
+            'grammar': self.grammar,
+            'command_sounds': command_sounds,
+            'rooms': {},
+        }
+        rooms = {}
+        for name, room in self.rooms.items():
+            rooms[name], index['rooms'][name] = self._compile_room(name, room)
+        return index, rooms
+    
+    def _key(self, text, where):
+        """Resolve command text like 'use terminal' to its (verb, object) key"""
+        command = self.parser.parse_uncached(text)
+        if command is None or not command.known or command.args:
+            raise WorldError(f"{where}: '{text}' is not a verb with an optional known object")
+        return command.key
+    
+    def _compile_room(self, name, room):
+        """Compile one room, returning (room_tuples, index_entry)"""
+        where = f"rooms.{name}"
+        if not isinstance(room, dict):
+            raise WorldError(f"{where}: room must be a table")
+        
+        raw_commands = room.get('commands') or {}
+        keyed = {}
+        for text, effects in raw_commands.items():
+            key = self._key(text, f"{where}.commands")
+            if key in keyed:
+                raise WorldError(f"{where}.commands: '{text}' duplicates another command")
+            keyed[key] = (text, effects)
+        
+        self.exits = set()
+        commands = {}
+        for key, (text, effects) in keyed.items():
+            commands[key] = self._effects(effects, f"{where}.commands.{text}", keyed, (key,))
+        fallback = None
+        if room.get('fallback') is not None:
+            fallback = self._effects(room['fallback'], f"{where}.fallback", keyed, ())
+        
+        entry = {'keys': sorted(commands, key=str), 'exits': sorted(self.exits), 'fallback': fallback is not None}
+        return {'commands': commands, 'fallback': fallback}, entry
+    
+    def _effects(self, effects, where, keyed, running):
+        """Compile a list of effects into a tuple of effect tuples"""
+        if isinstance(effects, dict):
+            effects = [effects]
+        if not isinstance(effects, list):
+            raise WorldError(f"{where}: expected a list of effects")
+        
+        compiled = []
+        for position, effect in enumerate(effects):
+            compiled.extend(self._effect(effect, f"{where}[{position}]", keyed, running))
+        return tuple(compiled)
+    
+    def _effect(self, effect, where, keyed, running):
+        """Compile one effect; 'run' expands to the effects of another command"""
+        if not isinstance(effect, dict):
+            raise WorldError(f"{where}: effect must be a table")
+        actions = [key for key in effect if key in EFFECT_ACTIONS]
+        if len(actions) != 1:
+            raise WorldError(f"{where}: effect needs exactly one of {', '.join(EFFECT_ACTIONS)}")
+        action = actions[0]
+        extra = set(effect) - {action} - EFFECT_OPTIONS.get(action, set())
+        if extra:
+            raise WorldError(f"{where}: unexpected key(s) {', '.join(sorted(extra))}")
+        value = effect[action]
+        
+        if action == 'say':
+            text, formatted = self._say_text(str(value), where)
+            return [('say', text, effect.get('color', DEFAULT_COLOR), formatted)]
+        if action == 'goto':
+            if value not in self.rooms:
+                raise WorldError(f"{where}: room '{value}' is not defined")
+            self.exits.add(value)
+            return [('goto', value)]
+        if action in ('sprite', 'sound', 'give', 'take'):
+            return [(action, str(value))]
+        if action == 'set':
+            return [('set', str(value), effect.get('value', True))]
+        if action in ('damage', 'heal', 'end', 'after'):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise WorldError(f"{where}: '{action}' needs a number")
+            if action in ('damage', 'heal') and not isinstance(value, int):
+                # Health is a whole number, and saves store it as one
+                raise WorldError(f"{where}: '{action}' needs a whole number")
+            if action == 'after':
+                return [('after', value, self._effects(effect.get('then', []), f"{where}.then", keyed, running))]
+            return [(action, value)]
+        if action in ('clear', 'inventory'):
+            return [(action,)] if value else []
+        if action == 'input':
+            return [('input', bool(value))]
+        if action == 'if':
+            return [('if', self._condition(value, f"{where}.if"),
+                     self._effects(effect.get('then', []), f"{where}.then", keyed, running),
+                     self._effects(effect.get('else', []), f"{where}.else", keyed, running))]
+        
+        # run: inline another command of this room
+        key = self._key(value, where)
+        if key not in keyed:
+            raise WorldError(f"{where}: this room has no command '{value}' to run")
+        if key in running:
+            raise WorldError(f"{where}: 'run' loops back to '{value}'")
+        text, effects = keyed[key]
+        return list(self._effects(effects, f"{where}.run", keyed, running + (key,)))
+    
+    def _say_text(self, text, where):
+        """Check a message's placeholders; returns (text, whether it needs formatting at runtime)"""
+        try:
+            parts = list(string.Formatter().parse(text))
+        except ValueError as e:
+            raise WorldError(f"{where}: bad braces in message ({e}); write {{{{ and }}}} for literal braces")
+        fields = [field for _, field, _, _ in parts if field is not None]
+        unknown = [field for field in fields if field not in SAY_FIELDS]
+        if unknown:
+            raise WorldError(f"{where}: unknown placeholder '{{{unknown[0]}}}' in message "
+                             f"(use {', '.join(f'{{{name}}}' for name in SAY_FIELDS)})")
+        if not fields:
+            # Only literal text, perhaps with escaped braces: resolve them now
+            return ''.join(literal for literal, _, _, _ in parts), False
+        try:
+            text.format(**SAY_FIELDS)
+        except (ValueError, TypeError) as e:
+            raise WorldError(f"{where}: bad placeholder in message ({e})")
+        return text, True
+    
+    def _condition(self, condition, where):
+        """Compile a condition table into a condition tuple"""
+        if not isinstance(condition, dict):
+            raise WorldError(f"{where}: condition must be a table")
+        tests = [key for key in condition if key in CONDITIONS]
+        if len(tests) != 1:
+            raise WorldError(f"{where}: condition needs exactly one of {', '.join(CONDITIONS)}")
+        test = tests[0]
+        value = condition[test]
+        
+        if test == 'flag':
+            return ('flag', str(value), condition.get('value', True))
+        if test == 'health_at_most':
+            return ('health_at_most', value)
+        if test == 'not':
+            return ('not', self._condition(value, f"{where}.not"))
+        if test in ('all', 'any'):
+            if not isinstance(value, list):
+                raise WorldError(f"{where}: '{test}' needs a list of conditions")
+            return (test, tuple(self._condition(item, f"{where}.{test}[{i}]") for i, item in enumerate(value)))
+        return (test, str(value))
+
+
+# Runtime: effect tuples -> closures over a host
+
+def _get_value(state, name):
+    """Read a GameState attribute, or a game flag if there is no such attribute"""
+    value = getattr(state, name, None)
+    if value is None or callable(value):
+        return state.get_flag(name)
+    return value
+
+
+def _set_value(state, name, value):
+    """Set a GameState attribute if it exists, otherwise a game flag"""
+    if hasattr(state, name) and not callable(getattr(state, name)):
+        setattr(state, name, value)
+    else:
+        state.set_flag(name, value)
+
+
+def _build_condition(condition):
+    """Turn a condition tuple into a predicate(host, command)"""
+    test = condition[0]
+    if test == 'has':
+        item = condition[1]
+        return lambda host, command: host.game_state.has_item(item)
+    if test == 'flag':
+        name, value = condition[1], condition[2]
+        return lambda host, command: _get_value(host.game_state, name) == value
+    if test == 'health_at_most':
+        limit = condition[1]
+        return lambda host, command: host.game_state.health <= limit
+    if test == 'args':
+        args = condition[1]
+        return lambda host, command: command.args == args
+    if test == 'not':
+        inner = _build_condition(condition[1])
+        return lambda host, command: not inner(host, command)
+    parts = [_build_condition(part) for part in condition[1]]
+    combine = all if test == 'all' else any
+    return lambda host, command: combine(part(host, command) for part in parts)
+
+
+def _say(text, color, formatted):
+    """Effect printing a message; {text}, {args}, {health} and {room} are filled in"""
+    if not formatted:
+        return lambda host, command: host.add_game_message(text, color)
+    
+    def effect(host, command):
+        state = host.game_state
+        host.add_game_message(text.format(text=command.text, args=command.args,
+                                          health=state.health, room=state.current_state), color)
+    return effect
+
+
+def _build_effect(effect):
+    """Turn one effect tuple into a callable(host, command)"""
+    action = effect[0]
+    if action == 'say':
+        return _say(*effect[1:])
+    if action == 'clear':
+        return lambda host, command: host.clear_messages()
+    if action == 'goto':
+        room = effect[1]
+        return lambda host, command: host.goto(room)
+    if action == 'sprite':
+        name = effect[1]
+        return lambda host, command: host.set_sprite(name)
+    if action == 'sound':
+        name = effect[1]
+        return lambda host, command: host.play_sound(name)
+    if action == 'give':
+        item = effect[1]
+        return lambda host, command: host.game_state.add_to_inventory(item)
+    if action == 'take':
+        item = effect[1]
+        return lambda host, command: host.game_state.remove_from_inventory(item)
+    if action == 'set':
+        name, value = effect[1], effect[2]
+        return lambda host, command: _set_value(host.game_state, name, value)
+    if action == 'damage':
+        amount = effect[1]
+        return lambda host, command: host.game_state.take_damage(amount)
+    if action == 'heal':
+        amount = effect[1]
+        return lambda host, command: host.game_state.heal(amount)
+    if action == 'inventory':
+        return lambda host, command: host.game_state.show_inventory(host)
+    if action == 'end':
+        seconds = effect[1]
+        return lambda host, command: host.end_game(seconds)
+    if action == 'input':
+        active = effect[1]
+        return lambda host, command: host.set_input_active(active)
+    if action == 'after':
+        seconds, then = effect[1], build_effects(effect[2])
+        return lambda host, command: host.call_later(seconds, lambda: then(host, command))
+    if action == 'if':
+        condition = _build_condition(effect[1])
+        then, otherwise = build_effects(effect[2]), build_effects(effect[3])
+        
+        def branch(host, command):
+            if condition(host, command):
+                then(host, command)
+            else:
+                otherwise(host, command)
+        return branch
+    raise WorldError(f"unknown effect '{action}'")
+
+
+def build_effects(effects):
+    """Turn a tuple of effect tuples into a single handler(host, command)"""
+    steps = [_build_effect(effect) for effect in effects]
+    if len(steps) == 1:
+        return steps[0]
+    
+    def handler(host, command):
+        for step in steps:
+            step(host, command)
+    return handler
+
+
+class Room:
+    def __init__(self, name, compiled, exits):
+        self.name = name
+        self.exits = exits
+        
+        # Precomputed transition table: (verb, object) -> handler
+        self.table = {key: build_effects(effects) for key, effects in compiled['commands'].items()}
+        self.fallback = build_effects(compiled['fallback']) if compiled['fallback'] is not None else None
+        
+        # What TAB completion offers in this room
+        self.verbs = {verb for verb, _ in self.table}
+        self.objects = {obj for _, obj in self.table if obj}
+    
+    def find(self, command):
+        """Handler for a command: exact (verb, object), then the bare verb"""
+        return self.table.get(command.key) or self.table.get((command.verb, None))
+
+
+class World:
+    def __init__(self, index, room_blobs, path=None):
+        self.path = path
+        self.title = index['title']
+        self.start = index['start']
+        self.grammar = index['grammar']
+        self.command_sounds = index['command_sounds']
+        self.room_info = index['rooms']
+        
+        # Rooms stay pickled until first entered
+        self._room_blobs = room_blobs
+        self._rooms = {}
+        
+        # Statistics
+        self.from_cache = False
+    
+    def __contains__(self, name):
+        return name in self.room_info
+    
+    @property
+    def rooms_loaded(self):
+        """How many rooms have been compiled to handlers so far"""
+        return len(self._rooms)
+    
+    def room(self, name):
+        """The compiled Room called name, or None"""
+        room = self._rooms.get(name)
+        if room is None and name in self._room_blobs:
+            room = Room(name, pickle.loads(self._room_blobs[name]), self.room_info[name]['exits'])
+            self._rooms[name] = room
+        return room
+    
+    def command_phrases(self):
+        """Text of every command any room accepts, without loading the rooms"""
+        phrases = set()
+        for info in self.room_info.values():
+            phrases.update(' '.join(part for part in key if part) for key in info['keys'])
+        return phrases
+
+
+def _read_source(path, data):
+    """Decode a world file by its extension"""
+    try:
+        if path.endswith('.toml'):
+            if tomllib is None:
+                raise WorldError(f"{path}: TOML worlds need Python 3.11 or newer")
+            return tomllib.loads(data.decode('utf-8'))
+        return json.loads(data.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise WorldError(f"{path}: {e}") from e
+
+
+def compile_world(source, path=None):
+    """Compile a world from an already-decoded table"""
+    index, rooms = _Compiler(source).compile()
+    return World(index, {name: pickle.dumps(room) for name, room in rooms.items()}, path)
+
+
+def load_world(path=None, use_cache=True):
+    """Load a world file, reusing its cached compiled form when it is unchanged"""
+    path = path or DEFAULT_WORLD
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        raise WorldError(f"Could not read world {path}: {e}") from e
+    
+    cache_path = None
+    if use_cache:
+        key = hashlib.sha256(_code_fingerprint().encode('ascii') + data).hexdigest()
+        try:
+            cache_path = os.path.join(app_paths.cache_dir('worlds'), f"{key}.pickle")
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            world = World(cached['index'], cached['rooms'], path)
+            world.from_cache = True
+            return world
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError):
+            pass
+    
+    world = compile_world(_read_source(path, data), path)
+    if cache_path is not None:
+        blob = pickle.dumps({'index': {
+            'title': world.title,
+            'start': world.start,
+            'grammar': world.grammar,
+            'command_sounds': world.command_sounds,
+            'rooms': world.room_info,
+        }, 'rooms': world._room_blobs}, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            app_paths.atomic_write(cache_path, blob)
+        except OSError as e:
+            print(f"Warning: Could not cache compiled world: {e}")
+    return world
\ No newline at end of file